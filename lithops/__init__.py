@@ -5,7 +5,7 @@ from lithops.executors import StandaloneExecutor
 from lithops.retries import RetryingFunctionExecutor
 from lithops.storage import Storage
 from lithops.version import __version__
-from lithops.wait import wait, get_result
+from lithops.wait import wait, get_result, iter_results
 
 __all__ = [
     'FunctionExecutor',
@@ -16,5 +16,6 @@ __all__ = [
     'Storage',
     'wait',
     'get_result',
+    'iter_results',
     '__version__',
 ]
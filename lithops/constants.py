@@ -40,10 +40,15 @@ STORAGE_BACKEND_DEFAULT = 'aws_s3'
 
 JOBS_PREFIX = "lithops.jobs"
 TEMP_PREFIX = "lithops.jobs/tmp"
+FUNCTIONS_PREFIX = "lithops.jobs/functions"
+FUNCTIONS_MAX_AGE = 4 * 24 * 3600  # Seconds since the last upload of a function before it is deleted
+CONFIGS_PREFIX = "lithops.jobs/configs"
+PARTITIONS_PREFIX = "lithops.partitions"
 LOGS_PREFIX = "lithops.logs"
 RUNTIMES_PREFIX = "lithops.runtimes"
 
 MAX_AGG_DATA_SIZE = 4  # 4MiB
+MAP_WINDOW_SIZE = 10000  # Elements of iterator iterdata per map job
 
 WORKER_PROCESSES_DEFAULT = 1
 
@@ -53,6 +58,7 @@ LITHOPS_TEMP_DIR = os.path.join(TEMP_DIR, USER_TEMP_DIR)
 JOBS_DIR = os.path.join(LITHOPS_TEMP_DIR, 'jobs')
 LOGS_DIR = os.path.join(LITHOPS_TEMP_DIR, 'logs')
 MODULES_DIR = os.path.join(LITHOPS_TEMP_DIR, 'modules')
+FUNCTIONS_DIR = os.path.join(LITHOPS_TEMP_DIR, 'functions')
 CUSTOM_RUNTIME_DIR = os.path.join(LITHOPS_TEMP_DIR, 'custom-runtime')
 
 RN_LOG_FILE = os.path.join(LITHOPS_TEMP_DIR, 'localhost-runner.log')
@@ -92,6 +98,7 @@ SA_DEFAULT_CONFIG_KEYS = {
     'use_gpu': False,
     'start_timeout': 300,
     'auto_dismantle': True,
+    'warm_runners': False,
     'soft_dismantle_timeout': 300,
     'hard_dismantle_timeout': 3600
 }
@@ -22,23 +22,25 @@ import atexit
 import pickle
 import tempfile
 import subprocess as sp
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Union, Tuple, Dict, Any
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 from datetime import datetime
 
 from lithops import constants
 from lithops.future import ResponseFuture
 from lithops.invokers import create_invoker
-from lithops.storage import InternalStorage
-from lithops.wait import wait, ALL_COMPLETED, THREADPOOL_SIZE, ALWAYS
-from lithops.job import create_map_job, create_reduce_job
+from lithops.storage import get_internal_storage
+from lithops.wait import wait, iter_results, ALL_COMPLETED, THREADPOOL_SIZE, ALWAYS
+from lithops.job import create_map_job, create_reduce_job, get_reduce_groups, get_shuffle_map_job
 from lithops.config import default_config, \
     extract_localhost_config, extract_standalone_config, \
     extract_serverless_config, get_log_info, extract_storage_config
 from lithops.constants import LOCALHOST, CLEANER_DIR, \
     SERVERLESS, STANDALONE
 from lithops.utils import setup_lithops_logger, \
-    is_lithops_worker, create_executor_id, create_futures_list
+    is_lithops_worker, create_executor_id, create_futures_list, iterchunks
 from lithops.localhost import LocalhostHandlerV1, LocalhostHandlerV2
 from lithops.standalone import StandaloneHandler
 from lithops.serverless import ServerlessHandler
@@ -81,6 +83,10 @@ class FunctionExecutor:
         self.executor_id = create_executor_id()
         self.futures = []
         self.cleaned_jobs = set()
+        # Object storage listings of the map jobs, by (backend, bucket, prefix, match_pattern)
+        self.listings_cache = {}
+        # Function name and bytes per call of the object processing jobs, by job_id
+        self.obj_jobs = {}
         self.total_jobs = 0
         self.last_call = None
 
@@ -111,7 +117,7 @@ class FunctionExecutor:
             atexit.register(self.clean, clean_cloudobjects=False, clean_fn=True, on_exit=True)
 
         storage_config = extract_storage_config(self.config)
-        self.internal_storage = InternalStorage(storage_config)
+        self.internal_storage = get_internal_storage(storage_config)
         self.storage = self.internal_storage.storage
 
         self.backend = self.config['lithops']['backend']
@@ -167,6 +173,95 @@ class FunctionExecutor:
         self.total_jobs += 1
         return f'{call_type}{job_id}'
 
+    def _get_obj_byte_cost(self, map_function):
+        """
+        Returns the execution time per byte of the finished calls of the
+        previous object processing jobs of map_function, or None if unknown
+        """
+        function_name = getattr(map_function, '__name__', type(map_function).__name__)
+        exec_time = total_bytes = 0
+
+        for f in self.futures:
+            if f.job_id in self.obj_jobs and 'worker_func_exec_time' in f.stats:
+                job_function_name, call_bytes = self.obj_jobs[f.job_id]
+                if job_function_name == function_name:
+                    exec_time += f.stats['worker_func_exec_time']
+                    total_bytes += call_bytes
+
+        return exec_time / total_bytes if exec_time and total_bytes else None
+
+    @staticmethod
+    def _iter_windows(iterdata, window_size):
+        """
+        Yields the windows of window_size elements of an iterator. Each window
+        is produced in a background thread while the previous one is invoked.
+        An empty iterator yields a single empty window, run as an empty job
+        """
+        def produce():
+            return list(islice(iterdata, window_size))
+
+        with ThreadPoolExecutor(1) as producer:
+            window = produce()
+            while True:
+                next_window = producer.submit(produce) if window else None
+                yield window
+                if next_window is None:
+                    return
+                window = next_window.result()
+                if not window:
+                    return
+
+    def _run_map_jobs(self, map_function, map_iterdata, runtime_memory, chunksize, **kwargs):
+        """
+        Creates and runs the map jobs. Iterators are consumed in windows of
+        'map_window_size' elements, and each window is serialized and invoked
+        as its own job while the next one is produced
+
+        :return: the futures of all the map jobs and the last map job
+        """
+        if isinstance(map_iterdata, Iterator):
+            window_size = self.config['lithops'].get('map_window_size', constants.MAP_WINDOW_SIZE)
+            step = chunksize or self.config['lithops']['chunksize'] or 1
+            # Windows hold a whole number of chunks
+            window_size = max(step, window_size - window_size % step)
+            windows = self._iter_windows(map_iterdata, window_size)
+        else:
+            windows = iter([map_iterdata])
+
+        futures = []
+        parts_per_object = []
+        job = None
+
+        for iterdata in windows:
+            job_id = self._create_job_id('M')
+            runtime_meta = self.invoker.select_runtime(job_id, runtime_memory)
+            if kwargs.get('obj_chunk_size') == 'auto':
+                kwargs['obj_byte_cost'] = self._get_obj_byte_cost(map_function)
+            job = create_map_job(
+                config=self.config,
+                internal_storage=self.internal_storage,
+                executor_id=self.executor_id,
+                job_id=job_id,
+                map_function=map_function,
+                iterdata=iterdata,
+                chunksize=chunksize,
+                runtime_meta=runtime_meta,
+                runtime_memory=runtime_memory,
+                listings_cache=self.listings_cache,
+                **kwargs
+            )
+            if hasattr(job, 'obj_bytes') and job.total_calls:
+                self.obj_jobs[job.job_id] = (job.function_name, job.obj_bytes / job.total_calls)
+            job_futures = self.invoker.run_job(job)
+            self.futures.extend(job_futures)
+            futures.extend(job_futures)
+            parts_per_object.extend(getattr(job, 'parts_per_object', []))
+
+        if parts_per_object:
+            job.parts_per_object = parts_per_object
+
+        return futures, job
+
     def call_async(
         self,
         func: Callable,
@@ -221,24 +316,27 @@ class FunctionExecutor:
         extra_args: Optional[Union[List[Any], Tuple[Any, ...], Dict[str, Any]]] = None,
         extra_env: Optional[Dict[str, str]] = None,
         runtime_memory: Optional[int] = None,
-        obj_chunk_size: Optional[int] = None,
+        obj_chunk_size: Optional[Union[int, str]] = None,
         obj_chunk_number: Optional[int] = None,
         obj_newline: Optional[str] = '\n',
         timeout: Optional[int] = None,
         include_modules: Optional[List[str]] = [],
-        exclude_modules: Optional[List[str]] = []
+        exclude_modules: Optional[List[str]] = [],
+        obj_bundle_size: Optional[Union[int, str]] = None
     ) -> FuturesList:
         """
         Spawn multiple function activations based on the items of an input list.
 
         :param map_function: The function to map over the data
-        :param map_iterdata: An iterable of input data (e.g python list).
+        :param map_iterdata: An iterable of input data (e.g python list). Iterators and generators
+                are consumed and submitted in windows of 'map_window_size' elements
         :param chunksize: Split map_iteradata in chunks of this size. Lithops spawns 1 worker per resulting chunk
         :param extra_args: Additional arguments to pass to each map_function activation
         :param extra_env: Additional environment variables for function environment
         :param runtime_memory: Memory (in MB) to use to run the functions
         :param obj_chunk_size: Used for data processing. Chunk size to split each object in bytes.
-                Must be >= 1MiB. 'None' for processing the whole file in one function activation
+                Must be >= 1MiB. 'None' for processing the whole file in one function activation.
+                'auto' to choose it from the size of the objects, the runtime memory and the max workers
         :param obj_chunk_number: Used for data processing. Number of chunks to split each object.
                 'None' for processing the whole file in one function activation. chunk_n has prevalence over chunk_size if both parameters are set
         :param obj_newline: new line character for keeping line integrity of partitions.
@@ -247,25 +345,19 @@ class FunctionExecutor:
         :param include_modules: Explicitly pickle these dependencies. All required dependencies are pickled if default empty list.
                 No one dependency is pickled if it is explicitly set to None
         :param exclude_modules: Explicitly keep these modules from pickled dependencies. It is not taken into account if you set include_modules.
+        :param obj_bundle_size: Used for data processing. Objects smaller than this size in bytes are processed in bundles
+                of up to this size by a single activation, which receives them as an iterable of objects. 'auto' to use the chunk size
 
         :return: A list with size `len(map_iterdata)` of futures for each job (Futures are also internally stored by Lithops).
         """
 
-        job_id = self._create_job_id('M')
         self.last_call = 'map'
 
-        runtime_meta = self.invoker.select_runtime(job_id, runtime_memory)
-
-        job = create_map_job(
-            config=self.config,
-            internal_storage=self.internal_storage,
-            executor_id=self.executor_id,
-            job_id=job_id,
+        futures, _ = self._run_map_jobs(
             map_function=map_function,
-            iterdata=map_iterdata,
-            chunksize=chunksize,
-            runtime_meta=runtime_meta,
+            map_iterdata=map_iterdata,
             runtime_memory=runtime_memory,
+            chunksize=chunksize,
             extra_env=extra_env,
             include_modules=include_modules,
             exclude_modules=exclude_modules,
@@ -273,12 +365,10 @@ class FunctionExecutor:
             extra_args=extra_args,
             obj_chunk_size=obj_chunk_size,
             obj_chunk_number=obj_chunk_number,
-            obj_newline=obj_newline
+            obj_newline=obj_newline,
+            obj_bundle_size=obj_bundle_size
         )
 
-        futures = self.invoker.run_job(job)
-        self.futures.extend(futures)
-
         if isinstance(map_iterdata, FuturesList):
             for fut in map_iterdata:
                 fut._produce_output = False
@@ -297,13 +387,16 @@ class FunctionExecutor:
         map_runtime_memory: Optional[int] = None,
         reduce_runtime_memory: Optional[int] = None,
         timeout: Optional[int] = None,
-        obj_chunk_size: Optional[int] = None,
+        obj_chunk_size: Optional[Union[int, str]] = None,
         obj_chunk_number: Optional[int] = None,
         obj_newline: Optional[str] = '\n',
         obj_reduce_by_key: Optional[bool] = False,
         spawn_reducer: Optional[int] = 20,
         include_modules: Optional[List[str]] = [],
-        exclude_modules: Optional[List[str]] = []
+        exclude_modules: Optional[List[str]] = [],
+        reduce_fanin: Optional[int] = None,
+        shuffle_partitions: Optional[int] = None,
+        obj_bundle_size: Optional[Union[int, str]] = None
     ) -> FuturesList:
         """
         Map the map_function over the data and apply the reduce_function across all futures.
@@ -318,7 +411,8 @@ class FunctionExecutor:
         :param map_runtime_memory: Memory to use to run the map function. Default None (loaded from config)
         :param reduce_runtime_memory: Memory to use to run the reduce function. Default None (loaded from config)
         :param timeout: Time that the functions have to complete their execution before raising a timeout
-        :param obj_chunk_size: the size of the data chunks to split each object. 'None' for processing the whole file in one function activation
+        :param obj_chunk_size: the size of the data chunks to split each object. 'None' for processing the whole file in one function activation.
+                'auto' to choose it from the size of the objects, the runtime memory and the max workers
         :param obj_chunk_number: Number of chunks to split each object. 'None' for processing the whole file in one function activation
         :param obj_newline: New line character for keeping line integrity of partitions.
                 'None' for disabling line integrity logic and get partitions of the exact same size in the functions
@@ -326,36 +420,52 @@ class FunctionExecutor:
         :param spawn_reducer: Percentage of done map functions before spawning the reduce function
         :param include_modules: Explicitly pickle these dependencies.
         :param exclude_modules: Explicitly keep these modules from pickled dependencies.
+        :param reduce_fanin: Max number of results combined by each reducer. Larger reductions are done
+                in a tree of intermediate reducers, so the reduce_function must accept a list of its own results.
+                Default None (one reducer for all the map results)
+        :param shuffle_partitions: Number of reducers of a shuffle. The map_function must return (key, value) pairs,
+                which are hash-partitioned by key, and each reducer gets a list with the pairs of its partition.
+                Default None (no shuffle)
+        :param obj_bundle_size: Objects smaller than this size in bytes are processed in bundles of up to this size
+                by a single map activation, which receives them as an iterable of objects. 'auto' to use the chunk size.
+                It can not be used with obj_reduce_by_key
 
         :return: A list with size `len(map_iterdata)` of futures.
         """
         self.last_call = 'map_reduce'
-        map_job_id = self._create_job_id('M')
 
-        runtime_meta = self.invoker.select_runtime(map_job_id, map_runtime_memory)
+        if reduce_fanin is not None and reduce_fanin < 2:
+            raise ValueError("'reduce_fanin' must be greater than 1")
 
-        map_job = create_map_job(
-            config=self.config,
-            internal_storage=self.internal_storage,
-            executor_id=self.executor_id,
-            job_id=map_job_id,
+        if obj_bundle_size and obj_reduce_by_key:
+            # A bundle holds several objects, whose results would be reduced together
+            raise ValueError("'obj_bundle_size' can not be used with 'obj_reduce_by_key'")
+
+        map_extra_env = extra_env
+        if shuffle_partitions is not None:
+            if shuffle_partitions < 1:
+                raise ValueError("'shuffle_partitions' must be greater than 0")
+            if reduce_fanin or obj_reduce_by_key:
+                raise ValueError("'shuffle_partitions' can not be used with 'reduce_fanin' or 'obj_reduce_by_key'")
+            map_extra_env = {**(extra_env or {}), '__LITHOPS_SHUFFLE_PARTITIONS': str(shuffle_partitions)}
+            extra_env = {**(extra_env or {}), '__LITHOPS_SHUFFLE_JOB': True}
+
+        map_futures, map_job = self._run_map_jobs(
             map_function=map_function,
-            iterdata=map_iterdata,
-            chunksize=chunksize,
-            runtime_meta=runtime_meta,
+            map_iterdata=map_iterdata,
             runtime_memory=map_runtime_memory,
+            chunksize=chunksize,
             extra_args=extra_args,
-            extra_env=extra_env,
+            extra_env=map_extra_env,
             obj_chunk_size=obj_chunk_size,
             obj_chunk_number=obj_chunk_number,
             obj_newline=obj_newline,
+            obj_bundle_size=obj_bundle_size,
             include_modules=include_modules,
             exclude_modules=exclude_modules,
             execution_timeout=timeout
         )
-
-        map_futures = self.invoker.run_job(map_job)
-        self.futures.extend(map_futures)
+        map_job_id = map_job.job_id
 
         if isinstance(map_iterdata, FuturesList):
             for fut in map_iterdata:
@@ -370,29 +480,59 @@ class FunctionExecutor:
 
         runtime_meta = self.invoker.select_runtime(reduce_job_id, reduce_runtime_memory)
 
-        reduce_job = create_reduce_job(
-            config=self.config,
-            internal_storage=self.internal_storage,
-            executor_id=self.executor_id,
-            reduce_job_id=reduce_job_id,
-            reduce_function=reduce_function,
-            map_job=map_job,
-            map_futures=map_futures,
-            runtime_meta=runtime_meta,
-            runtime_memory=reduce_runtime_memory,
-            extra_args=extra_args_reduce,
-            obj_reduce_by_key=obj_reduce_by_key,
-            extra_env=extra_env,
-            include_modules=include_modules,
-            exclude_modules=exclude_modules
-        )
-
-        reduce_futures = self.invoker.run_job(reduce_job)
-        self.futures.extend(reduce_futures)
-
-        [f._set_mapreduce() for f in map_futures]
-
-        return create_futures_list(map_futures + reduce_futures, self)
+        def run_reduce_job(job_id, reduce_groups):
+            reduce_job = create_reduce_job(
+                config=self.config,
+                internal_storage=self.internal_storage,
+                executor_id=self.executor_id,
+                reduce_job_id=job_id,
+                reduce_function=reduce_function,
+                map_job=map_job,
+                map_futures=map_futures,
+                runtime_meta=runtime_meta,
+                runtime_memory=reduce_runtime_memory,
+                extra_args=extra_args_reduce,
+                obj_reduce_by_key=obj_reduce_by_key,
+                extra_env=extra_env,
+                include_modules=include_modules,
+                exclude_modules=exclude_modules,
+                reduce_groups=reduce_groups
+            )
+            futures = self.invoker.run_job(reduce_job)
+            self.futures.extend(futures)
+            return futures
+
+        if shuffle_partitions is not None:
+            # Each shuffle reducer waits for all the map calls, and gets its
+            # partition, given by its call_id, from each one of them. The
+            # reducers rebuild the map futures from the fields of the map job
+            reduce_groups = [get_shuffle_map_job(map_job)] * shuffle_partitions
+        else:
+            reduce_groups = get_reduce_groups(map_job, map_futures, obj_reduce_by_key)
+        partial_futures = []
+        # Reduce the groups larger than reduce_fanin in levels of intermediate
+        # reducers, each one combining up to reduce_fanin results
+        while reduce_fanin and any(len(group) > reduce_fanin for group in reduce_groups):
+            level_groups = []
+            for group in reduce_groups:
+                if len(group) > reduce_fanin:
+                    level_groups.extend(iterchunks(group, reduce_fanin))
+            level_futures = run_reduce_job(self._create_job_id('R'), level_groups)
+            logger.debug(f'ExecutorID {self.executor_id} | JobID {map_job_id} - Spawned '
+                         f'{len(level_groups)} intermediate reducers')
+            partial_futures.extend(level_futures)
+            level_futures = iter(level_futures)
+            reduce_groups = [
+                [next(level_futures) for _ in iterchunks(group, reduce_fanin)]
+                if len(group) > reduce_fanin else group
+                for group in reduce_groups
+            ]
+
+        reduce_futures = run_reduce_job(reduce_job_id, reduce_groups)
+
+        [f._set_mapreduce() for f in map_futures + partial_futures]
+
+        return create_futures_list(map_futures + partial_futures + reduce_futures, self)
 
     def wait(
         self,
@@ -523,6 +663,69 @@ class FunctionExecutor:
 
         return result
 
+    def iter_results(
+        self,
+        fs: Optional[Union[ResponseFuture, FuturesList, List[ResponseFuture]]] = None,
+        throw_except: Optional[bool] = True,
+        ordered: Optional[bool] = False,
+        threadpool_size: Optional[int] = THREADPOOL_SIZE,
+        wait_dur_sec: Optional[int] = None
+    ):
+        """
+        Iterates over the results of the function activations, yielding a
+        `(future, result)` tuple as soon as each result is downloaded. Only
+        `threadpool_size` results are kept in memory at the same time, so the
+        result of a yielded future cannot be retrieved again.
+
+        :param fs: Futures list. Default None
+        :param throw_except: Reraise exception if call raised. Default True.
+        :param ordered: Yield the results in the order of the futures list. Default False.
+        :param threadpool_size: Max number of results downloaded at the same time. Default 64
+        :param wait_dur_sec: Time interval between each check. Default 1 second
+
+        :return: Iterator of `(future, result)` tuples
+        """
+        futures = fs or [f for f in self.futures if not f._read and not f.futures]
+
+        if type(futures) not in [list, FuturesList]:
+            futures = [futures]
+
+        logger.info(
+            (f'ExecutorID {self.executor_id} - Iterating over the results of '
+             f'{len(futures)} function activations')
+        )
+
+        try:
+            for f, result in iter_results(
+                fs=futures,
+                internal_storage=self.internal_storage,
+                job_monitor=self.job_monitor,
+                throw_except=throw_except,
+                ordered=ordered,
+                threadpool_size=threadpool_size,
+                wait_dur_sec=wait_dur_sec
+            ):
+                # The result is released once yielded, so the future counts as read
+                f._read = True
+                yield f, result
+
+            if self.data_cleaner:
+                present_jobs = {f.job_key for f in futures}
+                self.compute_handler.clear(present_jobs)
+                self.clean(clean_cloudobjects=False)
+
+        except (KeyboardInterrupt, Exception) as e:
+            self.invoker.stop()
+            self.job_monitor.remove(futures)
+            [f._set_exception() for f in futures]
+            if self.data_cleaner:
+                present_jobs = {f.job_key for f in futures}
+                self.compute_handler.clear(present_jobs, exception=e)
+                self.clean(clean_cloudobjects=False, force=True)
+            raise e
+
+        logger.debug(f'ExecutorID {self.executor_id} - Finished iterating results')
+
     def plot(
         self,
         fs: Optional[Union[ResponseFuture, List[ResponseFuture], FuturesList]] = None,
@@ -623,6 +826,9 @@ class FunctionExecutor:
             }
             save_data_to_clean(data)
             self.cleaned_jobs.update(jobs_to_clean)
+            # The internal storage is shared in the process, drop the statuses of the cleaned jobs
+            for job_key in jobs_to_clean:
+                self.internal_storage.evict_status_batches(job_key)
 
         spawn_cleaner = not (CLEANER_PROCESS and CLEANER_PROCESS.poll() is None)
         if (jobs_to_clean or cs) and spawn_cleaner:
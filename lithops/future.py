@@ -26,13 +26,14 @@ import logging
 import traceback
 from six import reraise
 
-from lithops.storage import InternalStorage
+from lithops.storage import get_internal_storage
 from lithops.storage.utils import (
     check_storage_path,
     get_storage_path,
     create_job_key
 )
 from lithops.constants import FN_LOG_FILE, LOGS_DIR
+from lithops.utils import pickle_load, pickle_loads
 
 logger = logging.getLogger(__name__)
 
@@ -72,12 +73,15 @@ class ResponseFuture:
         self._exception = Exception()
         self._handler_exception = False
         self._new_futures = None
+        self._status_batch = False
         self._traceback = None
         self._call_status = None
         self._call_output = None
+        self._released = False
         self._host_status_done_tstamp = None
         self._status_query_count = 0
         self._output_query_count = 0
+        self._ready_callbacks = []
 
         for key in job_metadata:
             if any(key.startswith(ss) for ss in ['func', 'host', 'worker']):
@@ -85,8 +89,46 @@ class ResponseFuture:
 
         self._storage_path = get_storage_path(self._storage_config)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_ready_callbacks'] = []
+        return state
+
     def _set_state(self, new_state):
         self._state = new_state
+        if self._ready_callbacks and self._is_ready():
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+            for callback in callbacks:
+                callback(self)
+
+    def _is_ready(self):
+        return self.ready or self.success or self.done
+
+    def _add_ready_callback(self, callback):
+        """
+        Calls callback(self) once the future is ready, or now if it already
+        is. The callback can be called twice if the future becomes ready
+        while it is added
+        """
+        if self._is_ready():
+            callback(self)
+            return
+        self._ready_callbacks.append(callback)
+        if self._is_ready():
+            callback(self)
+
+    def _remove_ready_callback(self, callback):
+        try:
+            self._ready_callbacks.remove(callback)
+        except ValueError:
+            pass
+
+    def _release_output(self):
+        """
+        Drops the downloaded result, once iter_results has yielded it
+        """
+        self._call_output = None
+        self._released = True
 
     def cancel(self):
         raise NotImplementedError("Cannot cancel dispatched jobs")
@@ -131,40 +173,40 @@ class ResponseFuture:
 
     def _set_invoked(self):
         """ Set the future as invoked"""
-        self._state = ResponseFuture.State.Invoked
+        self._set_state(ResponseFuture.State.Invoked)
 
     def _set_running(self, call_status):
         """ Set the future as running"""
         self._call_status = call_status
         self.activation_id = self._call_status['activation_id']
-        self._state = ResponseFuture.State.Running
+        self._set_state(ResponseFuture.State.Running)
 
     def _set_exception(self):
         """ Set the future as error"""
         self._read = True
         self._host_status_done_tstamp = time.time()
         if not self.done:
-            self._state = ResponseFuture.State.Unknown
+            self._set_state(ResponseFuture.State.Unknown)
 
     def _set_ready(self, call_status):
         """ Set the future as ready"""
         self._call_status = call_status
         self._host_status_done_tstamp = time.time()
-        self._state = ResponseFuture.State.Ready
+        self._set_state(ResponseFuture.State.Ready)
 
     def _set_futures(self, call_status):
         """ Set the future as futures"""
         self._call_status = call_status
         self._host_status_done_tstamp = time.time()
         self.status(throw_except=False)
-        self._state = ResponseFuture.State.Ready
+        self._set_state(ResponseFuture.State.Ready)
 
     def _set_mapreduce(self):
         """ Set the future as mapreduce map"""
         self._read = True
         self._produce_output = False
         if self.success:
-            self._state = ResponseFuture.State.Done
+            self._set_state(ResponseFuture.State.Done)
 
     def status(self, throw_except=True, internal_storage=None, check_only=False, wait_dur_sec=1):
         """
@@ -189,9 +231,9 @@ class ResponseFuture:
 
         if self._call_status is None or self._call_status['type'] == '__init__':
             if internal_storage is None:
-                internal_storage = InternalStorage(self._storage_config)
+                internal_storage = get_internal_storage(self._storage_config)
             check_storage_path(internal_storage.get_storage_config(), self._storage_path)
-            self._call_status = internal_storage.get_call_status(self.executor_id, self.job_id, self.call_id)
+            self._call_status = internal_storage.get_call_status(self.executor_id, self.job_id, self.call_id, self._status_batch)
             self._status_query_count += 1
 
             if check_only:
@@ -199,7 +241,7 @@ class ResponseFuture:
 
             while self._call_status is None:
                 time.sleep(wait_dur_sec)
-                self._call_status = internal_storage.get_call_status(self.executor_id, self.job_id, self.call_id)
+                self._call_status = internal_storage.get_call_status(self.executor_id, self.job_id, self.call_id, self._status_batch)
                 self._status_query_count += 1
             self._host_status_done_tstamp = time.time()
 
@@ -280,7 +322,7 @@ class ResponseFuture:
             self._produce_output = False
 
         if 'result' in self._call_status:
-            self._call_output = pickle.loads(eval(self._call_status['result']))
+            self._call_output = pickle_loads(eval(self._call_status['result']))
             self.stats['host_result_done_tstamp'] = time.time()
             self.stats['host_result_query_count'] = 0
             logger.debug(
@@ -309,12 +351,19 @@ class ResponseFuture:
         :return: Result of the call.
         :raises CancelledError: If the job is cancelled before completed.
         :raises TimeoutError: If job is not complete after `timeout` seconds.
+        :raises ValueError: If the result was already yielded by iter_results().
         """
         if self._state == ResponseFuture.State.New:
             raise ValueError("Task not yet invoked")
 
+        if self._released:
+            raise ValueError(
+                f'ExecutorID {self.executor_id} | JobID {self.job_id} - The result '
+                f'from call {self.call_id} was already consumed by iter_results()'
+            )
+
         if not self.done and internal_storage is None:
-            internal_storage = InternalStorage(storage_config=self._storage_config)
+            internal_storage = get_internal_storage(self._storage_config)
 
         self.status(throw_except=throw_except, internal_storage=internal_storage, wait_dur_sec=wait_dur_sec)
 
@@ -326,12 +375,17 @@ class ResponseFuture:
             return self._call_output
 
         if self._call_output is None:
-            call_output = internal_storage.get_call_output(self.executor_id, self.job_id, self.call_id)
+            attempt = self._call_status.get('attempt', 0)
+            call_output = internal_storage.get_call_output(
+                self.executor_id, self.job_id, self.call_id, stream=True, attempt=attempt
+            )
             self._output_query_count += 1
 
             while call_output is None and self._output_query_count < retries:
                 time.sleep(wait_dur_sec)
-                call_output = internal_storage.get_call_output(self.executor_id, self.job_id, self.call_id)
+                call_output = internal_storage.get_call_output(
+                    self.executor_id, self.job_id, self.call_id, stream=True, attempt=attempt
+                )
                 self._output_query_count += 1
 
             if call_output is None:
@@ -344,7 +398,7 @@ class ResponseFuture:
                     self._set_state(ResponseFuture.State.Error)
                     return None
 
-            self._call_output = pickle.loads(call_output)
+            self._call_output = pickle_load(call_output)
 
             self.stats['host_result_done_tstamp'] = time.time()
             self.stats['host_result_query_count'] = self._output_query_count
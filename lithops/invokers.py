@@ -16,12 +16,15 @@
 
 import os
 import sys
+import json
 import time
+import hashlib
 import random
 import queue
 import shutil
 import logging
 import threading
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 
 from lithops.future import ResponseFuture
@@ -42,6 +45,7 @@ from lithops.constants import (
     STANDALONE_BACKENDS
 )
 from lithops.util.metrics import PrometheusExporter
+from lithops.storage.utils import create_config_key
 
 logger = logging.getLogger(__name__)
 
@@ -234,6 +238,7 @@ class Invoker:
                                  job.metadata.copy(),
                                  self.storage_config)
             fut._set_state(ResponseFuture.State.Invoked)
+            fut._status_batch = self.config['lithops'].get('batch_status', False)
             futures.append(fut)
 
         job.futures = futures
@@ -283,6 +288,124 @@ class BatchInvoker(Invoker):
         return futures
 
 
+RATE_CONTROLLERS = {}
+RATE_CONTROLLERS_LOCK = threading.Lock()
+
+
+class InvocationRateController:
+    """
+    AIMD controller of the invocations in flight against a compute backend.
+    The limit starts at 'limit', grows by one every 'limit' successful
+    invocations up to 'max_limit', and it is halved when the backend
+    throttles, at most once per invocation latency.
+    Throttled invocations are retried after an exponential backoff with
+    jitter, based on the current invocation latency
+    """
+    DECREASE_FACTOR = 0.5
+    LATENCY_ALPHA = 0.2  # Weight of the last sample in the latency average
+    MIN_BACKOFF = 0.1
+    MAX_BACKOFF = 30
+    RATE_WINDOW = 10  # Seconds
+
+    def __init__(self, max_limit, min_limit=1, limit=None):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(min(limit or max_limit, max_limit))
+        self.in_flight = 0
+        self.latency = None
+        self.invoked = 0
+        self.throttled = 0
+        self.throttle_streak = 0
+        self.last_decrease = 0
+        self.invoke_tstamps = deque()
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Blocks until an invocation can be put in flight
+        """
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, throttled=False):
+        """
+        Records the outcome of an invocation. Invocations that failed
+        for other reasons than throttling are released with latency=None
+        """
+        now = time.time()
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+            if latency is None:
+                return
+
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.LATENCY_ALPHA * (latency - self.latency)
+
+            if throttled:
+                self.throttled += 1
+                self.throttle_streak += 1
+                if now - self.last_decrease > self.latency:
+                    self.limit = max(self.min_limit, self.limit * self.DECREASE_FACTOR)
+                    self.last_decrease = now
+            else:
+                self.invoked += 1
+                self.throttle_streak = 0
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.invoke_tstamps.append(now)
+
+    def raise_max_limit(self, max_limit):
+        """
+        Raises the max limit of the invocations in flight
+        """
+        with self.cond:
+            self.max_limit = max(self.max_limit, max_limit)
+
+    def backoff(self):
+        """
+        Returns the seconds to wait before retrying a throttled invocation
+        """
+        with self.cond:
+            base = max(self.latency or 0, self.MIN_BACKOFF)
+            ceiling = min(self.MAX_BACKOFF, base * 2 ** min(self.throttle_streak, 16))
+        return random.uniform(base, max(base, ceiling))
+
+    def stats(self):
+        """
+        Returns the current invocation limit and rate (invocations per second)
+        """
+        now = time.time()
+        with self.cond:
+            while self.invoke_tstamps and self.invoke_tstamps[0] < now - self.RATE_WINDOW:
+                self.invoke_tstamps.popleft()
+            total = self.invoked + self.throttled
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'rate': len(self.invoke_tstamps) / self.RATE_WINDOW,
+                'latency': self.latency or 0,
+                'throttle_rate': self.throttled / total if total else 0
+            }
+
+
+def get_rate_controller(backend, max_limit, limit=None):
+    """
+    Returns the invocation rate controller of a compute backend,
+    shared by all the invokers of this process. The max limit of the
+    controller is the highest max_limit of the invokers that use it
+    """
+    with RATE_CONTROLLERS_LOCK:
+        if backend not in RATE_CONTROLLERS:
+            RATE_CONTROLLERS[backend] = InvocationRateController(max_limit, limit=limit)
+        controller = RATE_CONTROLLERS[backend]
+    controller.raise_max_limit(max_limit)
+    return controller
+
+
 class FaaSInvoker(Invoker):
     """
     Module responsible to perform the invocations against a FaaS backend
@@ -302,7 +425,23 @@ class FaaSInvoker(Invoker):
         self.sync = is_lithops_worker()
 
         self.invoke_pool_threads = self.config[self.backend]['invoke_pool_threads']
-        self.executor = ThreadPoolExecutor(self.invoke_pool_threads)
+        # The invocations in flight start at invoke_pool_threads, and the rate
+        # controller grows them up to max_workers while the backend does not throttle.
+        # The pool has a thread per invocation that can be in flight, and the
+        # rate controller limits how many of them invoke at the same time
+        self.max_in_flight = max(self.invoke_pool_threads, self.max_workers)
+        self.executor = ThreadPoolExecutor(self.max_in_flight)
+
+        self.rate_controller = get_rate_controller(self.backend, self.max_in_flight, self.invoke_pool_threads)
+        self.job_monitor.rate_controller = self.rate_controller
+
+        self.speculative_jobs = {}
+        self.speculative_futures = set()
+        self.speculative_lock = threading.Lock()
+        if self.config['lithops'].get('speculative_execution', False):
+            self.job_monitor.speculator = self.speculate
+
+        self.config_key = None
 
         logger.debug(f'ExecutorID {self.executor_id} - Serverless invoker created')
 
@@ -356,7 +495,73 @@ class FaaSInvoker(Invoker):
 
             self.invokers = []
 
-    def _invoke_task(self, job, call_ids_range):
+        self.speculative_jobs = {}
+        with self.speculative_lock:
+            self.speculative_futures = set()
+
+    def _upload_config(self):
+        """
+        Uploads the config once per executor, so that the invocation payloads
+        only carry its key and the storage config. The config contains the
+        credentials of the backends, so it is deleted when the executor is cleaned
+        """
+        config_bytes = json.dumps(self.config, sort_keys=True).encode('utf-8')
+        config_key = create_config_key(self.executor_id, hashlib.sha256(config_bytes).hexdigest())
+        self.internal_storage.put_data(config_key, config_bytes)
+        logger.debug(f'ExecutorID {self.executor_id} - Invocation payloads reference config {config_key}')
+        self.config_key = config_key
+
+    def _create_payload(self, job):
+        """
+        Creates the payload dictionary, with the config referenced by its key
+        """
+        payload = super()._create_payload(job)
+        del payload['config']
+        payload['config_key'] = self.config_key
+        payload['storage_config'] = self.storage_config
+
+        return payload
+
+    def speculate(self, futures):
+        """
+        Invokes a second attempt of the calls of the given futures, while
+        there are free workers. The attempt writes its output to its own key,
+        and the host reads the output of the attempt that wrote the status
+        the monitor received. Returns the futures of the invoked attempts
+        """
+        self._release_speculative_workers()
+
+        speculated = []
+        for f in futures:
+            job = self.speculative_jobs.get(f.job_key)
+            if job is None:
+                continue
+            with self.speculative_lock:
+                if self.running_workers >= self.max_workers:
+                    break
+                self.running_workers += 1
+                self.speculative_futures.add(f)
+            logger.debug(
+                f'ExecutorID {job.executor_id} | JobID {job.job_id} - Call {f.call_id} '
+                'is a straggler, invoking a speculative attempt'
+            )
+            self.executor.submit(self._invoke_task, job, [int(f.call_id)], 1)
+            speculated.append(f)
+
+        return speculated
+
+    def _release_speculative_workers(self):
+        """
+        Releases the workers of the speculative attempts of the calls that are done.
+        The monitor only generates one token per call, so the extra worker of a
+        speculative attempt is released here once either attempt finishes
+        """
+        with self.speculative_lock:
+            done = [f for f in self.speculative_futures if f.ready or f.success or f.done]
+            self.speculative_futures.difference_update(done)
+            self.running_workers -= len(done)
+
+    def _invoke_task(self, job, call_ids_range, attempt=0):
         """Method used to perform the actual invocation against the
         compute backend.
         """
@@ -365,6 +570,8 @@ class FaaSInvoker(Invoker):
 
         call_ids = ["{:05d}".format(i) for i in call_ids_range]
         payload['call_ids'] = call_ids
+        if attempt:
+            payload['attempt'] = attempt
 
         if job.data_key:
             data_byte_ranges = [job.data_byte_ranges[int(call_id)] for call_id in call_ids]
@@ -374,14 +581,24 @@ class FaaSInvoker(Invoker):
             payload['data_byte_strs'] = [job.data_byte_strs[int(call_id)] for call_id in call_ids]
 
         # do the invocation
+        self.rate_controller.acquire()
         start = time.time()
-        activation_id = self.compute_handler.invoke(payload)
+        try:
+            activation_id = self.compute_handler.invoke(payload)
+        except Exception:
+            self.rate_controller.release()
+            raise
         roundtrip = time.time() - start
         resp_time = format(round(roundtrip, 3), '.3f')
+        self.rate_controller.release(roundtrip, throttled=not activation_id)
+
+        if not activation_id and attempt:
+            # speculative attempts are not retried
+            return
 
         if not activation_id:
             # reached quota limit
-            time.sleep(random.randint(0, 5))
+            time.sleep(self.rate_controller.backoff())
             self.pending_calls_q.put((job, call_ids_range))
             self.job_monitor.token_bucket_q.put('#')
             return
@@ -426,11 +643,20 @@ class FaaSInvoker(Invoker):
         if self.remote_invoker:
             return self._invoke_job_remote(job)
 
+        if self.config_key is None:
+            self._upload_config()
+
+        if self.job_monitor.speculator:
+            self.speculative_jobs[job.job_key] = job
+
         if self.should_run is False:
             self.running_workers = 0
             self.should_run = True
             self._start_async_invokers()
 
+        if self.speculative_futures:
+            self._release_speculative_workers()
+
         if self.running_workers > 0 and not self.job_monitor.token_bucket_q.empty():
             while not self.job_monitor.token_bucket_q.empty():
                 try:
@@ -1,7 +1,11 @@
 from .job import create_map_job
 from .job import create_reduce_job
+from .job import get_reduce_groups
+from .job import get_shuffle_map_job
 
 __all__ = [
     'create_map_job',
-    'create_reduce_job'
+    'create_reduce_job',
+    'get_reduce_groups',
+    'get_shuffle_map_job'
 ]
@@ -30,12 +30,14 @@ from lithops.storage.utils import create_func_key, create_data_key, \
     create_job_key, func_key_suffix
 from lithops.job.serialize import SerializeIndependent, create_module_data
 from lithops.constants import MAX_AGG_DATA_SIZE, LOCALHOST, \
-    SERVERLESS, STANDALONE, CUSTOM_RUNTIME_DIR
+    SERVERLESS, STANDALONE, CUSTOM_RUNTIME_DIR, FUNCTIONS_MAX_AGE
 
 
 logger = logging.getLogger(__name__)
 
-FUNCTION_CACHE = set()
+# Time of the last check of the functions found or uploaded by this process, by func_key.
+# Functions are uploaded again before they are old enough to be cleaned
+FUNCTION_CACHE = {}
 MAX_DATA_IN_PAYLOAD = 8 * 1024  # Per invocation. 8KB
 
 
@@ -56,7 +58,10 @@ def create_map_job(
     extra_args=None,
     obj_chunk_size=None,
     obj_newline='\n',
-    obj_chunk_number=None
+    obj_chunk_number=None,
+    listings_cache=None,
+    obj_byte_cost=None,
+    obj_bundle_size=None
 ):
     """
     Wrapper to create a map job. It integrates COS logic to process objects.
@@ -73,8 +78,11 @@ def create_map_job(
                      'from object storage flow'.format(executor_id, job_id))
         map_iterdata, ppo = create_partitions(
             config, internal_storage, map_iterdata,
-            obj_chunk_size, obj_chunk_number, obj_newline
+            obj_chunk_size, obj_chunk_number, obj_newline,
+            listings_cache, runtime_memory, obj_byte_cost,
+            obj_bundle_size
         )
+        obj_bytes = sum(elem['obj'].chunk_size for elem in map_iterdata)
         host_job_meta['host_job_create_partitions_time'] = round(time.time() - create_partitions_start, 6)
     # ########
 
@@ -97,10 +105,45 @@ def create_map_job(
 
     if ppo:
         job.parts_per_object = ppo
+        job.obj_bytes = obj_bytes
 
     return job
 
 
+def get_reduce_groups(map_job, map_futures, obj_reduce_by_key):
+    """
+    Returns the groups of map futures reduced together: one group per object
+    with obj_reduce_by_key, or a single group with all the futures otherwise
+    """
+    if not (hasattr(map_job, 'parts_per_object') and obj_reduce_by_key):
+        return [map_futures]
+
+    groups = []
+    prev_total_partitons = 0
+    for total_partitions in map_job.parts_per_object:
+        groups.append(map_futures[prev_total_partitons:prev_total_partitons + total_partitions])
+        prev_total_partitons += total_partitions
+
+    return groups
+
+
+def get_shuffle_map_job(map_job):
+    """
+    Returns the fields of the map job that a shuffle reducer needs to rebuild
+    the futures of the map calls, which are not sent to each reducer
+    """
+    return {
+        'executor_id': map_job.executor_id,
+        'job_id': map_job.job_id,
+        'job_key': map_job.job_key,
+        'total_calls': map_job.total_calls,
+        'function_name': map_job.function_name,
+        'execution_timeout': map_job.execution_timeout,
+        'runtime_name': map_job.runtime_name,
+        'runtime_memory': map_job.runtime_memory
+    }
+
+
 def create_reduce_job(
     config,
     internal_storage,
@@ -116,21 +159,18 @@ def create_reduce_job(
     include_modules,
     exclude_modules,
     execution_timeout=None,
-    extra_args=None
+    extra_args=None,
+    reduce_groups=None
 ):
     """
-    Wrapper to create a reduce job. Apply a function across all map futures.
+    Wrapper to create a reduce job. Apply a function across all map futures,
+    or across each group of futures in reduce_groups, if provided.
     """
     host_job_meta = {'host_job_create_tstamp': time.time()}
 
-    iterdata = [(map_futures, )]
-
-    if hasattr(map_job, 'parts_per_object') and obj_reduce_by_key:
-        prev_total_partitons = 0
-        iterdata = []
-        for total_partitions in map_job.parts_per_object:
-            iterdata.append((map_futures[prev_total_partitons:prev_total_partitons + total_partitions],))
-            prev_total_partitons += total_partitions
+    if reduce_groups is None:
+        reduce_groups = get_reduce_groups(map_job, map_futures, obj_reduce_by_key)
+    iterdata = [(group, ) for group in reduce_groups]
 
     reduce_job_env = {'__LITHOPS_REDUCE_JOB': True}
     if extra_env is None:
@@ -241,12 +281,15 @@ def _create_job(
 
     logger.debug(f'ExecutorID {executor_id} | JobID {job_id} - Serializing function and data')
     job_serialize_start = time.time()
-    serializer = SerializeIndependent(runtime_meta['preinstalls'])
+    serializer = SerializeIndependent(
+        runtime_meta['preinstalls'],
+        processes=config['lithops'].get('serialize_processes', 1)
+    )
     func_and_data_ser, mod_paths = serializer([func] + iterdata, inc_modules, exc_modules)
     data_strs = func_and_data_ser[1:]
     data_size_bytes = sum(len(x) for x in data_strs)
     module_data = create_module_data(mod_paths)
-    func_str = func_and_data_ser[0]
+    func_str = bytes(func_and_data_ser[0])
     func_module_str = pickle.dumps({'func': func_str, 'module_data': module_data}, -1)
     func_module_size_bytes = len(func_module_str)
 
@@ -271,19 +314,24 @@ def _create_job(
     # Upload function and modules
     if upload_function:
         function_hash = hashlib.md5(func_module_str).hexdigest()
-        job.func_key = create_func_key(executor_id, function_hash)
-        if job.func_key not in FUNCTION_CACHE:
+        job.func_key = create_func_key(function_hash)
+        if time.time() - FUNCTION_CACHE.get(job.func_key, 0) < FUNCTIONS_MAX_AGE / 4:
+            logger.debug('ExecutorID {} | JobID {} - Function and modules '
+                         'found in local cache'.format(executor_id, job_id))
+            host_job_meta['host_func_upload_time'] = 0
+        elif internal_storage.func_exists(job.func_key, len(func_module_str), FUNCTIONS_MAX_AGE / 2):
+            logger.debug('ExecutorID {} | JobID {} - Function and modules '
+                         'found in the storage backend'.format(executor_id, job_id))
+            host_job_meta['host_func_upload_time'] = 0
+            FUNCTION_CACHE[job.func_key] = time.time()
+        else:
             logger.debug('ExecutorID {} | JobID {} - Uploading function and modules '
                          'to the storage backend'.format(executor_id, job_id))
             func_upload_start = time.time()
             internal_storage.put_func(job.func_key, func_module_str)
             func_upload_end = time.time()
             host_job_meta['host_func_upload_time'] = round(func_upload_end - func_upload_start, 6)
-            FUNCTION_CACHE.add(job.func_key)
-        else:
-            logger.debug('ExecutorID {} | JobID {} - Function and modules '
-                         'found in local cache'.format(executor_id, job_id))
-            host_job_meta['host_func_upload_time'] = 0
+            FUNCTION_CACHE[job.func_key] = time.time()
 
     else:
         # Prepare function and modules locally to store in the runtime image later
@@ -318,7 +366,7 @@ def _create_job(
                      .format(executor_id, job_id, utils.sizeof_fmt(MAX_DATA_IN_PAYLOAD)))
         job.data_key = None
         job.data_byte_ranges = None
-        job.data_byte_strs = data_strs
+        job.data_byte_strs = [bytes(data_str) for data_str in data_strs]
         host_job_meta['host_data_upload_time'] = 0
 
     host_job_meta['host_job_created_time'] = round(time.time() - host_job_meta['host_job_create_tstamp'], 6)
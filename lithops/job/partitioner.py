@@ -16,18 +16,28 @@
 #
 
 import os
+import json
+import math
 import logging
 import requests
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 
 from lithops import utils
 from lithops.storage import Storage
-from lithops.storage.utils import CloudObject, CloudObjectUrl, CloudObjectLocal
+from lithops.storage.utils import CloudObject, CloudObjectUrl, CloudObjectLocal, CloudObjectBundle, \
+    StorageNoSuchKeyError, create_partition_index_key
 from lithops.utils import sizeof_fmt
+from lithops.constants import SERVERLESS
 
 logger = logging.getLogger(__name__)
 
 CHUNK_THRESHOLD = 128 * 1024  # 128KB
+RECORD_SCAN_SIZE = 64 * 1024  # 64KB
+AUTO_MIN_CHUNK_SIZE = 1024 ** 2  # 1MiB
+AUTO_MEMORY_FRACTION = 0.25  # Max fraction of the runtime memory used by a chunk
+AUTO_MIN_CALL_TIME = 5  # Seconds
+AUTO_MAX_CALL_TIME_FRACTION = 0.5  # Max fraction of the execution timeout used by a call
 
 
 def create_partitions(
@@ -36,17 +46,34 @@ def create_partitions(
     map_iterdata,
     obj_chunk_size,
     obj_chunk_number,
-    obj_newline
+    obj_newline,
+    listings_cache=None,
+    runtime_memory=None,
+    obj_byte_cost=None,
+    obj_bundle_size=None
 ):
     """
     Method that returns the function that will create
-    the partitions of the objects in the Cloud
+    the partitions of the objects in the Cloud. The listings of
+    the object storage are kept in listings_cache, if provided.
+    With obj_chunk_size='auto', the chunk size is chosen from the total
+    size of the objects, the runtime memory, the number of workers, and the
+    execution time per byte of the previous jobs (obj_byte_cost), if known.
+    With obj_bundle_size, the objects of an object store smaller than it are
+    grouped in bundles of up to obj_bundle_size bytes, processed by one call
     """
 
     urls = []
     paths = []
     objects = []
 
+    partition_index = config['lithops'].get('partition_index', False)
+
+    get_chunk_size = None
+    if obj_chunk_size == 'auto':
+        get_chunk_size = partial(_get_auto_chunk_size, config, runtime_memory=runtime_memory,
+                                 obj_byte_cost=obj_byte_cost)
+
     logger.debug("Parsing input data")
 
     # first filter; decide if the iterdata elements are urls,
@@ -68,21 +95,26 @@ def create_partitions(
         # process objects from urls.
         return _split_objects_from_urls(
             urls, obj_chunk_size,
-            obj_chunk_number, obj_newline
+            obj_chunk_number, obj_newline,
+            internal_storage, partition_index,
+            get_chunk_size
         )
 
     elif paths:
         # process objects from localhost paths.
         return _split_objects_from_paths(
             paths, obj_chunk_size,
-            obj_chunk_number, obj_newline
+            obj_chunk_number, obj_newline,
+            partition_index, get_chunk_size
         )
 
     elif objects:
         # process objects from an object store.
         return _split_objects_from_object_storage(
             objects, obj_chunk_size, obj_chunk_number,
-            internal_storage, config, obj_newline
+            internal_storage, config, obj_newline,
+            partition_index, listings_cache,
+            get_chunk_size, obj_bundle_size
         )
 
 
@@ -90,7 +122,10 @@ def _split_objects_from_urls(
     map_func_args_list,
     chunk_size,
     chunk_number,
-    obj_newline
+    obj_newline,
+    internal_storage,
+    partition_index=False,
+    get_chunk_size=None
 ):
     """
     Create partitions from a list of objects urls
@@ -105,10 +140,15 @@ def _split_objects_from_urls(
     partitions = []
     parts_per_object = []
 
-    def _split(entry):
+    with ThreadPoolExecutor(64) as ex:
+        metadatas = list(ex.map(lambda entry: requests.head(entry['obj']), map_func_args_list))
+
+    if get_chunk_size is not None and not chunk_number:
+        chunk_size = get_chunk_size(sum(int(metadata.headers.get('content-length', 0)) for metadata in metadatas))
+
+    def _split(entry, metadata):
         obj_size = None
         object_url = entry['obj']
-        metadata = requests.head(object_url)
 
         if 'content-length' in metadata.headers:
             obj_size = int(metadata.headers['content-length'])
@@ -127,42 +167,41 @@ def _split_objects_from_urls(
         if 'accept-ranges' not in metadata.headers:
             obj_chunk_size = obj_size
 
+        etag = metadata.headers.get('etag')
+
+        def read_range(first_byte, last_byte):
+            headers = {'Range': f'bytes={first_byte}-{last_byte}'}
+            return requests.get(object_url, headers=headers).content
+
         obj_partitions = []
-        size = obj_total_partitions = 0
+        obj_total_partitions = 0
 
         ci = obj_size
         cz = obj_chunk_size
         parts = ci // cz + (ci % cz > 0)
         logger.debug(f'Creating {parts} partitions from url {object_url} ({sizeof_fmt(obj_size)})')
 
-        while size < obj_size - 1:
-            if obj_size <= obj_chunk_size:
-                # Only one chunk
-                brange = None
-                obj_chunk_size = obj_size
-            elif obj_newline is None:
-                # partitions of the same size
-                brange = (size, size + obj_chunk_size - 1)
-            elif size + obj_chunk_size < obj_size:
-                # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
-            else:
-                # last chunk
-                brange = (size - 1, obj_size - 1)
-                obj_chunk_size = obj_size - size
+        exact_range = False
+        if partition_index and obj_newline is not None and obj_size > obj_chunk_size:
+            bounds = _get_partition_index(read_range, obj_size, obj_chunk_size, obj_newline,
+                                          internal_storage, etag)
+            byte_ranges = _get_exact_byte_ranges(bounds)
+            exact_range = True
+        else:
+            byte_ranges = _get_byte_ranges(obj_size, obj_chunk_size, obj_newline)
 
+        for brange, part_size in byte_ranges:
             obj_total_partitions += 1
 
             partition = entry.copy()
             partition['obj'] = CloudObjectUrl(object_url)
             partition['obj'].data_byte_range = brange
-            partition['obj'].chunk_size = obj_chunk_size
+            partition['obj'].chunk_size = part_size
             partition['obj'].part = obj_total_partitions
             partition['obj'].newline = obj_newline
+            partition['obj'].exact_range = exact_range
             obj_partitions.append(partition)
 
-            size += obj_chunk_size
-
         for partition in obj_partitions:
             partition['obj'].total_parts = obj_total_partitions
 
@@ -170,7 +209,7 @@ def _split_objects_from_urls(
         parts_per_object.append(obj_total_partitions)
 
     with ThreadPoolExecutor(64) as ex:
-        ex.map(_split, map_func_args_list)
+        ex.map(_split, map_func_args_list, metadatas)
 
     return partitions, parts_per_object
 
@@ -179,7 +218,9 @@ def _split_objects_from_paths(
     map_func_args_list,
     chunk_size,
     chunk_number,
-    obj_newline
+    obj_newline,
+    partition_index=False,
+    get_chunk_size=None
 ):
     """
     Create partitions from a list of objects paths
@@ -216,6 +257,9 @@ def _split_objects_from_paths(
             files.add(elem['obj'])
             new_map_func_args_list.append(elem)
 
+    if get_chunk_size is not None and not chunk_number:
+        chunk_size = get_chunk_size(sum(os.stat(entry['obj']).st_size for entry in new_map_func_args_list))
+
     def _split(entry):
         path = entry['obj']
         file_stats = os.stat(entry['obj'])
@@ -232,42 +276,42 @@ def _split_objects_from_paths(
         else:
             obj_chunk_size = obj_size = 1
 
+        internal_storage = etag = None
+
+        def read_range(first_byte, last_byte):
+            with open(path, 'rb') as f:
+                f.seek(first_byte)
+                return f.read(last_byte - first_byte + 1)
+
         obj_partitions = []
-        size = obj_total_partitions = 0
+        obj_total_partitions = 0
 
         ci = obj_size
         cz = obj_chunk_size
         parts = ci // cz + (ci % cz > 0)
         logger.debug(f'Creating {parts} partitions from url {path} ({sizeof_fmt(obj_size)})')
 
-        while size < obj_size - 1:
-            if obj_size <= obj_chunk_size:
-                # Only one chunk
-                brange = None
-                obj_chunk_size = obj_size
-            elif obj_newline is None:
-                # partitions of the same size
-                brange = (size, size + obj_chunk_size - 1)
-            elif size + obj_chunk_size < obj_size:
-                # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
-            else:
-                # last chunk
-                brange = (size - 1, obj_size - 1)
-                obj_chunk_size = obj_size - size
+        exact_range = False
+        if partition_index and obj_newline is not None and obj_size > obj_chunk_size:
+            bounds = _get_partition_index(read_range, obj_size, obj_chunk_size, obj_newline,
+                                          internal_storage, etag)
+            byte_ranges = _get_exact_byte_ranges(bounds)
+            exact_range = True
+        else:
+            byte_ranges = _get_byte_ranges(obj_size, obj_chunk_size, obj_newline)
 
+        for brange, part_size in byte_ranges:
             obj_total_partitions += 1
 
             partition = entry.copy()
             partition['obj'] = CloudObjectLocal(path)
             partition['obj'].data_byte_range = brange
-            partition['obj'].chunk_size = obj_chunk_size
+            partition['obj'].chunk_size = part_size
             partition['obj'].part = obj_total_partitions
             partition['obj'].newline = obj_newline
+            partition['obj'].exact_range = exact_range
             obj_partitions.append(partition)
 
-            size += obj_chunk_size
-
         for partition in obj_partitions:
             partition['obj'].total_parts = obj_total_partitions
 
@@ -286,7 +330,11 @@ def _split_objects_from_object_storage(
     chunk_number,
     internal_storage,
     config,
-    obj_newline
+    obj_newline,
+    partition_index=False,
+    listings_cache=None,
+    get_chunk_size=None,
+    bundle_size=None
 ):
     """
     Create partitions from a list of buckets or object keys
@@ -323,7 +371,7 @@ def _split_objects_from_object_storage(
     partitions = []
     parts_per_object = []
 
-    def _split(bucket, key, entry, obj_size):
+    def _split(bucket, key, entry, obj_size, etag=None):
         if key.endswith('/'):
             logger.debug(f'Discarding object "{key}" as it is a prefix folder (0.0B)')
             return
@@ -337,53 +385,69 @@ def _split_objects_from_object_storage(
         else:
             obj_chunk_size = obj_size
 
+        def read_range(first_byte, last_byte):
+            extra_get_args = {'Range': f'bytes={first_byte}-{last_byte}'}
+            return storage.get_object(bucket, key, extra_get_args=extra_get_args)
+
         obj_partitions = []
-        size = obj_total_partitions = 0
+        obj_total_partitions = 0
 
         ci = obj_size
         cz = obj_chunk_size
         parts = ci // cz + (ci % cz > 0)
         logger.debug(f'Creating {parts} partitions from object {key} ({sizeof_fmt(obj_size)})')
 
-        while size < obj_size - 1:
-            if obj_size <= obj_chunk_size:
-                # Only one chunk
-                brange = None
-                obj_chunk_size = obj_size
-            elif obj_newline is None:
-                # partitions of the same size
-                brange = (size, size + obj_chunk_size - 1)
-            elif size + obj_chunk_size < obj_size:
-                # common chunk
-                brange = (size - 1 if size > 0 else 0, size + obj_chunk_size + CHUNK_THRESHOLD)
-            else:
-                # last chunk
-                brange = (size - 1, obj_size - 1)
-                obj_chunk_size = obj_size - size
+        exact_range = False
+        if partition_index and obj_newline is not None and obj_size > obj_chunk_size:
+            bounds = _get_partition_index(read_range, obj_size, obj_chunk_size, obj_newline,
+                                          internal_storage, etag)
+            byte_ranges = _get_exact_byte_ranges(bounds)
+            exact_range = True
+        else:
+            byte_ranges = _get_byte_ranges(obj_size, obj_chunk_size, obj_newline)
 
+        for brange, part_size in byte_ranges:
             obj_total_partitions += 1
 
             partition = entry.copy()
             partition['obj'] = CloudObject(sb, bucket, key)
             partition['obj'].data_byte_range = brange
-            partition['obj'].chunk_size = obj_chunk_size
+            partition['obj'].chunk_size = part_size
             partition['obj'].part = obj_total_partitions
             partition['obj'].newline = obj_newline
+            partition['obj'].exact_range = exact_range
             obj_partitions.append(partition)
 
-            size += obj_chunk_size
-
         for partition in obj_partitions:
             partition['obj'].total_parts = obj_total_partitions
+            if bundle_size:
+                partition['obj'] = CloudObjectBundle(sb, bucket, [partition['obj']])
 
         partitions.extend(obj_partitions)
         parts_per_object.append(obj_total_partitions)
 
-    total_objects = int(0)
-    for elem in map_func_args_list:
-        objects = []
-        exclude = {'obj'}
-        params = {k: elem[k] for k in set(list(elem.keys())) - set(exclude)}
+    def _add_bundle(bucket, objects, params):
+        bundle_objects = []
+        for dobj in objects:
+            obj = CloudObject(sb, bucket, dobj['Key'])
+            obj.data_byte_range = None
+            obj.chunk_size = dobj['Size']
+            obj.part = obj.total_parts = 1
+            obj.newline = obj_newline
+            bundle_objects.append(obj)
+
+        logger.debug(f'Creating a bundle of {len(bundle_objects)} objects '
+                     f'({sizeof_fmt(sum(dobj["Size"] for dobj in objects))})')
+        partition = {'obj': CloudObjectBundle(sb, bucket, bundle_objects)}
+        partition.update(params)
+        partitions.append(partition)
+        parts_per_object.append(1)
+
+    def get_source(elem):
+        """
+        Returns the listing, (bucket, prefix, match_pattern), or the
+        single key, (bucket, key), where the objects of elem are found
+        """
         sb, bucket, prefix, obj_name = utils.split_object_url(elem['obj'])
 
         if obj_name:
@@ -395,19 +459,16 @@ def _split_objects_from_object_storage(
                 if prefix.find('*') > -1:
                     prefix = prefix[:prefix.index('*')]
                 else:
-                    prefix = '/'.join(prefix, obj_name[:obj_name.index('*')])
+                    prefix = '/'.join([prefix, obj_name[:obj_name.index('*')]])
 
             prefix = prefix + '/' if prefix else prefix
             if match_pattern is not None:
                 logger.debug(f"Listing objects with Globber {match_pattern} in {sb}://{'/'.join([bucket, prefix])}")
-                objects = storage.list_objects(bucket, prefix, match_pattern)
+                return (bucket, prefix, match_pattern)
             else:
                 # this is wrong to list prefix only, as it may return more objects than requested
                 logger.debug(f"Head on object  {sb}://{'/'.join([bucket, prefix, obj_name])}")
-                head_md = storage.head_object(bucket, os.path.join(prefix, obj_name))
-                head_md['Key'] = os.path.join(prefix, obj_name)
-                head_md['Size'] = int(head_md['content-length'])
-                objects.append(head_md)
+                return (bucket, os.path.join(prefix, obj_name))
 
         elif prefix:
             match_pattern = None
@@ -422,20 +483,189 @@ def _split_objects_from_object_storage(
                 logger.debug(f"Listing prefixes in {sb}://{'/'.join([bucket, prefix])}")
 
             prefix = prefix + '/' if prefix else prefix
-            objects = storage.list_objects(bucket, prefix, match_pattern)
+            return (bucket, prefix, match_pattern)
         else:
             logger.debug(f"Listing objects in {sb}://{bucket}")
-            objects = storage.list_objects(bucket)
+            return (bucket, None, None)
+
+    def get_objects(source):
+        if len(source) == 2:
+            bucket, key = source
+            head_md = storage.head_object(bucket, key)
+            head_md['Key'] = key
+            head_md['Size'] = int(head_md['content-length'])
+            return [head_md]
+
+        listing_key = (sb, *source)
+        if listings_cache is not None and listing_key in listings_cache:
+            return listings_cache[listing_key]
+        objects = storage.list_objects(*source)
+        if listings_cache is not None:
+            listings_cache[listing_key] = objects
+        return objects
+
+    # Discover the objects of all the elements at once, with concurrent
+    # listings and HEAD requests, each distinct source requested only once
+    elem_sources = [get_source(elem) for elem in map_func_args_list]
+    sources = list(dict.fromkeys(elem_sources))
+    with ThreadPoolExecutor(64) as ex:
+        source_objects = dict(zip(sources, ex.map(get_objects, sources)))
+
+    if get_chunk_size is not None and not chunk_number:
+        chunk_size = get_chunk_size(sum(dobj['Size'] for source in elem_sources for dobj in source_objects[source]))
+
+    if bundle_size == 'auto':
+        bundle_size = chunk_size if isinstance(chunk_size, int) else AUTO_MIN_CHUNK_SIZE
+
+    # The bundle being filled in each bucket, as [params, objects, size]. It
+    # is shared by the consecutive elements with the same params, so that an
+    # iterdata of single keys is bundled too
+    bundles = {}
+
+    total_objects = int(0)
+    for elem, source in zip(map_func_args_list, elem_sources):
+        exclude = {'obj'}
+        params = {k: elem[k] for k in set(list(elem.keys())) - set(exclude)}
+        bucket = source[0]
+        objects = source_objects[source]
 
         total_objects = total_objects + len(objects)
         for dobj in objects:
             key = dobj['Key']
+            if bundle_size and dobj['Size'] < bundle_size and not key.endswith('/'):
+                bundle = bundles.get(bucket)
+                if bundle and (bundle[0] != params or bundle[2] + dobj['Size'] > bundle_size):
+                    _add_bundle(bucket, bundle[1], bundle[0])
+                    bundle = None
+                if not bundle:
+                    bundle = bundles[bucket] = [params, [], 0]
+                bundle[1].append(dobj)
+                bundle[2] += dobj['Size']
+                continue
             entry = {'obj': f'{sb}://{bucket}/{key}'}
             entry.update(params)
-            _split(bucket, key, entry, dobj['Size'])
+            _split(bucket, key, entry, dobj['Size'], dobj.get('ETag') or dobj.get('etag'))
+
+    for bucket, (params, objects, _) in bundles.items():
+        _add_bundle(bucket, objects, params)
 
     logger.debug(f"Total objects found: {total_objects}")
     if total_objects == 0:
         raise Exception('No objects found')
 
     return partitions, parts_per_object
+
+
+def _get_auto_chunk_size(config, total_size, runtime_memory=None, obj_byte_cost=None):
+    """
+    Returns a chunk size that spreads total_size among all the workers,
+    that fits AUTO_MEMORY_FRACTION of the runtime memory, and, if the
+    execution time per byte is known, that keeps each call between
+    AUTO_MIN_CALL_TIME seconds and a fraction of the execution timeout
+    """
+    backend = config['lithops']['backend']
+    workers = config[backend].get('max_workers', 1) * config[backend].get('worker_processes', 1)
+    chunk_size = math.ceil(total_size / max(1, workers))
+
+    if obj_byte_cost:
+        max_call_time = config['lithops']['execution_timeout'] * AUTO_MAX_CALL_TIME_FRACTION
+        chunk_size = max(chunk_size, AUTO_MIN_CALL_TIME / obj_byte_cost)
+        chunk_size = min(chunk_size, max_call_time / obj_byte_cost)
+
+    chunk_size = max(chunk_size, AUTO_MIN_CHUNK_SIZE)
+
+    if config['lithops']['mode'] == SERVERLESS:
+        runtime_memory = runtime_memory or config[backend]['runtime_memory']
+        chunk_size = min(chunk_size, runtime_memory * 1024 ** 2 * AUTO_MEMORY_FRACTION)
+
+    chunk_size = int(chunk_size)
+    logger.debug(f'Automatic chunk size set to {sizeof_fmt(chunk_size)} for {sizeof_fmt(total_size)} '
+                 f'and {workers} workers')
+
+    return chunk_size
+
+
+def _get_byte_ranges(obj_size, obj_chunk_size, obj_newline):
+    """
+    Returns the (byte range, chunk size) of each partition of an object.
+    With a newline character, each range starts one byte before its chunk,
+    and ends CHUNK_THRESHOLD bytes after it, so that the worker can discard
+    the first partial row and complete the last one
+    """
+    if obj_size < 2:
+        return []
+
+    if obj_size <= obj_chunk_size:
+        # Only one chunk
+        return [(None, obj_size)]
+
+    starts = range(0, obj_size - 1, obj_chunk_size)
+
+    if obj_newline is None:
+        # partitions of the same size
+        return [((size, size + obj_chunk_size - 1), obj_chunk_size) for size in starts]
+
+    # common chunks, and the last one, which also takes a last single byte
+    return [
+        ((max(size - 1, 0), size + obj_chunk_size + CHUNK_THRESHOLD), obj_chunk_size)
+        if size + obj_chunk_size < obj_size - 1 else ((max(size - 1, 0), obj_size - 1), obj_size - size)
+        for size in starts
+    ]
+
+
+def _get_exact_byte_ranges(bounds):
+    """
+    Returns the (byte range, chunk size) of the partitions between bounds
+    """
+    return [((start, end - 1), end - start) for start, end in zip(bounds, bounds[1:])]
+
+
+def _get_record_bounds(read_range, obj_size, chunk_size, newline):
+    """
+    Returns the offsets where the partitions of an object start, plus the
+    object size. Each partition starts at the first record that begins at,
+    or after, a multiple of chunk_size. The records around each cut point
+    are read in parallel, with small ranged reads of RECORD_SCAN_SIZE bytes
+    """
+    newline = newline.encode()
+
+    def find_bound(cut):
+        pos = cut - 1
+        while pos < obj_size:
+            last_byte = min(pos + RECORD_SCAN_SIZE, obj_size) - 1
+            newline_pos = read_range(pos, last_byte).find(newline)
+            if newline_pos >= 0:
+                return pos + newline_pos + len(newline)
+            if last_byte == obj_size - 1:
+                break
+            # Overlap the windows, in case the newline is split between them
+            pos = last_byte + 2 - len(newline)
+        return obj_size
+
+    with ThreadPoolExecutor(64) as ex:
+        bounds = set(ex.map(find_bound, range(chunk_size, obj_size, chunk_size)))
+
+    return [0] + sorted(bound for bound in bounds if 0 < bound < obj_size) + [obj_size]
+
+
+def _get_partition_index(read_range, obj_size, chunk_size, newline, internal_storage=None, etag=None):
+    """
+    Returns the record bounds of an object. If the object has an ETag, they
+    are stored in a partition index object, so that the next jobs over the
+    same object do not need to read it again
+    """
+    index_key = None
+    if internal_storage is not None and etag:
+        index_key = create_partition_index_key(etag, obj_size, chunk_size, newline)
+        try:
+            return json.loads(internal_storage.get_data(index_key))
+        except StorageNoSuchKeyError:
+            pass
+
+    bounds = _get_record_bounds(read_range, obj_size, chunk_size, newline)
+    logger.debug(f'Found {len(bounds) - 1} record aligned partitions')
+
+    if index_key is not None:
+        internal_storage.put_data(index_key, json.dumps(bounds))
+
+    return bounds
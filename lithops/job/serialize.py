@@ -18,10 +18,14 @@
 
 import os
 import glob
+import pickle
 import importlib
 import logging
 import inspect
+import threading
 import cloudpickle
+import multiprocessing as mp
+import concurrent.futures as cf
 from pathlib import Path
 from dis import Bytecode
 from functools import reduce
@@ -30,18 +34,86 @@ from types import CodeType, FunctionType, ModuleType
 
 from lithops.libs import imp
 from lithops.libs import inspect as linspect
-from lithops.utils import bytes_to_b64str
+from lithops.utils import bytes_to_b64str, pickle_dumps
 from lithops.libs.multyvac.module_dependency import ModuleDependencyAnalyzer
 
 logger = logging.getLogger(__name__)
 
+# Objects serialized by each process in parallel serialization mode
+SERIALIZE_BATCH_SIZE = 10000
+BUILTIN_TYPES = frozenset([int, float, complex, bool, str, bytes, type(None)])
+CONTAINER_TYPES = frozenset([list, tuple, set, frozenset])
+# Deeper containers, including the self-referencing ones, are serialized with cloudpickle
+BUILTIN_MAX_DEPTH = 32
+
+# Objects to serialize in a forked serialization process, set by its initializer
+WORKER_OBJS = None
+
+
+def _is_builtin(obj, depth=0):
+    """
+    Checks if obj is made only of plain builtin values, which do not
+    need the cloudpickle reducers nor the module inspection
+    """
+    obj_type = type(obj)
+    if obj_type in BUILTIN_TYPES:
+        return True
+    if depth >= BUILTIN_MAX_DEPTH:
+        return False
+    if obj_type is dict:
+        for k, v in obj.items():
+            if type(k) not in BUILTIN_TYPES or \
+               (type(v) not in BUILTIN_TYPES and not _is_builtin(v, depth + 1)):
+                return False
+        return True
+    if obj_type in CONTAINER_TYPES:
+        for v in obj:
+            if type(v) not in BUILTIN_TYPES and not _is_builtin(v, depth + 1):
+                return False
+        return True
+    return False
+
+
+def _is_function(obj):
+    return inspect.isfunction(obj) or (inspect.ismethod(obj) and inspect.isfunction(obj.__func__))
+
+
+def _dumps(obj, builtin):
+    if builtin:
+        return pickle.dumps(obj, cloudpickle.DEFAULT_PROTOCOL)
+    return pickle_dumps(obj, cloudpickle.dumps)
+
+
+def _init_dumps_worker(list_of_objs):
+    # Runs in the forked process, so the objects are inherited instead of pickled
+    global WORKER_OBJS
+    WORKER_OBJS = list_of_objs
+
+
+def _dumps_batch(start, end):
+    # The out-of-band buffers are views of the objects of this process
+    return [bytes(_dumps(obj, _is_builtin(obj))) for obj in WORKER_OBJS[start:end]]
+
+
+def _can_fork():
+    """
+    Checks if the serialization processes can be forked. The children of a
+    process with other running threads inherit the locks held by those threads,
+    and can wait for them forever
+    """
+    start_method = mp.get_start_method(allow_none=True) or mp.get_all_start_methods()[0]
+    return start_method == 'fork' and threading.active_count() == 1
+
 
 class SerializeIndependent:
 
-    def __init__(self, preinstalls):
+    def __init__(self, preinstalls, processes=1):
         self.preinstalled_modules = preinstalls
         self.preinstalled_modules.append(['lithops', True])
+        self.processes = processes
         self._modulemgr = None
+        # Modules referenced by each function, class or type of the iterdata
+        self._inspect_memo = {}
 
     def __call__(self, list_of_objs, include_modules, exclude_modules):
         """
@@ -49,11 +121,13 @@ class SerializeIndependent:
         """
         preinstalled_modules = [name for name, _ in self.preinstalled_modules]
 
-        strs = []
         mod_paths = set()
+        builtins = [_is_builtin(obj) for obj in list_of_objs]
 
-        for obj in list_of_objs:
-            strs.append(cloudpickle.dumps(obj))
+        if self.processes > 1 and len(list_of_objs) > SERIALIZE_BATCH_SIZE and _can_fork():
+            strs = self._parallel_dumps(list_of_objs)
+        else:
+            strs = [_dumps(obj, builtin) for obj, builtin in zip(list_of_objs, builtins)]
 
         if include_modules is None:
             # If include_modules is explicitly set to None, no module is included
@@ -69,8 +143,9 @@ class SerializeIndependent:
 
             ref_modules = set()
 
-            for obj in list_of_objs:
-                ref_modules.update(self._module_inspect(obj))
+            for obj, builtin in zip(list_of_objs, builtins):
+                if not builtin:
+                    ref_modules.update(self._module_inspect(obj))
 
             logger.debug("Referenced Modules: {}".format(None if not
                          ref_modules else ", ".join(ref_modules)))
@@ -121,15 +196,27 @@ class SerializeIndependent:
 
         return (strs, mod_paths)
 
+    def _parallel_dumps(self, list_of_objs):
+        """
+        Serializes the objects in batches in forked processes,
+        which inherit the objects instead of receiving them pickled
+        """
+        logger.debug(f'Serializing {len(list_of_objs)} objects using {self.processes} processes')
+        ctx = mp.get_context('fork')
+        with cf.ProcessPoolExecutor(max_workers=self.processes, mp_context=ctx,
+                                    initializer=_init_dumps_worker, initargs=(list_of_objs,)) as pool:
+            batches = [pool.submit(_dumps_batch, start, start + SERIALIZE_BATCH_SIZE)
+                       for start in range(0, len(list_of_objs), SERIALIZE_BATCH_SIZE)]
+            return [obj_str for batch in batches for obj_str in batch.result()]
+
     def _module_inspect(self, obj):
         """
         inspect objects for module dependencies
         """
         worklist = []
-        seen = set()
         mods = set()
 
-        if inspect.isfunction(obj) or (inspect.ismethod(obj) and inspect.isfunction(obj.__func__)):
+        if _is_function(obj):
             # The obj is the user's function
             worklist.append(obj)
 
@@ -141,27 +228,62 @@ class SerializeIndependent:
         elif type(obj) is dict:
             # the obj is the user's iterdata
             for param in obj.values():
-                if type(param).__module__ == "__builtin__":
-                    continue
-                elif inspect.isfunction(param):
-                    # it is a user defined function
-                    worklist.append(param)
-                else:
-                    # it is a user defined class
-                    for k, v in linspect.getmembers_static(param):
-                        if inspect.isfunction(v) or (inspect.ismethod(v) and inspect.isfunction(v.__func__)):
-                            worklist.append(v)
+                mods.update(self._param_inspect(param))
         else:
             # The obj is the user's function but in form of a class
             found_methods = []
             for k, v in linspect.getmembers_static(obj):
-                if inspect.isfunction(v) or (inspect.ismethod(v) and inspect.isfunction(v.__func__)):
+                if _is_function(v):
                     found_methods.append(k)
                     worklist.append(v)
             if "__call__" not in found_methods:
                 raise Exception('The class you passed as the function to '
                                 'run must contain the "__call__" method')
 
+        mods.update(self._functions_inspect(worklist))
+
+        return set([mod_name.split('.')[0] for mod_name in mods])
+
+    def _param_inspect(self, param):
+        """
+        inspect an iterdata parameter for module dependencies. The modules
+        referenced by functions, classes and types are memoized, so the
+        same type is only inspected once per job
+        """
+        if _is_builtin(param):
+            return set()
+
+        if inspect.isfunction(param) or inspect.isclass(param):
+            memo_key = param
+        else:
+            memo_key = type(param)
+
+        if memo_key not in self._inspect_memo:
+            if inspect.isfunction(param):
+                # it is a user defined function
+                worklist = [param]
+            else:
+                # it is a user defined class or object
+                worklist = [v for k, v in linspect.getmembers_static(memo_key) if _is_function(v)]
+            self._inspect_memo[memo_key] = self._functions_inspect(worklist)
+
+        mods = self._inspect_memo[memo_key]
+
+        # functions stored in the object itself are not shared by its type
+        if memo_key is type(param) and isinstance(getattr(param, '__dict__', None), dict):
+            worklist = [v for v in param.__dict__.values() if _is_function(v)]
+            if worklist:
+                mods = mods | self._functions_inspect(worklist)
+
+        return mods
+
+    def _functions_inspect(self, worklist):
+        """
+        inspect functions for module dependencies
+        """
+        seen = set()
+        mods = set()
+
         # The worklist is only used for analyzing functions
         for fn in worklist:
             mods.add(fn.__module__)
@@ -199,7 +321,7 @@ class SerializeIndependent:
                     elif inspect.iscode(v):
                         codeworklist.append(v)
 
-        return set([mod_name.split('.')[0] for mod_name in mods])
+        return mods
 
     def _inner_module_inspect(self, inst):
         """
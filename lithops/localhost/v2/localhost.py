@@ -37,6 +37,7 @@ from lithops.constants import (
     COMPUTE_CLI_MSG,
     CPU_COUNT,
     USER_TEMP_DIR,
+    RN_LOG_FILE,
 )
 from lithops.utils import (
     BackendType,
@@ -54,6 +55,7 @@ from lithops.localhost.config import (
 logger = logging.getLogger(__name__)
 
 RUNNER_FILE = os.path.join(LITHOPS_TEMP_DIR, 'localhost-runner.py')
+JOB_FILE = 'job.json'
 LITHOPS_LOCATION = os.path.dirname(os.path.abspath(lithops.__file__))
 
 
@@ -211,18 +213,25 @@ class ExecutionEnvironment:
 
     def run_job(self, job_payload):
         """
-        Adds a job to the localhost work queue
+        Adds a job to the localhost work queue. The job payload is written
+        once to the job directory, and each task only carries its call id
+        and data byte range
         """
         job_key = job_payload['job_key']
         self.jobs[job_key] = CountDownLatch(len(job_payload['call_ids']))
         os.makedirs(os.path.join(JOBS_DIR, job_key), exist_ok=True)
 
+        job_data = copy.copy(job_payload)
+        del job_data['call_ids']
+        del job_data['data_byte_ranges']
+
+        job_filename = os.path.join(JOBS_DIR, job_key, JOB_FILE)
+        with open(job_filename, 'w') as jl:
+            json.dump(job_data, jl, default=str)
+
         dbr = job_payload['data_byte_ranges']
         for call_id in job_payload['call_ids']:
-            task_payload = copy.deepcopy(job_payload)
-            task_payload['call_ids'] = [call_id]
-            task_payload['data_byte_ranges'] = [dbr[int(call_id)]]
-            self.work_queue.put(json.dumps(task_payload))
+            self.work_queue.put((job_key, call_id, dbr[int(call_id)]))
 
     def start(self):
         """
@@ -232,28 +241,21 @@ class ExecutionEnvironment:
         if self.consumer_threads:
             return
 
-        def process_task(task_payload_str):
-            task_payload = json.loads(task_payload_str)
-            job_key = task_payload['job_key']
-            call_id = task_payload['call_ids'][0]
-
-            task_filename = os.path.join(JOBS_DIR, job_key, call_id + '.task')
-            with open(task_filename, 'w') as jl:
-                json.dump(task_payload, jl, default=str)
-
-            self.run_task(job_key, call_id)
+        def process_task(task):
+            job_key, call_id, data_byte_range = task
 
-            if os.path.exists(task_filename):
-                os.remove(task_filename)
+            self.run_task(job_key, call_id, data_byte_range)
 
             self.jobs[job_key].unlock()
+            if self.jobs[job_key].done:
+                shutil.rmtree(os.path.join(JOBS_DIR, job_key), ignore_errors=True)
 
         def queue_consumer(work_queue):
             while True:
-                task_payload_str = work_queue.get()
-                if task_payload_str is None:
+                task = work_queue.get()
+                if task is None:
                     break
-                process_task(task_payload_str)
+                process_task(task)
 
         logger.debug("Starting Localhost work queue consumer threads")
         for _ in range(self.worker_processes):
@@ -286,6 +288,10 @@ class DefaultEnvironment(ExecutionEnvironment):
     def __init__(self, config):
         super().__init__(config)
         logger.debug(f'Starting default environment for {self.runtime_name}')
+        self.warm_runners = self.config.get('warm_runners', False)
+        self.runners = queue.Queue()
+        self.runners_lock = threading.Lock()
+        self.stopping = False
 
     def setup(self):
         logger.debug('Setting up default environment')
@@ -310,17 +316,79 @@ class DefaultEnvironment(ExecutionEnvironment):
         if not os.path.isfile(RUNNER_FILE):
             self.setup()
 
+        if self.warm_runners and not self.consumer_threads:
+            self._start_runners()
+
         super().start()
 
-    def run_task(self, job_key, call_id):
+    def _start_runners(self):
+        """
+        Starts the long-lived runner processes up to worker_processes. It is
+        called while no task is running, so all the runners are in the queue
+        """
+        with self.runners_lock:
+            self.stopping = False
+            total_runners = self.runners.qsize()
+            while total_runners < self.worker_processes:
+                self.runners.put(self._spawn_runner())
+                total_runners += 1
+
+    def _spawn_runner(self):
+        """
+        Spawns a long-lived runner process that receives the tasks through stdin
+        """
+        cmd = [self.runtime_name, RUNNER_FILE, 'run_worker']
+        with open(RN_LOG_FILE, 'a') as log:
+            process = sp.Popen(
+                cmd, stdin=sp.PIPE, stdout=sp.PIPE, stderr=log,
+                universal_newlines=True, bufsize=1, start_new_session=True
+            )
+        logger.debug(f"Started task runner process {process.pid}")
+        return process
+
+    def _run_task_in_runner(self, job_key, call_id, data_byte_range):
+        """
+        Runs a task in one of the long-lived runner processes
+        """
+        job_key_call_id = f'{job_key}-{call_id}'
+        job_filename = os.path.join(JOBS_DIR, job_key, JOB_FILE)
+
+        process = self.runners.get()
+        logger.debug(f"Going to execute task {job_key_call_id} in runner process {process.pid}")
+        self.task_processes[job_key_call_id] = process
+
+        try:
+            process.stdin.write(json.dumps([job_filename, call_id, data_byte_range]) + '\n')
+            process.stdin.flush()
+            response = process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            response = ''
+
+        if response.strip() == call_id:
+            self.runners.put(process)
+        else:
+            process.wait()
+            logger.error(f"Task process {job_key_call_id} failed with return code {process.returncode}")
+            # The runners killed by stop() are started again with the next job
+            with self.runners_lock:
+                if not self.stopping:
+                    self.runners.put(self._spawn_runner())
+
+        del self.task_processes[job_key_call_id]
+        logger.debug(f"Task process {job_key_call_id} finished")
+
+    def run_task(self, job_key, call_id, data_byte_range):
         """
         Runs a task
         """
+        if self.warm_runners:
+            return self._run_task_in_runner(job_key, call_id, data_byte_range)
+
         job_key_call_id = f'{job_key}-{call_id}'
-        task_filename = os.path.join(JOBS_DIR, job_key, call_id + '.task')
+        job_filename = os.path.join(JOBS_DIR, job_key, JOB_FILE)
 
         logger.debug(f"Going to execute task process {job_key_call_id}")
-        cmd = [self.runtime_name, RUNNER_FILE, 'run_job', task_filename]
+        cmd = [self.runtime_name, RUNNER_FILE, 'run_job', job_filename, call_id, json.dumps(data_byte_range)]
         process = sp.Popen(cmd, stdout=sp.PIPE, stderr=sp.PIPE, start_new_session=True)
         self.task_processes[job_key_call_id] = process
         process.communicate()  # blocks until the process finishes
@@ -342,6 +410,9 @@ class DefaultEnvironment(ExecutionEnvironment):
                 else:
                     os.kill(PID, signal.SIGTERM)
 
+        with self.runners_lock:
+            self.stopping = True
+
         job_keys_to_stop = job_keys or list(self.jobs.keys())
         for job_key in job_keys_to_stop:
             for job_key_call_id in list(self.task_processes.keys()):
@@ -423,18 +494,19 @@ class ContainerEnvironment(ExecutionEnvironment):
 
         super().start()
 
-    def run_task(self, job_key, call_id):
+    def run_task(self, job_key, call_id, data_byte_range):
         """
         Runs a task
         """
         job_key_call_id = f'{job_key}-{call_id}'
         docker_job_dir = f'/tmp/{USER_TEMP_DIR}/jobs/{job_key}'
-        docker_task_filename = f'{docker_job_dir}/{call_id}.task'
+        docker_job_filename = f'{docker_job_dir}/{JOB_FILE}'
+        dbr = json.dumps(data_byte_range, separators=(',', ':'))
 
         logger.debug(f"Going to execute task process {job_key_call_id}")
         cmd = f'{self.docker_path} exec {self.container_name} /bin/bash -c '
         cmd += f'"python3 /tmp/{USER_TEMP_DIR}/localhost-runner.py '
-        cmd += f'run_job {docker_task_filename}"'
+        cmd += f'run_job {docker_job_filename} {call_id} \'{dbr}\'"'
 
         process = sp.Popen(shlex.split(cmd), stdout=sp.PIPE, stderr=sp.PIPE, start_new_session=True)
         self.task_processes[job_key_call_id] = process
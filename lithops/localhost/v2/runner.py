@@ -23,7 +23,7 @@ import uuid
 import multiprocessing as mp
 
 from lithops.worker import function_handler
-from lithops.worker.utils import get_runtime_metadata
+from lithops.worker.utils import get_runtime_metadata, preload_function
 from lithops.constants import (
     LITHOPS_TEMP_DIR,
     JOBS_DIR,
@@ -47,16 +47,7 @@ if platform.system() == 'Darwin':
     mp.set_start_method("fork")
 
 
-def run_job():
-    sys.stdout = log_file_stream
-    sys.stderr = log_file_stream
-
-    task_filename = sys.argv[2]
-    logger.info(f'Got {task_filename} file')
-
-    with open(task_filename, 'rb') as jf:
-        task_payload = json.load(jf)
-
+def run_task(task_payload):
     executor_id = task_payload['executor_id']
     job_id = task_payload['job_id']
     call_id = task_payload['call_ids'][0]
@@ -76,6 +67,74 @@ def run_job():
     logger.info(f'ExecutorID {executor_id} | JobID {job_id} | CallID {call_id} - Execution Finished')
 
 
+def load_task(job_filename, call_id, data_byte_range, job_payload=None):
+    """
+    Builds the task payload of a single call from the job payload file
+    """
+    if job_payload is None:
+        with open(job_filename, 'rb') as jf:
+            job_payload = json.load(jf)
+
+    task_payload = dict(job_payload)
+    task_payload['call_ids'] = [call_id]
+    task_payload['data_byte_ranges'] = [data_byte_range]
+
+    return task_payload
+
+
+def run_job():
+    sys.stdout = log_file_stream
+    sys.stderr = log_file_stream
+
+    job_filename, call_id, data_byte_range = sys.argv[2:5]
+    logger.info(f'Got {job_filename} file - CallID {call_id}')
+
+    task_payload = load_task(job_filename, call_id, json.loads(data_byte_range))
+    run_task(task_payload)
+
+
+def run_worker():
+    """
+    Long-lived task runner. Receives tasks through stdin, one json encoded
+    [job_filename, call_id, data_byte_range] record per line, and writes
+    the call id to stdout once each task is finished
+    """
+    pipe_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(log_file_stream.fileno(), sys.stdout.fileno())
+    os.dup2(log_file_stream.fileno(), sys.stderr.fileno())
+    sys.stdout = log_file_stream
+    sys.stderr = log_file_stream
+
+    loaded_functions = set()
+    job_filename = job_payload = None
+
+    while True:
+        task_record = sys.stdin.readline().strip()
+        if not task_record:
+            break
+
+        task_job_filename, call_id, data_byte_range = json.loads(task_record)
+        logger.info(f'Got {task_job_filename} file - CallID {call_id}')
+
+        if task_job_filename != job_filename:
+            job_filename = task_job_filename
+            with open(job_filename, 'rb') as jf:
+                job_payload = json.load(jf)
+
+        task_payload = load_task(job_filename, call_id, data_byte_range, job_payload)
+
+        if task_payload['func_key'] not in loaded_functions:
+            preload_function(task_payload)
+            loaded_functions.add(task_payload['func_key'])
+
+        run_task(task_payload)
+
+        pipe_out.write(call_id + '\n')
+        pipe_out.flush()
+
+    logger.info('Localhost task runner finished')
+
+
 def extract_runtime_meta():
     runtime_meta = get_runtime_metadata()
     print(json.dumps(runtime_meta))
@@ -88,7 +147,8 @@ if __name__ == "__main__":
 
     switcher = {
         'get_metadata': extract_runtime_meta,
-        'run_job': run_job
+        'run_job': run_job,
+        'run_worker': run_worker
     }
 
     switcher.get(command, lambda: "Invalid command")()
@@ -23,14 +23,18 @@ import pickle
 import sys
 import queue
 import threading
-import concurrent.futures as cf
+from bisect import insort
 from tblib import pickling_support
 
+from lithops.storage.utils import create_status_key, create_job_key
+
 pickling_support.install()
 
 logger = logging.getLogger(__name__)
 
 LOG_INTERVAL = 30  # Print monitor debug every LOG_INTERVAL seconds
+SPECULATION_QUANTILE = 0.75
+SPECULATION_MULTIPLIER = 1.5
 
 
 class Monitor(threading.Thread):
@@ -48,25 +52,96 @@ class Monitor(threading.Thread):
         super().__init__()
         self.executor_id = executor_id
         self.futures = set()
+        self.futures_index = {}
+        self.futures_not_ready = set()
+        self.futures_running = set()
         self.internal_storage = internal_storage
         self.should_run = True
         self.token_bucket_q = token_bucket_q
         self.job_chunksize = job_chunksize
         self.generate_tokens = generate_tokens
         self.config = config
+        self.rate_controller = None
         self.daemon = True
 
+        # vars for _speculate_stragglers
+        self.speculator = None
+        self.speculation_quantile = SPECULATION_QUANTILE
+        self.speculation_multiplier = SPECULATION_MULTIPLIER
+        self.speculated = set()
+        self.job_total_calls = {}
+        self.job_runtimes = {}
+
         # vars for _generate_tokens
         self.workers = {}
         self.workers_done = []
         self.callids_done_worker = {}
         self.present_jobs = set()
 
+    def _track_futures(self, fs):
+        """
+        Indexes the futures by (executor_id, job_id, call_id) and
+        keeps the keys of those not ready yet
+        """
+        for f in fs:
+            key = (f.executor_id, f.job_id, f.call_id)
+            if key not in self.futures_index:
+                self.job_total_calls[f.job_key] = self.job_total_calls.get(f.job_key, 0) + 1
+                if f.ready or f.success or f.done:
+                    self._add_runtime(f)
+            self.futures.add(f)
+            self.futures_index[key] = f
+            if not (f.ready or f.success or f.done):
+                self.futures_not_ready.add(key)
+                if f.running:
+                    self.futures_running.add(key)
+
+    def _add_runtime(self, f):
+        """
+        Adds the runtime of a done future to the sorted runtimes of its job
+        """
+        if not f._call_status:
+            return
+        start = f._call_status.get('worker_start_tstamp')
+        end = f._call_status.get('worker_end_tstamp')
+        if start and end:
+            insort(self.job_runtimes.setdefault(f.job_key, []), end - start)
+
+    def _get_not_ready_futures(self):
+        """
+        Returns the futures that are not ready yet, and drops
+        from the index the ones that changed their state
+        """
+        fs = []
+        for key in list(self.futures_not_ready):
+            f = self.futures_index[key]
+            if f.ready or f.success or f.done:
+                if key in self.futures_not_ready:
+                    self.futures_not_ready.discard(key)
+                    self._add_runtime(f)
+                self.futures_running.discard(key)
+            else:
+                fs.append(f)
+        return fs
+
+    def _get_running_futures(self):
+        """
+        Returns the futures tagged as running that are still running
+        """
+        fs = []
+        for key in list(self.futures_running):
+            f = self.futures_index.get(key)
+            if f is None or not f.running:
+                self.futures_running.discard(key)
+            else:
+                fs.append(f)
+        return fs
+
     def add_futures(self, fs):
         """
         Extends the current thread list of futures to track
         """
-        self.futures.update(set(fs))
+        self._track_futures(fs)
 
         present_jobs = {future.job_id for future in fs}
         for job_id in present_jobs:
@@ -81,6 +156,14 @@ class Monitor(threading.Thread):
         for future in fs:
             if future in self.futures:
                 self.futures.remove(future)
+            key = (future.executor_id, future.job_id, future.call_id)
+            if self.futures_index.pop(key, None) is not None:
+                self.job_total_calls[future.job_key] -= 1
+                if not self.job_total_calls[future.job_key]:
+                    del self.job_total_calls[future.job_key]
+                    self.job_runtimes.pop(future.job_key, None)
+            self.futures_not_ready.discard(key)
+            self.futures_running.discard(key)
 
         for job_id in {future.job_id for future in fs}:
             if job_id in self.present_jobs:
@@ -90,7 +173,7 @@ class Monitor(threading.Thread):
         """
         Checks if all futures are ready, success or done
         """
-        return all([f.ready or f.success or f.done for f in self.futures])
+        return not self._get_not_ready_futures()
 
     def _check_new_futures(self, call_status, f):
         """Checks if a functions returned new futures to track"""
@@ -98,7 +181,7 @@ class Monitor(threading.Thread):
             return False
 
         f._set_futures(call_status)
-        self.futures.update(f._new_futures)
+        self._track_futures(f._new_futures)
         logger.debug(
             f'ExecutorID {self.executor_id} - Received {len(f._new_futures)} '
             'new function Futures to track'
@@ -133,16 +216,61 @@ class Monitor(threading.Thread):
                                'worker_end_tstamp': time.time()}
                 fut._set_ready(call_status)
 
+    def _speculate_stragglers(self):
+        """
+        Once speculation_quantile of the calls of a job are done, re-invokes
+        the running calls of the job that exceed speculation_multiplier times
+        that quantile of the runtimes of the done calls. Each call is
+        re-invoked at most once, and the first attempt to finish wins
+        """
+        if not self.speculator:
+            return
+
+        now = time.time()
+        candidates = {}
+        for f in self._get_running_futures():
+            key = (f.executor_id, f.job_id, f.call_id)
+            if key not in self.speculated and f._call_status:
+                candidates.setdefault(f.job_key, []).append(f)
+
+        if not candidates:
+            return
+
+        stragglers = []
+        for job_key, fs in candidates.items():
+            job_runtimes = self.job_runtimes.get(job_key, [])
+            if not job_runtimes or len(job_runtimes) < self.speculation_quantile * self.job_total_calls[job_key]:
+                continue
+            index = min(len(job_runtimes) - 1, int(self.speculation_quantile * len(job_runtimes)))
+            threshold = self.speculation_multiplier * job_runtimes[index]
+            for f in fs:
+                if now - f._call_status['worker_start_tstamp'] > threshold:
+                    stragglers.append(f)
+
+        if stragglers:
+            # The speculator returns the calls it re-invoked, the others are retried in the next tick
+            speculated = self.speculator(stragglers)
+            if speculated:
+                logger.debug(f'ExecutorID {self.executor_id} - Speculatively re-invoked '
+                             f'{len(speculated)} of {len(stragglers)} straggler calls')
+                self.speculated.update((f.executor_id, f.job_id, f.call_id) for f in speculated)
+
     def _print_status_log(self, previous_log=None, log_time=None):
         """prints a debug log showing the status of the job"""
         if not self.futures:
             return previous_log, log_time
-        callids_pending = len([f for f in self.futures if f.invoked])
-        callids_running = len([f for f in self.futures if f.running])
-        callids_done = len([f for f in self.futures if f.ready or f.success or f.done])
+        not_ready_futures = self._get_not_ready_futures()
+        callids_pending = len([f for f in not_ready_futures if f.invoked])
+        callids_running = len(self._get_running_futures())
+        callids_done = len(self.futures) - len(not_ready_futures)
         if (callids_pending, callids_running, callids_done) != previous_log or log_time > LOG_INTERVAL:
-            logger.debug(f'ExecutorID {self.executor_id} - Pending: {callids_pending} '
-                         f'- Running: {callids_running} - Done: {callids_done}')
+            msg = (f'ExecutorID {self.executor_id} - Pending: {callids_pending} '
+                   f'- Running: {callids_running} - Done: {callids_done}')
+            if self.rate_controller:
+                stats = self.rate_controller.stats()
+                msg += (f' - Invocation rate: {stats["rate"]:.1f}/s - Limit: '
+                        f'{stats["limit"]} - Throttled: {stats["throttle_rate"]:.1%}')
+            logger.debug(msg)
             log_time = 0
         return (callids_pending, callids_running, callids_done), log_time
 
@@ -207,22 +335,21 @@ class RabbitmqMonitor(Monitor):
         """
         Assigns a call_status to its future
         """
-        not_running_futures = [f for f in self.futures if not (f.running or f.ready or f.success or f.done)]
-        for f in not_running_futures:
-            calljob_id = (call_status['executor_id'], call_status['job_id'], call_status['call_id'])
-            if (f.executor_id, f.job_id, f.call_id) == calljob_id:
-                f._set_running(call_status)
+        calljob_id = (call_status['executor_id'], call_status['job_id'], call_status['call_id'])
+        f = self.futures_index.get(calljob_id)
+        if f and not (f.running or f.ready or f.success or f.done):
+            f._set_running(call_status)
+            self.futures_running.add(calljob_id)
 
     def _tag_future_as_ready(self, call_status):
         """
         tags a future as ready based on call_status
         """
-        not_ready_futures = [f for f in self.futures if not (f.ready or f.success or f.done)]
-        for f in not_ready_futures:
-            calljob_id = (call_status['executor_id'], call_status['job_id'], call_status['call_id'])
-            if (f.executor_id, f.job_id, f.call_id) == calljob_id:
-                if not self._check_new_futures(call_status, f):
-                    f._set_ready(call_status)
+        calljob_id = (call_status['executor_id'], call_status['job_id'], call_status['call_id'])
+        f = self.futures_index.get(calljob_id)
+        if f and not (f.ready or f.success or f.done):
+            if not self._check_new_futures(call_status, f):
+                f._set_ready(call_status)
 
     def _generate_tokens(self, call_status):
         """
@@ -269,7 +396,8 @@ class RabbitmqMonitor(Monitor):
             while self.should_run and not self._all_ready():
                 # Format call_ids running, pending and done
                 prevoius_log, log_time = self._print_status_log(previous_log=prevoius_log, log_time=log_time)
-                self._future_timeout_checker(self.futures)
+                self._future_timeout_checker(self._get_running_futures())
+                self._speculate_stragglers()
                 time.sleep(SLEEP_TIME)
                 log_time += SLEEP_TIME
 
@@ -316,6 +444,119 @@ class StorageMonitor(Monitor):
 
         # vars for _mark_status_as_ready
         self.callids_done_processed_status = set()
+        self.callids_done_pending = set()
+
+        # vars for _get_job_status
+        self.jobs_index = {}
+        self.jobs_index_lock = threading.Lock()
+        self.callids_running = set()
+        self.callids_done = set()
+
+    def add_futures(self, fs):
+        """
+        Extends the current thread list of futures to track
+        """
+        super().add_futures(fs)
+        self._index_jobs(fs)
+
+    def _check_new_futures(self, call_status, f):
+        """Checks if a functions returned new futures to track"""
+        if not super()._check_new_futures(call_status, f):
+            return False
+
+        self._index_jobs(f._new_futures)
+
+        return True
+
+    def _index_jobs(self, fs):
+        """
+        Adds the call ids of the futures to the job status index. Each job
+        keeps its call ids sorted, so the status keys of the longest run of
+        finished calls can be skipped in the next listings
+        """
+        new_call_ids = {}
+        for f in fs:
+            if f.executor_id == self.executor_id:
+                new_call_ids.setdefault(f.job_id, set()).add(f.call_id)
+
+        with self.jobs_index_lock:
+            for job_id, call_ids in new_call_ids.items():
+                if job_id not in self.jobs_index:
+                    self.jobs_index[job_id] = {
+                        'call_ids': [], 'pos': 0,
+                        'marker': None, 'retired': False, 'evicted': False
+                    }
+                job = self.jobs_index[job_id]
+                call_ids = call_ids - set(job['call_ids'])
+                if not call_ids:
+                    continue
+                if job['pos'] > 0 and min(call_ids) < job['call_ids'][job['pos'] - 1]:
+                    # A new call is behind the marker, list the whole job again
+                    job['pos'] = 0
+                    job['marker'] = None
+                job['call_ids'] = sorted(job['call_ids'] + list(call_ids))
+                job['retired'] = False
+                job['evicted'] = False
+
+    def _advance_marker(self, job_id, job):
+        """
+        Moves the list-after marker of a job past the calls that are done,
+        and retires the job from polling once all its calls are done
+        """
+        call_ids = job['call_ids']
+        pos = job['pos']
+        while pos < len(call_ids) and (self.executor_id, job_id, call_ids[pos]) in self.callids_done:
+            pos += 1
+
+        if pos > job['pos']:
+            job['pos'] = pos
+            job['marker'] = create_status_key(self.executor_id, job_id, call_ids[pos - 1])
+
+        job['retired'] = pos == len(call_ids)
+
+    def _get_job_status(self):
+        """
+        Lists the status keys of the jobs that still have pending calls,
+        starting after the marker of each job, and returns the running and
+        done call ids not seen in previous listings
+        """
+        with self.jobs_index_lock:
+            jobs = [(job_id, dict(job)) for job_id, job in self.jobs_index.items() if not job['retired']]
+
+        new_callids_running = set()
+        new_callids_done = set()
+
+        for job_id, job in jobs:
+            callids_running, callids_done = self.internal_storage.get_job_status(
+                self.executor_id, job_id, start_after=job['marker']
+            )
+            new_callids_running.update(callids_running - self.callids_running)
+            new_callids_done.update(callids_done - self.callids_done)
+            self.callids_running.update(callids_running)
+            self.callids_done.update(callids_done)
+
+        with self.jobs_index_lock:
+            for job_id, job in self.jobs_index.items():
+                if not job['retired']:
+                    self._advance_marker(job_id, job)
+
+        return new_callids_running, new_callids_done
+
+    def _evict_status_batches(self):
+        """
+        Drops the cached status batches of the retired jobs once
+        all their futures have read their status
+        """
+        with self.jobs_index_lock:
+            jobs = [(job_id, job) for job_id, job in self.jobs_index.items()
+                    if job['retired'] and not job['evicted']]
+
+        for job_id, job in jobs:
+            fs = [self.futures_index.get((self.executor_id, job_id, call_id)) for call_id in job['call_ids']]
+            if all(f is None or f._is_ready() for f in fs):
+                self.internal_storage.evict_status_batches(create_job_key(self.executor_id, job_id))
+                with self.jobs_index_lock:
+                    job['evicted'] = job['retired']
 
     def stop(self):
         """
@@ -328,33 +569,37 @@ class StorageMonitor(Monitor):
         Mark which futures are in running status based on callids_running
         """
         current_time = time.time()
-        not_running_futures = [f for f in self.futures if not (f.running or f.ready or f.success or f.done)]
         callids_running_to_process = callids_running - self.callids_running_processed_timeout
-        for f in not_running_futures:
-            for call in callids_running_to_process:
-                if f.invoked and (f.executor_id, f.job_id, f.call_id) == call[0]:
-                    call_status = {'type': '__init__',
-                                   'activation_id': call[1],
-                                   'worker_start_tstamp': current_time}
-                    f._set_running(call_status)
+        for call_key, activation_id in callids_running_to_process:
+            f = self.futures_index.get(call_key)
+            if f and f.invoked:
+                call_status = {'type': '__init__',
+                               'activation_id': activation_id,
+                               'worker_start_tstamp': current_time}
+                f._set_running(call_status)
+                self.futures_running.add(call_key)
 
         self.callids_running_processed_timeout.update(callids_running_to_process)
-        self._future_timeout_checker(self.futures)
+        self._future_timeout_checker(self._get_running_futures())
 
     def _tag_future_as_ready(self, callids_done):
         """
         Mark which futures has a call_status ready to be downloaded
         """
-        not_ready_futures = [f for f in self.futures if not (f.ready or f.success or f.done)]
-        callids_done_to_process = callids_done - self.callids_done_processed_status
+        self.callids_done_pending.update(callids_done - self.callids_done_processed_status)
         fs_to_query = []
 
         ten_percent = int(len(self.futures) * (10 / 100))
-        if len(self.futures) - len(callids_done) <= max(10, ten_percent):
-            fs_to_query = not_ready_futures
+        if len(self.futures) - len(self.callids_done) <= max(10, ten_percent):
+            fs_to_query = self._get_not_ready_futures()
         else:
-            for f in not_ready_futures:
-                if (f.executor_id, f.job_id, f.call_id) in callids_done_to_process:
+            for call_key in list(self.callids_done_pending):
+                f = self.futures_index.get(call_key)
+                if f is None:
+                    continue
+                if f.ready or f.success or f.done:
+                    self.callids_done_pending.discard(call_key)
+                else:
                     fs_to_query.append(f)
 
         if not fs_to_query:
@@ -371,9 +616,8 @@ class StorageMonitor(Monitor):
                 return None
 
         try:
-            pool = cf.ThreadPoolExecutor(max_workers=self.THREADPOOL_SIZE)
-            call_ids_processed = set(pool.map(get_status, fs_to_query))
-            pool.shutdown()
+            call_ids_processed = set(self.internal_storage.io_map(
+                get_status, fs_to_query, max_workers=self.THREADPOOL_SIZE))
         except Exception:
             pass
 
@@ -384,6 +628,7 @@ class StorageMonitor(Monitor):
 
         try:
             self.callids_done_processed_status.update(call_ids_processed)
+            self.callids_done_pending.difference_update(call_ids_processed)
         except Exception:
             pass
 
@@ -438,13 +683,15 @@ class StorageMonitor(Monitor):
 
         def process_callids():
             nonlocal previous_log, log_time
-            callids_running, callids_done = self.internal_storage.get_job_status(self.executor_id)
+            callids_running, callids_done = self._get_job_status()
             # verify if there are new callids_done and reduce the sleep
             new_callids_done = callids_done - self.callids_done_processed_status
             # generate tokens and mark futures as running/done
             self._generate_tokens(callids_running, callids_done)
             self._tag_future_as_running(callids_running)
             self._tag_future_as_ready(callids_done)
+            self._evict_status_batches()
+            self._speculate_stragglers()
             previous_log, log_time = self._print_status_log(previous_log, log_time)
 
             return new_callids_done
@@ -478,6 +725,8 @@ class JobMonitor:
         self.token_bucket_q = queue.Queue()
         self.monitor = None
         self.job_chunksize = {}
+        self.rate_controller = None
+        self.speculator = None
 
         self.MonitorClass = getattr(
             lithops.monitor,
@@ -503,12 +752,27 @@ class JobMonitor:
                 generate_tokens=generate_tokens,
                 config=monitor_config
             )
+            self.monitor.rate_controller = self.rate_controller
+            if self.speculator:
+                self.monitor.speculator = self.speculator
+                self.monitor.speculation_quantile = self.config['lithops'].get(
+                    'speculation_quantile', SPECULATION_QUANTILE)
+                self.monitor.speculation_multiplier = self.config['lithops'].get(
+                    'speculation_multiplier', SPECULATION_MULTIPLIER)
 
         self.monitor.add_futures(fs)
 
         if not self.monitor.is_alive():
             self.monitor.start()
 
+    def get_invocation_stats(self):
+        """
+        Returns the current limit, rate, latency and throttle rate of the
+        invocations, or None if the invoker does not control them
+        """
+        if self.rate_controller:
+            return self.rate_controller.stats()
+
     def remove(self, fs):
         if self.monitor and self.monitor.is_alive():
             self.monitor.remove_futures(fs)
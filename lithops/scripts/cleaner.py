@@ -22,9 +22,10 @@ import logging
 from concurrent.futures import ThreadPoolExecutor
 
 from lithops.storage import Storage
-from lithops.storage.utils import clean_bucket
+from lithops.storage.utils import clean_bucket, get_last_modified
 from lithops.constants import JOBS_PREFIX, TEMP_PREFIX, CLEANER_DIR, \
-    CLEANER_PID_FILE, CLEANER_LOG_FILE
+    CLEANER_PID_FILE, CLEANER_LOG_FILE, CONFIGS_PREFIX, FUNCTIONS_PREFIX, FUNCTIONS_MAX_AGE, \
+    PARTITIONS_PREFIX
 
 log_file_stream = open(CLEANER_LOG_FILE, 'a')
 sys.stdout = log_file_stream
@@ -93,6 +94,28 @@ def clean_cloudobjects(cloudobjects_data):
     logger.info('Finished')
 
 
+def clean_expired(storage, prefix):
+    """
+    Deletes the objects not modified during FUNCTIONS_MAX_AGE. The objects of
+    the backends that return no modification time, neither when listing nor on
+    HEAD requests (azure_storage, redis, infinispan), are never deleted
+    """
+    logger.info(f'Cleaning expired objects from {prefix}')
+    key_list = []
+    for obj in storage.list_objects(storage.bucket, prefix):
+        last_modified = get_last_modified(obj)
+        if last_modified is None:
+            # Some backends only return the modification time on HEAD requests
+            try:
+                last_modified = get_last_modified(storage.head_object(storage.bucket, obj['Key']))
+            except Exception as e:
+                logger.debug(f"Unable to get the modification time of {obj['Key']}: {e}")
+        if last_modified and time.time() - last_modified > FUNCTIONS_MAX_AGE:
+            key_list.append(obj['Key'])
+    if key_list:
+        storage.delete_objects(storage.bucket, key_list)
+
+
 def clean_functions(functions_data):
     file_location = functions_data['file_location']
     data = functions_data['data']
@@ -105,6 +128,17 @@ def clean_functions(functions_data):
     key_list = storage.list_keys(storage.bucket, prefix)
     storage.delete_objects(storage.bucket, key_list)
 
+    prefix = '/'.join([CONFIGS_PREFIX, executor_id]) + '/'
+    logger.info(f'Cleaning configs from {prefix}')
+    key_list = storage.list_keys(storage.bucket, prefix)
+    if key_list:
+        storage.delete_objects(storage.bucket, key_list)
+
+    # Functions and partition indexes are shared by the executors, so they are
+    # deleted only when nobody uploaded them again during FUNCTIONS_MAX_AGE
+    clean_expired(storage, FUNCTIONS_PREFIX + '/')
+    clean_expired(storage, PARTITIONS_PREFIX + '/')
+
     if os.path.exists(file_location):
         os.remove(file_location)
     logger.info('Finished')
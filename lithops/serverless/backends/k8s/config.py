@@ -23,9 +23,12 @@ DEFAULT_CONFIG_KEYS = {
     'runtime_cpu': 1,  # 1 vCPU
     'max_workers': 100,
     'worker_processes': 1,
-    'docker_server': 'docker.io'
+    'docker_server': 'docker.io',
+    'range_scheduling': 'static'
 }
 
+RANGE_SCHEDULING_POLICIES = ('static', 'guided', 'factoring')
+
 DEFAULT_GROUP = "batch"
 DEFAULT_VERSION = "v1"
 MASTER_NAME = "lithops-master"
@@ -148,5 +151,8 @@ def load_config(config_data):
         if runtime.count('/') == 1 and registry not in runtime:
             config_data['k8s']['runtime'] = f'{registry}/{runtime}'
 
+    if config_data['k8s']['range_scheduling'] not in RANGE_SCHEDULING_POLICIES:
+        raise Exception(f"'range_scheduling' must be one of {RANGE_SCHEDULING_POLICIES}")
+
     if config_data['k8s'].get('rabbitmq_executor', False):
         config_data['k8s']['amqp_url'] = config_data['rabbitmq']['amqp_url']
@@ -21,9 +21,12 @@ import uuid
 import json
 import logging
 import flask
+import math
 import time
 import requests
+import threading
 from functools import partial
+from collections import OrderedDict
 from multiprocessing import Value, Process
 
 from lithops.version import __version__
@@ -40,15 +43,107 @@ logger = logging.getLogger('lithops.worker')
 proxy = flask.Flask(__name__)
 
 JOB_INDEXES = {}
+JOB_RANGES = {}
+RANGES_LOCK = threading.Lock()
+# Recently finished jobs, for the pods that ask for a range after the others
+FINISHED_JOBS = OrderedDict()
+FINISHED_JOBS_SIZE = 1024
+
+
+class JobRanges:
+    """
+    Hands out the call ranges of a job to its pods. With the 'static' policy
+    all the ranges have chunksize calls. With 'guided' each range has
+    1/workers of the remaining calls, and with 'factoring' the remaining
+    calls are split in batches of one range per worker, each batch covering
+    half of them. In both cases, the ranges of the pods that reported a
+    slower time per call are shrunk, and those of faster pods are grown
+    """
+    MIN_SPEEDUP = 0.5
+    MAX_SPEEDUP = 2.0
+    CALL_TIME_ALPHA = 0.5  # Weight of the last report in the time per call average
+
+    def __init__(self, total_calls, chunksize, workers, policy):
+        self.total_calls = total_calls
+        self.chunksize = chunksize
+        self.workers = max(1, workers)
+        self.policy = policy
+        self.next_call = 0
+        self.batch_left = 0
+        self.batch_size = chunksize
+        self.call_times = {}
+        self.last_responses = {}
+
+    def _report(self, worker_id, calls, duration):
+        call_time = duration / max(1, calls)
+        if worker_id in self.call_times:
+            call_time += (1 - self.CALL_TIME_ALPHA) * (self.call_times[worker_id] - call_time)
+        self.call_times[worker_id] = call_time
+
+    def _range_size(self, worker_id):
+        remaining = self.total_calls - self.next_call
+
+        if self.policy == 'guided':
+            size = math.ceil(remaining / self.workers)
+        elif self.policy == 'factoring':
+            if self.batch_left == 0:
+                self.batch_size = math.ceil(remaining / (2 * self.workers))
+                self.batch_left = self.workers
+            self.batch_left -= 1
+            size = self.batch_size
+        else:
+            return self.chunksize
+
+        if worker_id in self.call_times and self.call_times[worker_id] > 0:
+            mean_call_time = sum(self.call_times.values()) / len(self.call_times)
+            speedup = mean_call_time / self.call_times[worker_id]
+            size = round(size * min(self.MAX_SPEEDUP, max(self.MIN_SPEEDUP, speedup)))
+
+        return max(self.chunksize, size)
+
+    def next_range(self, worker_id, seq, report=None):
+        """
+        Returns the next (start, end) range for a worker, or None if all the
+        calls were handed out. Retried requests, with the same seq, get the
+        same range again, so a range is never lost on a request timeout
+        """
+        if worker_id in self.last_responses:
+            last_seq, last_range = self.last_responses[worker_id]
+            if last_seq == seq:
+                return last_range
+
+        if report:
+            self._report(worker_id, *report)
+
+        call_range = None
+        if self.next_call < self.total_calls:
+            range_start = self.next_call
+            range_end = min(range_start + self._range_size(worker_id), self.total_calls)
+            self.next_call = range_end
+            call_range = (range_start, range_end)
+
+        self.last_responses[worker_id] = (seq, call_range)
+
+        return call_range
+
+    @property
+    def finished(self):
+        """
+        True once all the calls were handed out, and all the workers
+        that asked for a range were told that there are no more ranges
+        """
+        return self.next_call >= self.total_calls and \
+            all(call_range is None for _, call_range in self.last_responses.values())
 
 
 @proxy.route('/get-range/<jobkey>/<total_calls>/<chunksize>', methods=['GET'])
 def get_range(jobkey, total_calls, chunksize):
     global JOB_INDEXES
 
-    range_start = 0 if jobkey not in JOB_INDEXES else JOB_INDEXES[jobkey]
-    range_end = min(range_start + int(chunksize), int(total_calls))
-    JOB_INDEXES[jobkey] = range_end
+    with RANGES_LOCK:
+        range_start = 0 if jobkey not in JOB_INDEXES else JOB_INDEXES[jobkey]
+        range_end = min(range_start + int(chunksize), int(total_calls))
+        JOB_INDEXES[jobkey] = range_end
 
     range = "-1" if range_start == int(total_calls) else f'{range_start}-{range_end}'
     remote_host = flask.request.remote_addr
@@ -57,6 +152,35 @@ def get_range(jobkey, total_calls, chunksize):
     return range
 
 
+@proxy.route('/next-range/<jobkey>', methods=['POST'])
+def next_range(jobkey):
+    """
+    Returns the next range of calls of a job. Pods send in the same request
+    the number of calls and the duration of their previous range
+    """
+    req = flask.request.get_json()
+
+    with RANGES_LOCK:
+        if jobkey in FINISHED_JOBS:
+            call_range = None
+        else:
+            if jobkey not in JOB_RANGES:
+                JOB_RANGES[jobkey] = JobRanges(
+                    req['total_calls'], req['chunksize'],
+                    req['workers'], req['policy']
+                )
+            call_range = JOB_RANGES[jobkey].next_range(req['worker_id'], req['seq'], req.get('report'))
+            if JOB_RANGES[jobkey].finished:
+                del JOB_RANGES[jobkey]
+                FINISHED_JOBS[jobkey] = None
+                if len(FINISHED_JOBS) > FINISHED_JOBS_SIZE:
+                    FINISHED_JOBS.popitem(last=False)
+
+    proxy.logger.info(f'Sending range "{call_range}" to worker {req["worker_id"]}')
+
+    return flask.jsonify({'range': call_range})
+
+
 def run_master_server():
     # Start Redis Server in the background
     # logger.info("Starting redis server in Master Pod")
@@ -93,30 +217,43 @@ def run_job_k8s(payload):
     data_byte_ranges = payload['data_byte_ranges']
 
     master_ip = os.environ['MASTER_POD_IP']
+    url = f'http://{master_ip}:{config.MASTER_PORT}/next-range/{job_key}'
+    request = {
+        'total_calls': total_calls,
+        'chunksize': chunksize,
+        'workers': payload.get('total_workers', 1),
+        'policy': payload.get('range_scheduling', 'static'),
+        'worker_id': os.environ['__LITHOPS_ACTIVATION_ID'],
+        'seq': 0,
+        'report': None
+    }
 
-    job_finished = False
-    while not job_finished:
+    while True:
         call_ids_range = None
+        retry_wait = 0.1
 
         while call_ids_range is None:
             try:
-                server = f'http://{master_ip}:{config.MASTER_PORT}'
-                url = f'{server}/get-range/{job_key}/{total_calls}/{chunksize}'
-                res = requests.get(url, timeout=0.1)
-                call_ids_range = res.text  # for example: 0-5
+                res = requests.post(url, json=request, timeout=(1, 30))
+                res.raise_for_status()
+                call_ids_range = res.json()['range'] or -1
             except Exception:
-                time.sleep(0.1)
+                time.sleep(retry_wait)
+                retry_wait = min(retry_wait * 2, 2)
 
         logger.info(f"Received range: {call_ids_range}")
-        if call_ids_range == "-1":
-            job_finished = True
-            continue
+        if call_ids_range == -1:
+            break
 
-        start, end = map(int, call_ids_range.split('-'))
+        start, end = call_ids_range
         dbr = [data_byte_ranges[int(call_id)] for call_id in call_ids[start:end]]
         payload['call_ids'] = call_ids[start:end]
         payload['data_byte_ranges'] = dbr
+
+        range_start_tstamp = time.time()
         function_handler(payload)
+        request['report'] = (end - start, time.time() - range_start_tstamp)
+        request['seq'] += 1
 
     logger.info("Finishing kubernetes execution")
 
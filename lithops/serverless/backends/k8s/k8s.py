@@ -639,6 +639,9 @@ class KubernetesBackend:
 
             activation_id = f'lithops-{job_key.lower()}'
 
+            job_payload['total_workers'] = total_workers
+            job_payload['range_scheduling'] = self.k8s_config.get('range_scheduling', 'static')
+
             job_res = yaml.safe_load(config.JOB_DEFAULT)
             job_res['metadata']['name'] = activation_id
             job_res['metadata']['namespace'] = self.namespace
@@ -70,6 +70,7 @@ app = flask.Flask(__name__)
 
 MAX_INSTANCE_CREATE_RETRIES = 2
 JOB_MONITOR_CHECK_INTERVAL = 1
+TASK_ENQUEUE_BATCH_SIZE = 1000
 
 redis_client = None
 budget_keeper = None
@@ -427,13 +428,15 @@ def cancel_job_process(job_key_list):
 
         tmp_queue = []
         while redis_client.llen(queue_name) > 0:
-            task_payload_json = redis_client.rpop(queue_name)
-            task_payload = json.loads(task_payload_json)
-            if task_payload['job_key'] != job_key:
-                tmp_queue.append(task_payload_json)
+            task_record = redis_client.rpop(queue_name)
+            task_job_key, call_id, data_byte_range = json.loads(task_record)
+            if task_job_key != job_key:
+                tmp_queue.append(task_record)
 
-        for task_payload_json in tmp_queue:
-            redis_client.lpush(queue_name, task_payload_json)
+        for task_record in tmp_queue:
+            redis_client.lpush(queue_name, task_record)
+
+        redis_client.delete(f"jobpayload:{job_key}")
 
         def stop_task(worker):
             worker_data = redis_client.hgetall(worker)
@@ -496,10 +499,20 @@ def list_jobs():
 def handle_job(job_payload, queue_name):
     """
     Process responsible to put the job in redis and all the
-    individual tasks in a work queue
+    individual tasks in a work queue. The job payload is stored
+    once under its own key, out of the job hash listed by the monitor,
+    and each task record only carries the job key, the call id and
+    its data byte range
     """
     job_key = job_payload['job_key']
+    call_ids = job_payload['call_ids']
+    dbr = job_payload['data_byte_ranges']
+
+    job_data = copy.copy(job_payload)
+    del job_data['call_ids']
+    del job_data['data_byte_ranges']
 
+    redis_client.set(f"jobpayload:{job_key}", json.dumps(job_data))
     redis_client.hset(f"job:{job_key}", mapping={
         'job_key': job_key,
         'status': JobStatus.SUBMITTED.value,
@@ -508,16 +521,16 @@ def handle_job(job_payload, queue_name):
         'worker_type': job_payload.get('worker_instance_type', 'VM'),
         'runtime_name': job_payload['runtime_name'],
         'exec_mode': job_payload['config']['standalone']['exec_mode'],
-        'total_tasks': len(job_payload['call_ids']),
+        'total_tasks': len(call_ids),
         'queue_name': queue_name
     })
 
-    dbr = job_payload['data_byte_ranges']
-    for call_id in job_payload['call_ids']:
-        task_payload = copy.deepcopy(job_payload)
-        task_payload['call_ids'] = [call_id]
-        task_payload['data_byte_ranges'] = [dbr[int(call_id)]]
-        redis_client.lpush(queue_name, json.dumps(task_payload))
+    tasks = [json.dumps([job_key, call_id, dbr[int(call_id)]]) for call_id in call_ids]
+
+    pipe = redis_client.pipeline(transaction=False)
+    for i in range(0, len(tasks), TASK_ENQUEUE_BATCH_SIZE):
+        pipe.lpush(queue_name, *tasks[i:i + TASK_ENQUEUE_BATCH_SIZE])
+    pipe.execute()
 
     logger.debug(f"Job {job_key} correctly submitted to work queue '{queue_name}'")
 
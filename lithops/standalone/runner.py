@@ -21,6 +21,7 @@ import logging
 import uuid
 
 from lithops.worker import function_handler
+from lithops.worker.utils import preload_function
 from lithops.constants import (
     RN_LOG_FILE,
     LOGGER_FORMAT
@@ -31,12 +32,7 @@ logging.basicConfig(stream=log_file_stream, level=logging.INFO, format=LOGGER_FO
 logger = logging.getLogger('lithops.standalone.runner')
 
 
-def run_job(backend, task_filename):
-    logger.info(f'Got {task_filename} job file')
-
-    with open(task_filename, 'rb') as jf:
-        task_payload = json.load(jf)
-
+def run_task(backend, task_payload):
     executor_id = task_payload['executor_id']
     job_id = task_payload['job_id']
     call_id = task_payload['call_ids'][0]
@@ -53,11 +49,54 @@ def run_job(backend, task_filename):
     logger.info(f'ExecutorID {executor_id} | JobID {job_id} | CallID {call_id} - Execution Finished')
 
 
+def run_job(backend, task_filename):
+    logger.info(f'Got {task_filename} job file')
+
+    with open(task_filename, 'rb') as jf:
+        task_payload = json.load(jf)
+
+    run_task(backend, task_payload)
+
+
+def run_worker(backend):
+    """
+    Long-lived task runner. Receives task filenames through stdin, one per
+    line, and writes the call id to stdout once each task is finished
+    """
+    pipe_out = os.fdopen(os.dup(sys.__stdout__.fileno()), 'w')
+    os.dup2(log_file_stream.fileno(), sys.__stdout__.fileno())
+    os.dup2(log_file_stream.fileno(), sys.__stderr__.fileno())
+
+    loaded_functions = set()
+
+    while True:
+        task_filename = sys.stdin.readline().strip()
+        if not task_filename:
+            break
+
+        logger.info(f'Got {task_filename} job file')
+        with open(task_filename, 'rb') as jf:
+            task_payload = json.load(jf)
+
+        if task_payload['func_key'] not in loaded_functions:
+            preload_function(task_payload)
+            loaded_functions.add(task_payload['func_key'])
+
+        run_task(backend, task_payload)
+
+        pipe_out.write(task_payload['call_ids'][0] + '\n')
+        pipe_out.flush()
+
+    logger.info('Standalone task runner finished')
+
+
 if __name__ == "__main__":
     sys.stdout = log_file_stream
     sys.stderr = log_file_stream
     logger.info('Starting Standalone task runner')
     backend = sys.argv[1]
-    task_filename = sys.argv[2]
-    run_job(backend, task_filename)
+    if sys.argv[2] == 'run_worker':
+        run_worker(backend)
+    else:
+        run_job(backend, sys.argv[2])
     log_file_stream.close()
@@ -23,7 +23,8 @@ import logging
 import signal
 import subprocess as sp
 from pathlib import Path
-from threading import Thread
+from collections import OrderedDict
+from threading import Thread, Lock
 from functools import partial
 from gevent.pywsgi import WSGIServer
 from concurrent.futures import ThreadPoolExecutor
@@ -61,6 +62,10 @@ job_processes = {}
 worker_threads = {}
 canceled = []
 
+JOB_PAYLOAD_CACHE = OrderedDict()
+JOB_PAYLOAD_CACHE_SIZE = 16
+JOB_PAYLOAD_LOCK = Lock()
+
 
 @app.route('/ping', methods=['GET'])
 def ping():
@@ -141,36 +146,106 @@ def notify_task_done(job_key, call_id):
         done_tasks = int(redis_client.rpush(f"tasksdone:{job_key}", call_id))
         if int(redis_client.hget(f"job:{job_key}", 'total_tasks')) == done_tasks:
             redis_client.hset(f"job:{job_key}", 'status', JobStatus.DONE.value)
+            redis_client.delete(f"jobpayload:{job_key}")
     except Exception as e:
         logger.error(e)
 
 
-def redis_queue_consumer(pid, work_queue_name, exec_mode, backend):
+def start_task_runner(backend):
+    """
+    Starts a long-lived runner process that receives the tasks through stdin
+    """
+    cmd = ["python3", f"{SA_INSTALL_DIR}/runner.py", backend, 'run_worker']
+    # The runner keeps its own copy of the log file
+    with open(RN_LOG_FILE, 'a') as log:
+        process = sp.Popen(
+            cmd, stdin=sp.PIPE, stdout=sp.PIPE, stderr=log,
+            universal_newlines=True, bufsize=1, start_new_session=True
+        )
+    logger.debug(f'Started task runner process {process.pid}')
+    return process
+
+
+def run_task_in_runner(runner, task_filename, call_id):
+    """
+    Sends a task to a long-lived runner process and waits until it finishes.
+    Returns False if the runner died while running the task
+    """
+    try:
+        runner.stdin.write(task_filename + '\n')
+        runner.stdin.flush()
+        response = runner.stdout.readline()
+    except (BrokenPipeError, OSError):
+        response = ''
+
+    if response.strip() != call_id:
+        runner.wait()
+        for pipe in (runner.stdin, runner.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        return False
+
+    return True
+
+
+def get_task_payload(task_record):
+    """
+    Rebuilds the full task payload from a compact task record and
+    the job payload stored by the master under its own key
+    """
+    job_key, call_id, data_byte_range = json.loads(task_record)
+
+    with JOB_PAYLOAD_LOCK:
+        job_payload = JOB_PAYLOAD_CACHE.get(job_key)
+        if job_payload is not None:
+            JOB_PAYLOAD_CACHE.move_to_end(job_key)
+
+    if job_payload is None:
+        job_payload_json = redis_client.get(f"jobpayload:{job_key}")
+        if job_payload_json is None:
+            raise Exception(f'Job {job_key} not found, it was canceled or it already finished')
+        job_payload = json.loads(job_payload_json)
+        with JOB_PAYLOAD_LOCK:
+            JOB_PAYLOAD_CACHE[job_key] = job_payload
+            if len(JOB_PAYLOAD_CACHE) > JOB_PAYLOAD_CACHE_SIZE:
+                JOB_PAYLOAD_CACHE.popitem(last=False)
+
+    task_payload = dict(job_payload)
+    task_payload['call_ids'] = [call_id]
+    task_payload['data_byte_ranges'] = [data_byte_range]
+
+    return task_payload
+
+
+def redis_queue_consumer(pid, work_queue_name, exec_mode, backend, warm_runners=False):
     global worker_threads
 
     worker_threads[pid]['status'] = WorkerStatus.IDLE.value
+    runner = None
 
     logger.info(f"Redis consumer process {pid} started")
 
     while True:
         if exec_mode == StandaloneMode.CREATE.value:
-            task_payload_str = redis_client.rpop(work_queue_name)
-            if task_payload_str is None:
+            task_record = redis_client.rpop(work_queue_name)
+            if task_record is None:
                 break
         else:
-            key, task_payload_str = redis_client.brpop(work_queue_name)
+            key, task_record = redis_client.brpop(work_queue_name)
 
         worker_threads[pid]['status'] = WorkerStatus.BUSY.value
 
-        task_payload = json.loads(task_payload_str)
+        try:
+            task_payload = get_task_payload(task_record)
 
-        executor_id = task_payload['executor_id']
-        job_id = task_payload['job_id']
-        job_key = task_payload['job_key']
-        call_id = task_payload['call_ids'][0]
-        job_key_call_id = f'{job_key}-{call_id}'
+            executor_id = task_payload['executor_id']
+            job_id = task_payload['job_id']
+            job_key = task_payload['job_key']
+            call_id = task_payload['call_ids'][0]
+            job_key_call_id = f'{job_key}-{call_id}'
 
-        try:
             logger.debug(f'ExecutorID {executor_id} | JobID {job_id} - Running '
                          f'CallID {call_id} in the local worker (consumer {pid})')
             notify_task_start(job_key, call_id)
@@ -183,11 +258,20 @@ def redis_queue_consumer(pid, work_queue_name, exec_mode, backend):
             with open(task_filename, 'w') as jl:
                 json.dump(task_payload, jl, default=str)
 
-            cmd = ["python3", f"{SA_INSTALL_DIR}/runner.py", backend, task_filename]
-            log = open(RN_LOG_FILE, 'a')
-            process = sp.Popen(cmd, stdout=log, stderr=log, start_new_session=True)
-            job_processes[job_key_call_id] = process
-            process.communicate()  # blocks until the process finishes
+            if warm_runners:
+                if runner is None:
+                    runner = start_task_runner(backend)
+                job_processes[job_key_call_id] = runner
+                if not run_task_in_runner(runner, task_filename, call_id):
+                    logger.debug(f'Task runner process {runner.pid} finished with '
+                                 f'return code {runner.returncode}')
+                    runner = None
+            else:
+                cmd = ["python3", f"{SA_INSTALL_DIR}/runner.py", backend, task_filename]
+                with open(RN_LOG_FILE, 'a') as log:
+                    process = sp.Popen(cmd, stdout=log, stderr=log, start_new_session=True)
+                job_processes[job_key_call_id] = process
+                process.communicate()  # blocks until the process finishes
             del job_processes[job_key_call_id]
 
             if os.path.exists(task_filename):
@@ -207,6 +291,11 @@ def redis_queue_consumer(pid, work_queue_name, exec_mode, backend):
 
         worker_threads[pid]['status'] = WorkerStatus.IDLE.value
 
+    if runner is not None:
+        runner.stdin.close()
+        runner.wait()
+        runner.stdout.close()
+
     logger.info(f"Redis consumer process {pid} finished")
 
 
@@ -263,7 +352,8 @@ def run_worker():
                 redis_queue_consumer, i,
                 worker_data['work_queue_name'],
                 standalone_config['exec_mode'],
-                standalone_config['backend']
+                standalone_config['backend'],
+                standalone_config.get('warm_runners', False)
             )
             redis_queue_consumer_futures.append(future)
             worker_threads[i]['future'] = future
@@ -1,7 +1,9 @@
 from .storage import InternalStorage
 from .storage import Storage
+from .storage import get_internal_storage
 
 __all__ = [
     'InternalStorage',
-    'Storage'
+    'Storage',
+    'get_internal_storage'
 ]
@@ -58,7 +58,7 @@ class IBMCloudObjectStorageBackend:
             access_key_id = self.config['access_key_id']
             secret_access_key = self.config['secret_access_key']
             client_config = ibm_botocore.client.Config(
-                max_pool_connections=128,
+                max_pool_connections=self.config.get('max_pool_connections', 128),
                 user_agent_extra=self.user_agent,
                 connect_timeout=CONN_READ_TIMEOUT,
                 read_timeout=CONN_READ_TIMEOUT,
@@ -77,7 +77,7 @@ class IBMCloudObjectStorageBackend:
             logger.debug("Using IBM API key for COS authentication")
             client_config = ibm_botocore.client.Config(
                 signature_version='oauth',
-                max_pool_connections=128,
+                max_pool_connections=self.config.get('max_pool_connections', 128),
                 user_agent_extra=self.user_agent,
                 connect_timeout=CONN_READ_TIMEOUT,
                 read_timeout=CONN_READ_TIMEOUT,
@@ -330,18 +330,20 @@ class IBMCloudObjectStorageBackend:
             else:
                 raise e
 
-    def list_keys(self, bucket_name, prefix=None):
+    def list_keys(self, bucket_name, prefix=None, start_after=None):
         """
         Return a list of keys for the given prefix.
         :param bucket_name: Name of the bucket.
         :param prefix: Prefix to filter object names.
+        :param start_after: Only return the keys that come after this key.
         :return: List of keys in bucket that match the given prefix.
         :rtype: list of str
         """
         try:
             prefix = '' if prefix is None else prefix
+            extra_args = {'StartAfter': start_after} if start_after else {}
             paginator = self.cos_client.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+            page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix, **extra_args)
 
             key_list = []
             for page in page_iterator:
@@ -67,18 +67,18 @@ class InfinispanHotrodBackend:
         Put an object in Infinispan. Override the object if the key already exists.
         :param key: key of the object.
         :param data: data of the object
-        :type data: str/bytes/io.BytesIO
+        :type data: str/bytes/file-like object
         :return: None
         """
         keyEncoded = self.__key(key)
         keyVect = Infinispan.Util.fromString(keyEncoded)
         if isinstance(data, str):
             dataVec = Infinispan.Util.fromString(data)
-        elif isinstance(data, io.BytesIO):
+        elif hasattr(data, 'read'):
             r = data.read()
             dataVec = Infinispan.UCharVector(r)
-        elif isinstance(data, bytes):
-            dataVec = Infinispan.UCharVector(data)
+        elif isinstance(data, (bytes, bytearray)):
+            dataVec = Infinispan.UCharVector(bytes(data))
         resp = self.caches[bucket_name].put(keyVect, dataVec)
         logger.debug(resp)
 
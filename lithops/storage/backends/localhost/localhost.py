@@ -19,6 +19,8 @@ import io
 import glob
 import shutil
 import logging
+from datetime import datetime, timezone
+from email.utils import formatdate
 from lithops.storage.utils import StorageNoSuchKeyError
 from lithops.constants import LITHOPS_TEMP_DIR
 from lithops.constants import STORAGE_CLI_MSG
@@ -164,8 +166,10 @@ class LocalhostStorageBackend:
         file_path = os.path.join(LITHOPS_TEMP_DIR, bucket_name, key)
         if os.path.isfile(file_path):
             # Imitate the COS/S3 response
+            stat = os.stat(file_path)
             return {
-                'content-length': str(os.stat(file_path).st_size)
+                'content-length': str(stat.st_size),
+                'last-modified': formatdate(stat.st_mtime, usegmt=True)
             }
 
         raise StorageNoSuchKeyError(os.path.join(LITHOPS_TEMP_DIR, bucket_name), key)
@@ -230,16 +234,18 @@ class LocalhostStorageBackend:
 
         for key in self.list_keys(bucket_name, prefix):
             file_name = os.path.join(base_dir, key)
-            size = os.stat(file_name).st_size
-            obj_list.append({'Key': key, 'Size': size})
+            stat = os.stat(file_name)
+            last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+            obj_list.append({'Key': key, 'Size': stat.st_size, 'LastModified': last_modified})
 
         return obj_list
 
-    def list_keys(self, bucket_name, prefix=None):
+    def list_keys(self, bucket_name, prefix=None, start_after=None):
         """
         Return a list of keys for the given prefix.
         :param bucket_name: Name of the bucket.
         :param prefix: Prefix to filter object names.
+        :param start_after: Only return the keys that come after this key.
         :return: List of keys in bucket that match the given prefix.
         :rtype: list of str
         """
@@ -262,4 +268,7 @@ class LocalhostStorageBackend:
                 if os.path.isfile(file_name):
                     key_list.append(file_name.replace(base_dir, '').replace('\\', '/'))
 
+        if start_after:
+            key_list = [key for key in key_list if key > start_after]
+
         return key_list
@@ -43,7 +43,7 @@ class MinioStorageBackend:
         logger.debug(f"Setting MinIO endpoint to {self.service_endpoint}")
 
         client_config = botocore.client.Config(
-            max_pool_connections=128,
+            max_pool_connections=minio_config.get('max_pool_connections', 128),
             user_agent_extra=user_agent,
             connect_timeout=CONN_READ_TIMEOUT,
             read_timeout=CONN_READ_TIMEOUT,
@@ -278,18 +278,20 @@ class MinioStorageBackend:
             else:
                 raise e
 
-    def list_keys(self, bucket_name, prefix=None):
+    def list_keys(self, bucket_name, prefix=None, start_after=None):
         """
         Return a list of keys for the given prefix.
         :param bucket_name: Name of the bucket.
         :param prefix: Prefix to filter object names.
+        :param start_after: Only return the keys that come after this key.
         :return: List of keys in bucket that match the given prefix.
         :rtype: list of str
         """
         try:
             prefix = '' if prefix is None else prefix
+            extra_args = {'StartAfter': start_after} if start_after else {}
             paginator = self.s3_client.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+            page_iterator = paginator.paginate(Bucket=bucket_name, Prefix=prefix, **extra_args)
 
             key_list = []
             for page in page_iterator:
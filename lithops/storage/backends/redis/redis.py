@@ -51,9 +51,11 @@ class RedisBackend:
         :param bucket_name: bucket name
         :param key: key of the object.
         :param data: data of the object
-        :type data: str/bytes
+        :type data: str/bytes/file-like object
         :return: None
         """
+        if hasattr(data, 'read'):
+            data = data.read()
         if not isinstance(data, (str, bytes, bytearray)):
             raise TypeError(type(data), 'valid types: {}'.format((str, bytes, bytearray)))
 
@@ -52,7 +52,7 @@ class StorageBackend:
 
         self.session = requests.session()
         self.session.headers.update({'X-Auth-Token': self.token})
-        adapter = requests.adapters.HTTPAdapter(pool_maxsize=64, max_retries=3)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=swift_config.get('max_pool_connections', 64), max_retries=3)
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
 
@@ -17,9 +17,13 @@
 
 import os
 import json
+import time
 import logging
+import inspect
 import itertools
 import importlib
+import threading
+import concurrent.futures as cf
 from typing import Optional, List, Union, Tuple, Dict, TextIO, BinaryIO, Any
 
 from lithops.constants import CACHE_DIR, RUNTIMES_PREFIX, JOBS_PREFIX, TEMP_PREFIX
@@ -33,6 +37,59 @@ logger = logging.getLogger(__name__)
 RUNTIME_META_CACHE = {}
 COBJECTS_INDEX = itertools.count()
 
+# InternalStorage instances by storage config, reused to keep the
+# backend clients and their HTTP connections alive
+INTERNAL_STORAGE_CACHE = {}
+INTERNAL_STORAGE_LOCK = threading.Lock()
+
+# Process-wide thread pool for the storage I/O requests of the monitor,
+# wait() and the futures. Backend connection pools are sized above it
+IO_THREADPOOL_SIZE = 64
+IO_EXECUTOR = None
+IO_EXECUTOR_LOCK = threading.Lock()
+
+
+def _reset_after_fork():
+    global IO_EXECUTOR, INTERNAL_STORAGE_LOCK, IO_EXECUTOR_LOCK
+    # The pool threads are not inherited by the child process
+    IO_EXECUTOR = None
+    IO_EXECUTOR_LOCK = threading.Lock()
+    INTERNAL_STORAGE_LOCK = threading.Lock()
+    # The child must not share the connections of the parent's clients
+    INTERNAL_STORAGE_CACHE.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_io_executor():
+    """
+    Returns the process-wide I/O thread pool, creating it on first use
+    """
+    global IO_EXECUTOR
+    with IO_EXECUTOR_LOCK:
+        if IO_EXECUTOR is None:
+            IO_EXECUTOR = cf.ThreadPoolExecutor(
+                max_workers=IO_THREADPOOL_SIZE,
+                thread_name_prefix='lithops-io'
+            )
+    return IO_EXECUTOR
+
+
+def get_internal_storage(storage_config):
+    """
+    Returns an InternalStorage instance for the given storage config, reusing
+    the one already created by this process for the same config
+    """
+    storage_key = json.dumps(storage_config, sort_keys=True, default=str)
+
+    with INTERNAL_STORAGE_LOCK:
+        if storage_key not in INTERNAL_STORAGE_CACHE:
+            INTERNAL_STORAGE_CACHE[storage_key] = InternalStorage(storage_config)
+
+    return INTERNAL_STORAGE_CACHE[storage_key]
+
 
 class Storage:
     """
@@ -233,17 +290,26 @@ class Storage:
 
         return self.storage_handler.list_objects(bucket, prefix, match_pattern)
 
-    def list_keys(self, bucket, prefix=None) -> List[str]:
+    def list_keys(self, bucket, prefix=None, start_after=None) -> List[str]:
         """
         Similar to list_objects(), it returns all of the object keys in a bucket.
         For each object, the list contains only the names of the objects (keys).
 
         :param bucket: Name of the bucket
         :param prefix: Key prefix for filtering
+        :param start_after: Only return the keys that come after this key
 
         :return: List of object keys
         """
-        return self.storage_handler.list_keys(bucket, prefix)
+        if start_after is None:
+            return self.storage_handler.list_keys(bucket, prefix)
+
+        list_keys_params = inspect.signature(self.storage_handler.list_keys).parameters
+        if 'start_after' in list_keys_params:
+            return self.storage_handler.list_keys(bucket, prefix, start_after=start_after)
+
+        keys = self.storage_handler.list_keys(bucket, prefix)
+        return [key for key in keys if key > start_after]
 
     def put_cloudobject(self,
                         body: Union[str,
@@ -351,6 +417,10 @@ class InternalStorage:
 
         self.storage.create_bucket(self.bucket)
 
+        # call statuses received in status batches, by job key
+        self.status_batches = {}
+        self.status_batches_lock = threading.Lock()
+
     def get_client(self):
         """
         Retrieves the underlying storage client.
@@ -358,6 +428,27 @@ class InternalStorage:
         """
         return self.storage.get_client()
 
+    def io_map(self, func, iterable, max_workers=None):
+        """
+        Applies func to every item in the process-wide I/O thread pool.
+        Reraises the first exception raised by func.
+        :param func: function to apply
+        :param iterable: items to process
+        :param max_workers: max number of items processed at the same time
+        :return: list of results, in the order of the items
+        """
+        executor = get_io_executor()
+        slots = threading.BoundedSemaphore(min(max_workers or IO_THREADPOOL_SIZE, IO_THREADPOOL_SIZE))
+
+        futures = []
+        for item in iterable:
+            slots.acquire()
+            future = executor.submit(func, item)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+
+        return [future.result() for future in futures]
+
     def get_storage_config(self):
         """
         Retrieves the configuration of this storage handler.
@@ -400,6 +491,23 @@ class InternalStorage:
         """
         return self.storage.get_object(self.bucket, key)
 
+    def func_exists(self, key, size, max_age=None):
+        """
+        Checks if a serialized function is already in storage.
+        :param key: function key
+        :param size: size of the serialized function
+        :param max_age: seconds since its last upload after which it is not considered
+        :return: True if the function is in storage
+        """
+        try:
+            metadata = self.storage.head_object(self.bucket, key)
+        except utils.StorageNoSuchKeyError:
+            return False
+        if int(metadata['content-length']) != size:
+            return False
+        last_modified = utils.get_last_modified(metadata)
+        return max_age is None or not last_modified or time.time() - last_modified < max_age
+
     def del_data(self, key):
         """
         Deletes data from storage.
@@ -408,14 +516,20 @@ class InternalStorage:
         """
         return self.storage.delete_object(self.bucket, key)
 
-    def get_job_status(self, executor_id):
+    def get_job_status(self, executor_id, job_id=None, start_after=None):
         """
         Get the status of a callset.
         :param executor_id: executor's ID
+        :param job_id: job's ID. If set, only the keys of this job are listed
+        :param start_after: only process the status keys that come after this key
         :return: A list of call IDs that have updated status.
         """
-        callset_prefix = '/'.join([JOBS_PREFIX, executor_id])
-        keys = self.storage.list_keys(self.bucket, callset_prefix)
+        if job_id is None:
+            callset_prefix = '/'.join([JOBS_PREFIX, executor_id])
+        else:
+            job_key = utils.create_job_key(executor_id, job_id)
+            callset_prefix = '/'.join([JOBS_PREFIX, job_key, ''])
+        keys = self.storage.list_keys(self.bucket, callset_prefix, start_after=start_after)
 
         running_keys = [k.split('/')
                         for k in keys if utils.init_key_suffix in k]
@@ -427,32 +541,108 @@ class InternalStorage:
                      for k in keys if utils.status_key_suffix in k]
         done_callids = [tuple(k[0].rsplit("-", 1) + [k[1]]) for k in done_keys]
 
+        batch_keys = [k for k in keys if f'/{utils.status_batch_dir}/' in k]
+        for call_status in self._load_status_batches(batch_keys):
+            call_key = (call_status['executor_id'], call_status['job_id'], call_status['call_id'])
+            running_callids.append((call_key, call_status['activation_id']))
+            if call_status['type'] == '__end__':
+                done_callids.append(call_key)
+
         return set(running_callids), set(done_callids)
 
-    def get_call_status(self, executor_id, job_id, call_id):
+    def _load_status_batches(self, batch_keys):
+        """
+        Downloads the status batches not loaded yet, and caches
+        the call statuses they contain.
+        :param batch_keys: list of status batch keys
+        :return: list of the call statuses in the downloaded batches
+        """
+        call_statuses = []
+
+        for batch_key in sorted(batch_keys):
+            job_key = batch_key.split('/')[1]
+            with self.status_batches_lock:
+                job_batches = self.status_batches.setdefault(job_key, {'loaded': set(), 'statuses': {}})
+                if batch_key in job_batches['loaded']:
+                    continue
+                # Other threads skip the batch while it is downloaded
+                job_batches['loaded'].add(batch_key)
+            try:
+                batch = json.loads(self.storage.get_object(self.bucket, batch_key))
+            except Exception:
+                with self.status_batches_lock:
+                    job_batches['loaded'].discard(batch_key)
+                raise
+            with self.status_batches_lock:
+                for call_id, call_status in batch.items():
+                    cached_status = job_batches['statuses'].get(call_id)
+                    if cached_status and cached_status['type'] == '__end__':
+                        continue
+                    job_batches['statuses'][call_id] = call_status
+                    call_statuses.append(call_status)
+
+        return call_statuses
+
+    def get_call_status(self, executor_id, job_id, call_id, status_batch=False):
         """
         Get status of a call.
         :param executor_id: executor ID of the call
         :param call_id: call ID of the call
+        :param status_batch: the call status can be in a status batch
         :return: A dictionary containing call's status, or None if no updated status
         """
+        job_key = utils.create_job_key(executor_id, job_id)
+        call_status = self._get_batched_call_status(job_key, call_id)
+        if call_status:
+            return call_status
+
         status_key = utils.create_status_key(executor_id, job_id, call_id)
         try:
             data = self.storage.get_object(self.bucket, status_key)
             return json.loads(data.decode('ascii'))
         except utils.StorageNoSuchKeyError:
-            return None
+            pass
+
+        if status_batch:
+            batches_prefix = '/'.join([JOBS_PREFIX, job_key, utils.status_batch_dir, ''])
+            self._load_status_batches(self.storage.list_keys(self.bucket, batches_prefix))
+            return self._get_batched_call_status(job_key, call_id)
+
+        return None
+
+    def evict_status_batches(self, job_key):
+        """
+        Drops the cached status batches of a job, once its calls are done
+        and their statuses have been read, or once it is cleaned.
+        :param job_key: job key
+        """
+        with self.status_batches_lock:
+            self.status_batches.pop(job_key, None)
+
+    def _get_batched_call_status(self, job_key, call_id):
+        """
+        Get the finish status of a call from the cached status batches.
+        """
+        with self.status_batches_lock:
+            if job_key not in self.status_batches:
+                return None
+            call_status = self.status_batches[job_key]['statuses'].get(call_id)
+        if call_status and call_status['type'] == '__end__':
+            return call_status
+        return None
 
-    def get_call_output(self, executor_id, job_id, call_id):
+    def get_call_output(self, executor_id, job_id, call_id, stream=False, attempt=0):
         """
         Get the output of a call.
         :param executor_id: executor ID of the call
         :param call_id: call ID of the call
+        :param stream: return a stream of the output instead of its content
+        :param attempt: attempt of the call that wrote the output
         :return: Output of the call.
         """
-        output_key = utils.create_output_key(executor_id, job_id, call_id)
+        output_key = utils.create_output_key(executor_id, job_id, call_id, attempt)
         try:
-            return self.storage.get_object(self.bucket, output_key)
+            return self.storage.get_object(self.bucket, output_key, stream=stream)
         except utils.StorageNoSuchKeyError:
             return None
 
@@ -18,7 +18,11 @@
 import os
 import time
 import logging
-from lithops.constants import JOBS_PREFIX
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from lithops.utils import iter_records
+from lithops.constants import JOBS_PREFIX, FUNCTIONS_PREFIX, CONFIGS_PREFIX, \
+    PARTITIONS_PREFIX
 
 
 logger = logging.getLogger(__name__)
@@ -28,8 +32,10 @@ func_key_suffix = "func.pickle"
 agg_data_key_suffix = "aggdata.pickle"
 data_key_suffix = "data.pickle"
 output_key_suffix = "output.pickle"
+shuffle_key_suffix = "shuffle.pickle"
 status_key_suffix = "status.json"
 init_key_suffix = ".init"
+status_batch_dir = "batches"
 
 
 class StorageNoSuchKeyError(Exception):
@@ -44,7 +50,30 @@ class StorageConfigMismatchError(Exception):
         super(StorageConfigMismatchError, self).__init__(msg)
 
 
-class CloudObject:
+class CloudObjectStream:
+    """
+    Iteration over the records of the data_stream of a partition,
+    which is set by the worker before calling the function
+    """
+    def iter_records(self, batch_size=1000, newline=None):
+        """
+        Yields lists of up to batch_size records of the partition,
+        without the newline characters
+        :param newline: record separator. Default the newline of the partition, or '\\n'
+        """
+        newline = newline or getattr(self, 'newline', None) or '\n'
+        return iter_records(self.data_stream, newline.encode(), batch_size)
+
+    def iter_lines(self, newline=None):
+        """
+        Yields the lines of the partition one by one, without the newline characters
+        :param newline: line separator. Default the newline of the partition, or '\\n'
+        """
+        newline = newline or getattr(self, 'newline', None) or '\n'
+        return iter_records(self.data_stream, newline.encode())
+
+
+class CloudObject(CloudObjectStream):
     def __init__(self, backend, bucket, key):
         self.backend = backend
         self.bucket = bucket
@@ -55,7 +84,33 @@ class CloudObject:
         return f'<CloudObject at {path}>'
 
 
-class CloudObjectUrl:
+class CloudObjectBundle:
+    """
+    A group of small CloudObjects processed by a single function call.
+    Iterating over the bundle yields its objects, each one with its own
+    data_stream once the bundle is loaded in the worker
+    """
+    def __init__(self, backend, bucket, objects):
+        self.backend = backend
+        self.bucket = bucket
+        self.objects = objects
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    @property
+    def chunk_size(self):
+        return sum(obj.chunk_size for obj in self.objects)
+
+    def __str__(self):
+        path = f'{self.backend}://{self.bucket}'
+        return f'<CloudObjectBundle of {len(self.objects)} objects at {path}>'
+
+
+class CloudObjectUrl(CloudObjectStream):
     def __init__(self, url):
         self.url = url
 
@@ -63,7 +118,7 @@ class CloudObjectUrl:
         return f'<CloudObject at {self.url}>'
 
 
-class CloudObjectLocal:
+class CloudObjectLocal(CloudObjectStream):
     def __init__(self, path):
         self.path = path
         self.bucket = os.path.dirname(path)
@@ -103,14 +158,39 @@ def create_job_key(executor_id, job_id):
     return '-'.join([executor_id, job_id])
 
 
-def create_func_key(executor_id, function_hash):
+def create_func_key(function_hash):
     """
-    Create function key
-    :param prefix: prefix
-    :param executor_id: callset's ID
+    Create function key. Function keys only depend on the content
+    of the function and its modules, so they are shared by all the executors
+    :param function_hash: hash of the serialized function and modules
     :return: function key
     """
-    return '/'.join([JOBS_PREFIX, executor_id, f'{function_hash}.{func_key_suffix}'])
+    return '/'.join([FUNCTIONS_PREFIX, f'{function_hash}.{func_key_suffix}'])
+
+
+def create_config_key(executor_id, config_hash):
+    """
+    Create config key. Config keys are under the prefix of the executor,
+    so that they are deleted with its functions when the executor is cleaned
+    :param executor_id: Executor's ID
+    :param config_hash: hash of the serialized config
+    :return: config key
+    """
+    return '/'.join([CONFIGS_PREFIX, executor_id, f'{config_hash}.json'])
+
+
+def create_partition_index_key(etag, obj_size, chunk_size, newline):
+    """
+    Create partition index key. Partition indexes only depend on the content
+    of the object, so they are shared by all the objects with the same ETag
+    :param etag: ETag of the object
+    :param obj_size: size of the object
+    :param chunk_size: size of the chunks the object is split in
+    :param newline: newline character of the records
+    :return: partition index key
+    """
+    etag = etag.strip('"')
+    return '/'.join([PARTITIONS_PREFIX, f'{etag}.{obj_size}.{chunk_size}.{newline.encode().hex()}.json'])
 
 
 def create_data_key(executor_id, job_id):
@@ -125,19 +205,39 @@ def create_data_key(executor_id, job_id):
     return '/'.join([JOBS_PREFIX, job_key, agg_data_key_suffix])
 
 
-def create_output_key(executor_id, job_id, call_id):
+def create_output_key(executor_id, job_id, call_id, attempt=0):
     """
     Create output key
     :param prefix: prefix
     :param executor_id: Executor's ID
     :param job_id: Job's ID
     :param call_id: call's ID
+    :param attempt: attempt of the call, greater than 0 for speculative attempts
     :return: output key
     """
     job_key = create_job_key(executor_id, job_id)
+    if attempt:
+        name, ext = output_key_suffix.split('.')
+        return '/'.join([JOBS_PREFIX, job_key, call_id, f'{name}.{attempt}.{ext}'])
     return '/'.join([JOBS_PREFIX, job_key, call_id, output_key_suffix])
 
 
+def create_shuffle_key(executor_id, job_id, call_id, attempt=0):
+    """
+    Create shuffle key, of the object with the partitions of a shuffle map call
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param call_id: call's ID
+    :param attempt: attempt of the call, greater than 0 for speculative attempts
+    :return: shuffle key
+    """
+    job_key = create_job_key(executor_id, job_id)
+    if attempt:
+        name, ext = shuffle_key_suffix.split('.')
+        return '/'.join([JOBS_PREFIX, job_key, call_id, f'{name}.{attempt}.{ext}'])
+    return '/'.join([JOBS_PREFIX, job_key, call_id, shuffle_key_suffix])
+
+
 def create_status_key(executor_id, job_id, call_id):
     """
     Create status key
@@ -164,6 +264,34 @@ def create_init_key(executor_id, job_id, call_id, act_id):
     return '/'.join([JOBS_PREFIX, job_key, call_id, f'{act_id}{init_key_suffix}'])
 
 
+def create_status_batch_key(executor_id, job_id, worker_id):
+    """
+    Create status batch key
+    :param executor_id: Executor's ID
+    :param job_id: Job's ID
+    :param worker_id: ID of the worker process that runs the calls
+    :return: status batch key
+    """
+    job_key = create_job_key(executor_id, job_id)
+    return '/'.join([JOBS_PREFIX, job_key, status_batch_dir, f'{worker_id}.json'])
+
+
+def get_last_modified(metadata):
+    """
+    Returns the last modification time of an object, from its head or list
+    metadata, as a timestamp, or None if the storage backend does not provide it
+    """
+    last_modified = metadata.get('LastModified') or metadata.get('last-modified') \
+        or metadata.get('last_modified')
+    if isinstance(last_modified, (int, float)):
+        return float(last_modified)
+    if isinstance(last_modified, str):
+        last_modified = parsedate_to_datetime(last_modified)
+    if isinstance(last_modified, datetime):
+        return last_modified.timestamp()
+    return None
+
+
 def get_storage_path(storage_config):
     backend = storage_config['backend']
     bucket = storage_config[backend]['storage_bucket']
@@ -11,10 +11,26 @@ def concat(lst):
     return " ".join(lst)
 
 
+def sleep_function(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
 def hello_world(param):
     return "Hello World!"
 
 
+def mutate_buffer_function(buffer):
+    buffer[-1] = 2
+    return len(buffer), sum(buffer[-2:])
+
+
+def large_buffer_function(size):
+    buffer = bytearray(size)
+    buffer[-1] = 1
+    return buffer
+
+
 def lithops_inside_lithops_map_function(x):
     def _func(x):
         return x
@@ -98,6 +114,25 @@ def my_map_function_obj(obj, id):
     return counter
 
 
+def my_map_function_bundle(obj):
+    """returns a dictionary of {word:number of appearances} of all the objects of a bundle"""
+    counter = {}
+    for bundle_obj in obj:
+        for word in bundle_obj.data_stream.read().split():
+            counter[word] = counter.get(word, 0) + 1
+    return counter
+
+
+def my_map_function_records(obj):
+    """returns a dictionary of {word:number of appearances} reading the object by batches of lines"""
+    counter = {}
+    for lines in obj.iter_records(batch_size=100):
+        for line in lines:
+            for word in line.split():
+                counter[word] = counter.get(word, 0) + 1
+    return counter
+
+
 def my_map_function_url(id, obj):
     print('I am processing the object from {}'.format(obj.url))
     print('Function id: {}'.format(id))
@@ -138,6 +173,19 @@ def my_reduce_function(results):
     return final_result
 
 
+def word_pairs_map_function(text):
+    """emits a (word, 1) pair for each word of the text"""
+    return [(word, 1) for word in text.split()]
+
+
+def word_count_reduce_function(results):
+    """counts the words of the (word, count) pairs of a shuffle partition"""
+    counter = {}
+    for word, count in results:
+        counter[word] = counter.get(word, 0) + count
+    return counter
+
+
 def my_cloudobject_put(obj, storage):
     """uploads to storage pickled dict of type: {word:number of appearances} """
     counter = my_map_function_obj(obj, 0)
@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip('kubernetes')
+
+from lithops.serverless.backends.k8s import entry_point  # noqa: E402
+from lithops.serverless.backends.k8s.entry_point import JobRanges  # noqa: E402
+
+
+def get_ranges(job_ranges, worker_id='w0'):
+    ranges = []
+    seq = 0
+    while True:
+        call_range = job_ranges.next_range(worker_id, seq)
+        if call_range is None:
+            return ranges
+        ranges.append(call_range)
+        seq += 1
+
+
+def test_static_ranges():
+    ranges = get_ranges(JobRanges(10, 3, 2, 'static'))
+    assert ranges == [(0, 3), (3, 6), (6, 9), (9, 10)]
+
+
+def test_guided_ranges():
+    # Each range has 1/workers of the remaining calls, and at least chunksize calls
+    ranges = get_ranges(JobRanges(100, 2, 4, 'guided'))
+    assert ranges[:4] == [(0, 25), (25, 44), (44, 58), (58, 69)]
+    assert all(end - start >= 2 for start, end in ranges[:-1])
+    assert ranges[-1][1] == 100
+
+
+def test_factoring_ranges():
+    # Each batch of one range per worker covers half of the remaining calls
+    ranges = get_ranges(JobRanges(100, 1, 2, 'factoring'))
+    assert ranges[:6] == [(0, 25), (25, 50), (50, 63), (63, 76), (76, 82), (82, 88)]
+    assert ranges[-1][1] == 100
+
+
+def test_range_speed_clamp():
+    job_ranges = JobRanges(3000, 1, 3, 'guided')
+    assert job_ranges.next_range('a', 0) == (0, 1000)
+    assert job_ranges.next_range('b', 0) == (1000, 1667)
+    assert job_ranges.next_range('c', 0) == (1667, 2112)
+    assert job_ranges.next_range('a', 1, (10, 10)) == (2112, 2408)
+    assert job_ranges.next_range('b', 1, (10, 10)) == (2408, 2606)
+
+    # A pod 34 times slower than the mean gets half of its guided range
+    assert job_ranges.next_range('c', 1, (10, 1000)) == (2606, 2672)
+    # A pod 34 times faster than the mean gets twice its guided range
+    assert job_ranges.next_range('a', 2, (10, 10)) == (2672, 2892)
+
+
+def test_repeated_seq():
+    job_ranges = JobRanges(10, 2, 2, 'static')
+    assert job_ranges.next_range('a', 0) == (0, 2)
+    # A retried request gets the same range, and the report is not counted twice
+    assert job_ranges.next_range('a', 1, (2, 1)) == (2, 4)
+    assert job_ranges.next_range('a', 1, (2, 1)) == (2, 4)
+    assert job_ranges.call_times == {'a': 0.5}
+    assert job_ranges.next_range('a', 2) == (4, 6)
+
+
+def test_finished_job_ranges_are_deleted():
+    client = entry_point.proxy.test_client()
+    request = {'total_calls': 2, 'chunksize': 1, 'workers': 2, 'policy': 'static', 'report': None}
+
+    def next_range(worker_id, seq):
+        res = client.post('/next-range/job0', json={**request, 'worker_id': worker_id, 'seq': seq})
+        return res.get_json()['range']
+
+    assert next_range('a', 0) == [0, 1]
+    assert next_range('b', 0) == [1, 2]
+    assert next_range('a', 1) is None
+    assert 'job0' in entry_point.JOB_RANGES
+
+    # The job is deleted once all its pods got no range
+    assert next_range('b', 1) is None
+    assert 'job0' not in entry_point.JOB_RANGES
+
+    # Late pods and retried requests do not start the job again
+    assert next_range('c', 0) is None
+    assert next_range('b', 1) is None
+    assert 'job0' not in entry_point.JOB_RANGES
+    entry_point.FINISHED_JOBS.pop('job0')
@@ -16,9 +16,13 @@
 
 import pytest
 import lithops
+from lithops.job import job
 from lithops.tests.functions import (
     simple_map_function,
     hello_world,
+    sleep_function,
+    mutate_buffer_function,
+    large_buffer_function,
     lithops_inside_lithops_map_function,
     lithops_return_futures_map,
     lithops_return_futures_call_async,
@@ -43,6 +47,31 @@ class TestMap:
         result = fexec.get_result()
         assert result == [2, 4, 6, 8]
 
+    def test_warm_runners(self):
+        iterdata = [(1, 1), (2, 2), (3, 3), (4, 4)]
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config, warm_runners=True)
+        fexec.map(simple_map_function, iterdata)
+        result = fexec.get_result()
+        assert result == [2, 4, 6, 8]
+        fexec.map(simple_map_function, iterdata)
+        result = fexec.get_result()
+        assert result == [2, 4, 6, 8]
+
+    def test_warm_runners_stop(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config, warm_runners=True, worker_processes=2)
+        env = getattr(fexec.compute_handler, 'env', None)
+        if not hasattr(env, 'runners'):
+            pytest.skip('Warm runners are only available in the localhost backend')
+        fexec.map(sleep_function, [30, 30, 30])
+        with pytest.raises(TimeoutError):
+            fexec.get_result(timeout=3)
+        # The runners killed by the timeout are only started again with the next job
+        assert env.runners.empty()
+        fexec.map(simple_map_function, [(1, 1), (2, 2)])
+        assert fexec.get_result() == [2, 4]
+        assert env.runners.qsize() == 2
+        assert all(runner.poll() is None for runner in env.runners.queue)
+
     def test_range_iterdata(self):
         fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
         generator_iterdata = range(2)
@@ -50,6 +79,19 @@ class TestMap:
         result = fexec.get_result()
         assert result == ['Hello World!'] * 2
 
+    def test_generator_iterdata(self):
+        config = {**pytest.lithops_config, 'lithops': {**pytest.lithops_config['lithops'], 'map_window_size': 3}}
+        fexec = lithops.FunctionExecutor(config=config)
+        futures = fexec.map(simple_map_function, ((i, i) for i in range(7)))
+        result = fexec.get_result()
+        assert result == [i * 2 for i in range(7)]
+        assert len({f.job_id for f in futures}) == 3
+        # An iterator of a whole number of windows, and an empty iterator
+        futures = fexec.map(simple_map_function, ((i, i) for i in range(6)))
+        assert fexec.get_result(futures) == [i * 2 for i in range(6)]
+        assert len({f.job_id for f in futures}) == 2
+        assert fexec.map(simple_map_function, iter([])) == []
+
     def test_dict_iterdata(self):
         fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
         listDicts_iterdata = [{'x': 2, 'y': 8}, {'x': 2, 'y': 8}]
@@ -118,3 +160,82 @@ class TestMap:
         fexec.wait()
         result = fexec.get_result()
         assert result == [1, 2, 3, 1, 2, 3]
+
+    def test_large_buffer_iterdata(self):
+        size = 1024 * 1024
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        fexec.map(mutate_buffer_function, [bytearray(b'\x01') * size for _ in range(3)])
+        result = fexec.get_result()
+        assert result == [(size, 3)] * 3
+
+    def test_large_buffer_result(self):
+        size = 2 * 1024 * 1024
+        for compression in (False, True):
+            config = {**pytest.lithops_config, 'lithops': {**pytest.lithops_config['lithops'], 'result_compression': compression}}
+            fexec = lithops.FunctionExecutor(config=config)
+            fexec.map(large_buffer_function, [size, size])
+            for result in fexec.get_result():
+                assert len(result) == size
+                assert result[-1] == 1 and result[0] == 0
+
+    def test_function_cache(self):
+        iterdata = [(1, 1), (2, 2)]
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        fexec.map(simple_map_function, iterdata)
+        assert fexec.get_result() == [2, 4]
+        # A new session finds the function in storage instead of uploading it again
+        job.FUNCTION_CACHE.clear()
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(simple_map_function, iterdata)
+        assert fexec.get_result() == [2, 4]
+        assert futures[0].stats['host_func_upload_time'] == 0
+        # Functions close to their max age are uploaded again, so that they are not cleaned in use
+        job.FUNCTION_CACHE.clear()
+        max_age, job.FUNCTIONS_MAX_AGE = job.FUNCTIONS_MAX_AGE, 0
+        try:
+            futures = fexec.map(simple_map_function, iterdata)
+        finally:
+            job.FUNCTIONS_MAX_AGE = max_age
+        assert fexec.get_result() == [2, 4]
+        assert futures[0].stats['host_func_upload_time'] > 0
+
+    def test_iter_results(self):
+        iterdata = [(i, i) for i in range(10)]
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(simple_map_function, iterdata)
+        result = [r for _, r in fexec.iter_results(futures, ordered=True, threadpool_size=2)]
+        assert result == [i * 2 for i in range(10)]
+        fexec.map(simple_map_function, iterdata)
+        result = [r for _, r in fexec.iter_results()]
+        assert sorted(result) == [i * 2 for i in range(10)]
+
+    def test_iter_results_consumed(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(simple_map_function, [(1, 1), (2, 2)])
+        result = [r for _, r in fexec.iter_results(futures, ordered=True)]
+        assert result == [2, 4]
+        # The yielded results are released, so they cannot be retrieved again
+        with pytest.raises(ValueError):
+            futures[0].result()
+        with pytest.raises(ValueError):
+            fexec.get_result(futures)
+
+    def test_iter_results_closed(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map(sleep_function, [0, 5, 5])
+        results = fexec.iter_results(futures)
+        f, _ = next(results)
+        assert f is futures[0]
+        # Closing the iterator removes the ready callbacks of the pending futures
+        results.close()
+        assert not any(f._ready_callbacks for f in futures)
+        fexec.get_result(futures[1:])
+
+    def test_iter_results_return_futures(self):
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        fexec.call_async(lithops_return_futures_map, 3)
+        result = [r for _, r in fexec.iter_results(ordered=True)]
+        assert result == [1, 2, 3]
+        fexec.call_async(lithops_return_futures_map, 3)
+        result = [r for _, r in fexec.iter_results(threadpool_size=2)]
+        assert sorted(result) == [1, 2, 3]
@@ -27,7 +27,11 @@ from lithops.tests.functions import (
     my_reduce_function,
     simple_map_function,
     my_map_function_obj,
-    my_map_function_url
+    my_map_function_bundle,
+    my_map_function_records,
+    my_map_function_url,
+    word_pairs_map_function,
+    word_count_reduce_function
 )
 
 
@@ -69,6 +73,31 @@ class TestMapReduce:
         result = fexec.get_result()
         assert result == 20
 
+    def test_reduce_fanin(self):
+        logger.info('Testing map_reduce() with a tree of reducers')
+        iterdata = [(i, i) for i in range(10)]
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map_reduce(simple_map_function, iterdata, simple_reduce_function, reduce_fanin=3)
+        result = fexec.get_result()
+        assert result == 90
+        # 10 map results are reduced by 4 reducers, then 2, then the final one
+        assert len(futures) == 10 + 4 + 2 + 1
+
+    def test_shuffle_partitions(self):
+        logger.info('Testing map_reduce() with a shuffle')
+        iterdata = ['a b c a', 'b d e', 'a z', '']
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map_reduce(word_pairs_map_function, iterdata,
+                                   word_count_reduce_function, shuffle_partitions=3)
+        results = fexec.get_result()
+        assert len(futures) == 4 + 3
+        # Each word is counted by a single reducer
+        counts = {}
+        for partition in results:
+            assert not set(partition) & set(counts)
+            counts.update(partition)
+        assert counts == {'a': 3, 'b': 2, 'c': 1, 'd': 1, 'e': 1, 'z': 1}
+
     def test_obj_bucket(self):
         logger.info('Testing map_reduce() over a bucket')
         data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
@@ -78,6 +107,30 @@ class TestMapReduce:
         result = fexec.get_result()
         assert result == self.words_in_files
 
+    def test_obj_bucket_listings_cache(self):
+        logger.info('Testing map_reduce() over a bucket twice with the same executor')
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        for _ in range(2):
+            fexec.map_reduce(my_map_function_obj, data_prefix, my_reduce_function)
+            result = fexec.get_result()
+            assert result == self.words_in_files
+        assert len(fexec.listings_cache) == 1
+
+    def test_obj_bucket_bundles(self):
+        logger.info('Testing map_reduce() over a bucket with bundles of objects')
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map_reduce(my_map_function_bundle, data_prefix,
+                                   my_reduce_function, obj_bundle_size=64 * 1024 ** 2)
+        result = fexec.get_result(futures)
+        assert result == self.words_in_files
+        # All the objects of the dataset fit in a single bundle
+        assert len(futures) == 1 + 1
+        with pytest.raises(ValueError):
+            fexec.map_reduce(my_map_function_bundle, data_prefix, my_reduce_function,
+                             obj_bundle_size=64 * 1024 ** 2, obj_reduce_by_key=True)
+
     def test_obj_bucket_reduce_by_key(self):
         logger.info('Testing map_reduce() over a bucket with one reducer per object')
         data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
@@ -137,6 +190,66 @@ class TestMapReduce:
 
         assert len(futures) == activations + 1  # +1 due to the reduce function
 
+    def test_bucket_chunk_size_records(self):
+        logger.info('Testing map_reduce() over a bucket iterating the records of the partitions')
+        OBJ_CHUNK_SIZE = 256 * 1024
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        futures = fexec.map_reduce(
+            my_map_function_records, data_prefix,
+            my_reduce_function, obj_chunk_size=OBJ_CHUNK_SIZE
+        )
+        result = fexec.get_result(futures)
+        assert result == self.words_in_files
+
+    def test_bucket_partition_index(self):
+        logger.info('Testing map_reduce() over a bucket with record aligned partitions')
+        OBJ_CHUNK_SIZE = 256 * 1024
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
+        config = {**pytest.lithops_config, 'lithops': {**pytest.lithops_config['lithops'], 'partition_index': True}}
+        fexec = lithops.FunctionExecutor(config=config)
+        # The second job loads the partition index of the first one, if the objects have an ETag
+        for _ in range(2):
+            futures = fexec.map_reduce(
+                my_map_function_obj, data_prefix,
+                my_reduce_function, obj_chunk_size=OBJ_CHUNK_SIZE
+            )
+            result = fexec.get_result(futures)
+            assert result == self.words_in_files
+
+    def test_bucket_partition_index_newline(self):
+        logger.info('Testing map_reduce() with record aligned partitions and a custom newline')
+        OBJ_CHUNK_SIZE = 64 * 1024
+        key = TESTS_PREFIX + '/records/records.txt'
+        records = [f'record{i}' for i in range(50000)]
+        self.storage.put_object(self.bucket, key, '|'.join(records))
+        config = {**pytest.lithops_config, 'lithops': {**pytest.lithops_config['lithops'], 'partition_index': True}}
+        fexec = lithops.FunctionExecutor(config=config)
+        try:
+            futures = fexec.map_reduce(
+                my_map_function_records, self.storage_backend + '://' + self.bucket + '/' + key,
+                my_reduce_function, obj_chunk_size=OBJ_CHUNK_SIZE, obj_newline='|'
+            )
+            result = fexec.get_result(futures)
+            assert len(futures) > 2
+            assert result == len(records)
+        finally:
+            self.storage.delete_object(self.bucket, key)
+
+    def test_bucket_chunk_size_auto(self):
+        logger.info('Testing map_reduce() over a bucket with an automatic chunk size')
+        data_prefix = self.storage_backend + '://' + self.bucket + '/' + DATASET_PREFIX + '/'
+        fexec = lithops.FunctionExecutor(config=pytest.lithops_config)
+        # The second job uses the execution time per byte of the first one
+        for _ in range(2):
+            futures = fexec.map_reduce(
+                my_map_function_obj, data_prefix,
+                my_reduce_function, obj_chunk_size='auto'
+            )
+            result = fexec.get_result(futures)
+            assert result == self.words_in_files
+        assert fexec._get_obj_byte_cost(my_map_function_obj) is not None
+
     def test_bucket_chunk_number(self):
         """tests the ability to create a separate function invocation
         based on the following parameters: chunk_number
@@ -0,0 +1,309 @@
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import pytest
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from lithops.future import ResponseFuture
+from lithops.invokers import InvocationRateController, FaaSInvoker, get_rate_controller, RATE_CONTROLLERS
+from lithops.monitor import StorageMonitor
+from lithops.storage.storage import InternalStorage
+from lithops.storage.utils import create_init_key, create_status_key
+from lithops.worker.status import StatusBatch
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_ID = 'bench0-0'
+JOB_ID = 'M000'
+TOTAL_CALLS = 20000
+CALLS_PER_TICK = 500
+
+JOB = SimpleNamespace(
+    job_id=JOB_ID, job_key=f'{EXECUTOR_ID}-{JOB_ID}', executor_id=EXECUTOR_ID,
+    function_name='bench', execution_timeout=600, runtime_name='bench',
+    runtime_memory=256
+)
+STORAGE_CONFIG = {'backend': 'bench', 'bench': {'storage_bucket': 'bench'}}
+
+
+def make_futures(total_calls):
+    """
+    Returns the invoked futures of a synthetic job
+    """
+    futures = [ResponseFuture(f'{i:05d}', JOB, {}, STORAGE_CONFIG) for i in range(total_calls)]
+    for f in futures:
+        f._set_invoked()
+    return futures
+
+
+def make_invoker(**attrs):
+    """
+    Returns a FaaSInvoker with only the given attributes, without a compute backend
+    """
+    invoker = FaaSInvoker.__new__(FaaSInvoker)
+    for name, value in attrs.items():
+        setattr(invoker, name, value)
+    return invoker
+
+
+class SyntheticStorage(InternalStorage):
+    """
+    Serves synthetic key listings to the storage monitor,
+    counting how many keys are listed in total
+    """
+
+    def __init__(self):
+        self.storage = self
+        self.bucket = 'bench'
+        self.status_batches = {}
+        self.status_batches_lock = threading.Lock()
+        self.keys = []
+        self.done = set()
+        self.listed_keys = 0
+
+    def list_keys(self, bucket, prefix=None, start_after=None):
+        keys = [k for k in sorted(self.keys) if k.startswith(prefix)
+                and (start_after is None or k > start_after)]
+        self.listed_keys += len(keys)
+        return keys
+
+    def get_call_status(self, executor_id, job_id, call_id):
+        if call_id not in self.done:
+            return None
+        return {'type': '__end__', 'exception': False,
+                'executor_id': executor_id, 'job_id': job_id, 'call_id': call_id,
+                'activation_id': call_id, 'worker_start_tstamp': time.time(),
+                'worker_end_tstamp': time.time()}
+
+
+def test_storage_monitor_synthetic_listing():
+    call_ids = [f'{i:05d}' for i in range(TOTAL_CALLS)]
+    futures = make_futures(TOTAL_CALLS)
+
+    storage = SyntheticStorage()
+    monitor = StorageMonitor(
+        EXECUTOR_ID, storage, queue.Queue(), {}, False,
+        {'monitoring_interval': 0}
+    )
+    monitor.add_futures(futures)
+
+    # CALLS_PER_TICK calls start on each tick, and each one
+    # finishes between one and three ticks later
+    random.seed(0)
+    tick = 0
+    started = 0
+    running = {}
+    full_listing_keys = 0
+    start = time.time()
+    while not monitor._all_ready():
+        tick += 1
+        for call_id in call_ids[started:started + CALLS_PER_TICK]:
+            storage.keys.append(create_init_key(EXECUTOR_ID, JOB_ID, call_id, call_id))
+            running[call_id] = tick + random.randint(1, 3)
+        started += CALLS_PER_TICK
+        for call_id in [c for c, end_tick in running.items() if end_tick <= tick]:
+            storage.keys.append(create_status_key(EXECUTOR_ID, JOB_ID, call_id))
+            storage.done.add(call_id)
+            del running[call_id]
+        full_listing_keys += len(storage.keys)
+
+        callids_running, callids_done = monitor._get_job_status()
+        monitor._tag_future_as_running(callids_running)
+        monitor._tag_future_as_ready(callids_done)
+    monitor._get_job_status()
+    elapsed = time.time() - start
+
+    # The cached status batches of the job are dropped once all its futures are ready
+    storage.status_batches[JOB.job_key] = {'loaded': set(), 'statuses': {}}
+    monitor._evict_status_batches()
+
+    logger.info(f'Monitored {TOTAL_CALLS} synthetic calls in {elapsed:.2f}s - '
+                f'Listed keys: {storage.listed_keys} - Full listings: {full_listing_keys}')
+
+    assert all(f.ready for f in futures)
+    assert monitor.jobs_index[JOB_ID]['retired']
+    assert JOB.job_key not in storage.status_batches
+    # Listings start after the finished calls, so only the tail of the job is listed
+    assert storage.listed_keys < full_listing_keys / 4
+
+
+def test_invocation_rate_controller():
+    controller = InvocationRateController(max_limit=64)
+
+    # Throttled invocations halve the limit once per invocation latency
+    for _ in range(4):
+        controller.acquire()
+    for _ in range(4):
+        controller.release(1.0, throttled=True)
+    assert controller.stats()['limit'] == 32
+    assert 1.0 <= controller.backoff() <= 16.0
+
+    # Successful invocations grow the limit by about one every 'limit' invocations
+    for _ in range(65):
+        controller.acquire()
+        controller.release(1.0)
+    stats = controller.stats()
+    assert stats['limit'] == 33
+    assert stats['in_flight'] == 0
+    assert stats['rate'] > 0
+    assert stats['throttle_rate'] == 4 / 69
+    assert controller.backoff() <= 2.0
+
+    # The limit starts below max_limit and grows up to it
+    controller = InvocationRateController(max_limit=8, limit=4)
+    assert controller.stats()['limit'] == 4
+    for _ in range(100):
+        controller.acquire()
+        controller.release(1.0)
+    assert controller.stats()['limit'] == 8
+
+
+@pytest.fixture
+def rate_controllers():
+    """
+    Removes the rate controllers registered by the test from the registry of the process
+    """
+    backends = set(RATE_CONTROLLERS)
+    yield
+    for backend in set(RATE_CONTROLLERS) - backends:
+        del RATE_CONTROLLERS[backend]
+
+
+def test_invocations_follow_rate_limit(rate_controllers):
+    # Executors with more workers raise the max limit of the shared controller
+    controller = get_rate_controller('bench', 8, limit=4)
+    assert get_rate_controller('bench', 16) is controller
+    assert controller.max_limit == 16
+
+    in_flight = []
+    lock = threading.Lock()
+
+    def invoke(payload):
+        with lock:
+            in_flight.append((controller.in_flight, int(controller.limit)))
+        time.sleep(0.01)
+        return payload['call_ids'][0]
+
+    job = SimpleNamespace(job_id=JOB_ID, executor_id=EXECUTOR_ID, data_key=None, data_byte_strs=['x'] * 64)
+    invoker = make_invoker(
+        rate_controller=controller,
+        compute_handler=SimpleNamespace(invoke=invoke),
+        _create_payload=lambda job: {'data_byte_ranges': None}
+    )
+
+    # The pool has a thread per invocation that can be in flight,
+    # and the controller limits how many of them invoke at the same time
+    with ThreadPoolExecutor(controller.max_limit) as executor:
+        for call_id in range(64):
+            executor.submit(invoker._invoke_task, job, [call_id])
+
+    assert len(in_flight) == 64
+    assert all(count <= limit for count, limit in in_flight)
+    assert max(count for count, _ in in_flight) > 4
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_speculate_stragglers():
+    futures = make_futures(8)
+    now = time.time()
+    for i, f in enumerate(futures):
+        if i < 4:
+            f._set_ready({'worker_start_tstamp': now - 5, 'worker_end_tstamp': now - 4})
+        elif i >= 6:
+            start = now - 10 if i == 6 else now - 0.5
+            f._set_running({'activation_id': str(i), 'worker_start_tstamp': start})
+
+    speculated = []
+
+    def speculator(fs):
+        speculated.extend(fs)
+        return fs
+
+    monitor = StorageMonitor(
+        EXECUTOR_ID, SyntheticStorage(), queue.Queue(), {}, False,
+        {'monitoring_interval': 0}
+    )
+    monitor.add_futures(futures)
+    monitor.futures_running.update((f.executor_id, f.job_id, f.call_id) for f in futures[6:])
+    monitor.speculator = speculator
+
+    # Half of the calls are done, which is below the 75th percentile
+    monitor._speculate_stragglers()
+    assert speculated == []
+
+    # The runtimes of the calls are added as the monitor finds them done
+    for f in futures[4:6]:
+        f._set_ready({'worker_start_tstamp': now - 5, 'worker_end_tstamp': now - 4})
+    monitor._get_not_ready_futures()
+    assert len(monitor.job_runtimes[JOB.job_key]) == 6
+
+    # Only the call running for longer than 1.5 times the
+    # 75th percentile of the runtimes is re-invoked, once
+    monitor._speculate_stragglers()
+    monitor._speculate_stragglers()
+    assert speculated == [futures[6]]
+
+    monitor.remove_futures(futures)
+    assert JOB.job_key not in monitor.job_total_calls
+    assert JOB.job_key not in monitor.job_runtimes
+
+
+def test_speculative_attempts_use_free_workers():
+    futures = make_futures(2)
+    for f in futures:
+        f._set_running({'activation_id': f.call_id, 'worker_start_tstamp': time.time()})
+
+    submitted = []
+    invoker = make_invoker(
+        executor=SimpleNamespace(submit=lambda *args: submitted.append(args[2])),
+        speculative_jobs={JOB.job_key: JOB},
+        speculative_futures=set(),
+        speculative_lock=threading.Lock(),
+        max_workers=4,
+        running_workers=3
+    )
+
+    # Only one worker is free, so only the first straggler is re-invoked
+    assert invoker.speculate(futures) == [futures[0]]
+    assert invoker.running_workers == 4
+    assert invoker.speculate(futures[1:]) == []
+
+    # The worker of the attempt is released once the call is done
+    futures[0]._set_ready({'worker_start_tstamp': 0, 'worker_end_tstamp': 1})
+    assert invoker.speculate(futures[1:]) == [futures[1]]
+    assert invoker.running_workers == 4
+    assert submitted == [[0], [1]]
+
+
+def test_status_batch_flush_retries():
+    class FlakyStorage:
+        def __init__(self):
+            self.puts = 0
+            self.batches = {}
+
+        def put_data(self, key, data):
+            self.puts += 1
+            if self.puts == 1:
+                raise ConnectionError('Storage unavailable')
+            self.batches[key] = json.loads(data)
+
+    job = SimpleNamespace(
+        executor_id=EXECUTOR_ID, job_id=JOB_ID,
+        config={'lithops': {'monitoring_interval': 0.05}}
+    )
+    storage = FlakyStorage()
+    status_batch = StatusBatch(job, storage)
+    status_batch.add({'call_id': '00000', 'type': '__end__'})
+
+    # The flusher survives the failed put and stores the statuses in the next interval
+    deadline = time.time() + 5
+    while not storage.batches and time.time() < deadline:
+        time.sleep(0.05)
+    status_batch.close()
+    assert status_batch.flusher.is_alive() is False
+    assert storage.puts == 2
+    assert list(storage.batches.values()) == [{'00000': {'call_id': '00000', 'type': '__end__'}}]
@@ -0,0 +1,100 @@
+import pickle
+import pytest
+import threading
+import multiprocessing as mp
+
+from lithops.job import serialize
+from lithops.job.serialize import SerializeIndependent, _is_builtin
+from lithops.tests.functions import hello_world, simple_map_function
+
+
+class Params:
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def test_builtin_iterdata_skips_inspection(monkeypatch):
+    serializer = SerializeIndependent([])
+
+    def module_inspect(obj):
+        raise AssertionError(f'{obj} was inspected')
+
+    monkeypatch.setattr(serializer, '_module_inspect', module_inspect)
+    iterdata = [{'x': i, 'y': [str(i), (i, None)], 'z': {'k': b'v'}} for i in range(10)]
+    strs, mod_paths = serializer(iterdata, [], [])
+    assert [pickle.loads(s) for s in strs] == iterdata
+    assert mod_paths == set()
+
+
+def test_self_referencing_iterdata():
+    lst = []
+    lst.append(lst)
+    assert not _is_builtin(lst)
+    assert _is_builtin([[[1]]])
+
+    strs, _ = SerializeIndependent([])([{'lst': lst}], [], [])
+    obj = pickle.loads(strs[0])
+    assert obj['lst'][0] is obj['lst']
+
+
+def test_instance_functions_are_inspected():
+    serializer = SerializeIndependent([])
+
+    params = Params(1)
+    params.func = hello_world
+    assert 'lithops.tests.functions' in serializer._param_inspect(params)
+
+    # The function of the instance is not memoized for the other instances of its type
+    assert 'lithops.tests.functions' not in serializer._param_inspect(Params(2))
+    assert __name__ in serializer._param_inspect(Params(2))
+    assert 'lithops.tests.functions' in serializer._param_inspect(simple_map_function)
+
+
+@pytest.mark.skipif('fork' not in mp.get_all_start_methods(), reason='Requires fork')
+def test_parallel_serialization(monkeypatch):
+    monkeypatch.setattr(serialize, 'SERIALIZE_BATCH_SIZE', 7)
+    # The threads left by other tests would disable the forked serialization
+    monkeypatch.setattr(serialize, '_can_fork', lambda: True)
+    iterdata = [{'x': i} if i % 2 else {'x': Params(i)} for i in range(50)]
+
+    serial_strs, serial_mods = SerializeIndependent([], processes=1)(iterdata, [], [])
+    serializer = SerializeIndependent([], processes=4)
+    parallel_dumps = serializer._parallel_dumps
+    batches = []
+
+    def spy(list_of_objs):
+        batches.append(len(list_of_objs))
+        return parallel_dumps(list_of_objs)
+
+    monkeypatch.setattr(serializer, '_parallel_dumps', spy)
+    parallel_strs, parallel_mods = serializer(iterdata, [], [])
+    assert batches == [50]
+    assert parallel_strs == [bytes(s) for s in serial_strs]
+    assert parallel_mods == serial_mods
+    assert serialize.WORKER_OBJS is None
+
+
+def test_parallel_serialization_with_threads(monkeypatch):
+    monkeypatch.setattr(serialize, 'SERIALIZE_BATCH_SIZE', 7)
+    serializer = SerializeIndependent([], processes=4)
+
+    def parallel_dumps(list_of_objs):
+        raise AssertionError('Forked with other running threads')
+
+    monkeypatch.setattr(serializer, '_parallel_dumps', parallel_dumps)
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        # The objects are serialized in this process while other threads run
+        assert not serialize._can_fork()
+        iterdata = [{'x': i} for i in range(50)]
+        strs, _ = serializer(iterdata, [], [])
+        assert [pickle.loads(s) for s in strs] == iterdata
+    finally:
+        stop.set()
+        thread.join()
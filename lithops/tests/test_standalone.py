@@ -0,0 +1,164 @@
+import os
+import json
+import pytest
+from collections import defaultdict
+
+pytest.importorskip('redis')
+pytest.importorskip('flask')
+pytest.importorskip('gevent')
+
+from lithops.standalone import master, worker  # noqa: E402
+from lithops.standalone.utils import JobStatus, StandaloneMode, WorkerStatus  # noqa: E402
+
+QUEUE_NAME = 'wq:test'
+
+
+class FakeRedis:
+    """
+    In-memory subset of the redis client used by the standalone master and workers
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = defaultdict(dict)
+        self.lists = defaultdict(list)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+        self.hashes.pop(key, None)
+        self.lists.pop(key, None)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        if mapping:
+            self.hashes[key].update({k: str(v) for k, v in mapping.items()})
+        else:
+            self.hashes[key][field] = str(value)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def lpush(self, key, *values):
+        for value in values:
+            self.lists[key].insert(0, value)
+        return len(self.lists[key])
+
+    def rpush(self, key, *values):
+        self.lists[key].extend(values)
+        return len(self.lists[key])
+
+    def rpop(self, key):
+        return self.lists[key].pop() if self.lists.get(key) else None
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(master, 'redis_client', client)
+    monkeypatch.setattr(worker, 'redis_client', client)
+    worker.JOB_PAYLOAD_CACHE.clear()
+    return client
+
+
+def submit_job(job_key, total_calls):
+    executor_id, job_id = job_key.rsplit('-', 1)
+    job_payload = {
+        'executor_id': executor_id,
+        'job_id': job_id,
+        'job_key': job_key,
+        'call_ids': [f'{i:05d}' for i in range(total_calls)],
+        'data_byte_ranges': [(i, i) for i in range(total_calls)],
+        'host_submit_tstamp': 0,
+        'func_name': 'test',
+        'runtime_name': 'test',
+        'config': {'standalone': {'exec_mode': StandaloneMode.CREATE.value}}
+    }
+    master.handle_job(job_payload, QUEUE_NAME)
+
+
+def test_job_payload_lifecycle(redis_client):
+    submit_job('test0-M000', 2)
+
+    # The tasks only carry their call and data byte range
+    task_records = redis_client.lists[QUEUE_NAME]
+    assert json.loads(task_records[0]) == ['test0-M000', '00001', [1, 1]]
+
+    task_payload = worker.get_task_payload(task_records[0])
+    assert task_payload['call_ids'] == ['00001']
+    assert task_payload['data_byte_ranges'] == [[1, 1]]
+    assert task_payload['func_name'] == 'test'
+
+    # The job payload is deleted once all the tasks are done
+    worker.notify_task_done('test0-M000', '00000')
+    assert redis_client.get('jobpayload:test0-M000') is not None
+    worker.notify_task_done('test0-M000', '00001')
+    assert redis_client.get('jobpayload:test0-M000') is None
+    assert redis_client.hget('job:test0-M000', 'status') == JobStatus.DONE.value
+
+
+def test_consumer_skips_tasks_without_job_payload(redis_client, monkeypatch):
+    submit_job('test0-M000', 1)
+    redis_client.delete('jobpayload:test0-M000')
+
+    # The consumer discards the task and keeps consuming the queue
+    monkeypatch.setitem(worker.worker_threads, 0, {})
+    worker.redis_queue_consumer(0, QUEUE_NAME, StandaloneMode.CREATE.value, 'test')
+    assert redis_client.llen(QUEUE_NAME) == 0
+    assert worker.worker_threads[0]['status'] == WorkerStatus.IDLE.value
+
+
+FAKE_RUNNER = """
+import sys
+import json
+
+for line in sys.stdin:
+    with open(line.strip()) as f:
+        call_id = json.load(f)['call_ids'][0]
+    if call_id == '00001':
+        sys.exit(1)
+    print(call_id, flush=True)
+"""
+
+
+def test_consumer_warm_runners(redis_client, monkeypatch, tmp_path):
+    (tmp_path / 'runner.py').write_text(FAKE_RUNNER)
+    monkeypatch.setattr(worker, 'SA_INSTALL_DIR', str(tmp_path))
+    monkeypatch.setattr(worker, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(worker, 'RN_LOG_FILE', str(tmp_path / 'runner.log'))
+
+    runners = []
+
+    def start_task_runner(backend):
+        runners.append(start_runner(backend))
+        return runners[-1]
+
+    start_runner = worker.start_task_runner
+    monkeypatch.setattr(worker, 'start_task_runner', start_task_runner)
+    monkeypatch.setitem(worker.worker_threads, 0, {})
+    open_fds = len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+
+    submit_job('test0-M000', 3)
+    worker.redis_queue_consumer(0, QUEUE_NAME, StandaloneMode.CREATE.value, 'test', warm_runners=True)
+
+    # The runner that died with the second task is replaced for the third one
+    assert len(runners) == 2
+    assert [runner.returncode for runner in runners] == [1, 0]
+    assert redis_client.hget('job:test0-M000', 'status') == JobStatus.DONE.value
+    assert not worker.job_processes
+    # The pipes of the runners and the parent copies of their log file are closed
+    if open_fds is not None:
+        assert len(os.listdir('/proc/self/fd')) == open_fds
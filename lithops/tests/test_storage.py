@@ -14,12 +14,16 @@
 # limitations under the License.
 #
 
+import os
+import json
 import pytest
 import logging
 import lithops
 from io import BytesIO
 from lithops.config import extract_storage_config
+from lithops.storage import get_internal_storage
 from lithops.storage.utils import CloudObject, StorageNoSuchKeyError
+from lithops.worker.utils import get_job_config, JOB_CONFIG_CACHE
 from lithops.tests.conftest import TESTS_PREFIX
 from lithops.tests.functions import my_map_function_storage, \
     my_cloudobject_put, my_cloudobject_get, my_reduce_function
@@ -288,3 +292,30 @@ class TestStorage:
         self.storage.delete_cloudobjects(cloudobjects)
         all_bucket_keys = self.storage.list_keys(self.bucket)
         assert all(key not in all_bucket_keys for key in keys_to_delete)
+
+    def test_internal_storage_io_map(self):
+        storage_config = extract_storage_config(pytest.lithops_config)
+        internal_storage = get_internal_storage(storage_config)
+        assert get_internal_storage(storage_config) is internal_storage
+        keys = [STORAGE_PREFIX + '/test0', STORAGE_PREFIX + '/test1']
+        result = internal_storage.io_map(internal_storage.get_data, keys, max_workers=1)
+        assert result == [b'test storage handler', b'test storage']
+        if hasattr(os, 'fork'):
+            # Forked processes do not reuse the clients of the parent
+            pid = os.fork()
+            if pid == 0:
+                os._exit(int(get_internal_storage(storage_config) is internal_storage))
+            assert os.waitpid(pid, 0)[1] == 0
+
+    def test_job_config_by_key(self):
+        storage_config = extract_storage_config(pytest.lithops_config)
+        internal_storage = get_internal_storage(storage_config)
+        config_key = STORAGE_PREFIX + '/config.json'
+        internal_storage.put_data(config_key, json.dumps(pytest.lithops_config))
+        payload = {'config_key': config_key, 'storage_config': storage_config}
+        JOB_CONFIG_CACHE.pop(config_key, None)
+        assert get_job_config(payload) == pytest.lithops_config
+        # Workers download each config only once
+        self.storage.delete_object(self.bucket, config_key)
+        assert get_job_config(payload) == pytest.lithops_config
+        assert get_job_config({'config': {'lithops': {}}}) == {'lithops': {}}
@@ -17,6 +17,7 @@
 #
 
 import re
+import io
 import os
 import sys
 import uuid
@@ -24,7 +25,9 @@ import json
 import socket
 import shutil
 import base64
+import pickle
 import inspect
+import zlib
 import struct
 import lithops
 import zipfile
@@ -76,17 +79,244 @@ def iterchunks(lst, n):
         yield lst[i:i + n]
 
 
+def shuffle_partition(key, partitions):
+    """
+    Returns the partition of a shuffle key. Unlike hash(), which is
+    salted per process for str and bytes, it is the same in all the workers
+    """
+    if isinstance(key, str):
+        key = key.encode()
+    elif not isinstance(key, (bytes, bytearray)):
+        key = pickle.dumps(key, protocol=4)
+    return zlib.crc32(key) % partitions
+
+
+OOB_PICKLE_MAGIC = b'LOOB'
+OOB_MIN_BUFFER_SIZE = 1024 * 1024  # 1MiB
+OOB_COMPRESSION_MIN_SIZE = 64 * 1024  # 64KiB
+OOB_CODEC_NONE = 0
+OOB_CODEC_ZLIB = 1
+
+
+class OutOfBandPickle:
+    """
+    A pickle protocol 5 stream whose large buffers are kept out-of-band, as
+    views of the memory of the pickled objects, until they are written.
+    The header, the pickle stream and the buffers are written one after
+    another, as separate frames. With compress=True, the frames of at least
+    OOB_COMPRESSION_MIN_SIZE bytes are compressed with zlib, and kept
+    compressed only if they shrink by 10% or more
+    """
+
+    def __init__(self, data, buffers, compress=False):
+        frames = [memoryview(data)] + [buffer.raw() for buffer in buffers]
+        codecs = [OOB_CODEC_NONE] * len(frames)
+
+        if compress:
+            for i, frame in enumerate(frames):
+                if frame.nbytes < OOB_COMPRESSION_MIN_SIZE:
+                    continue
+                compressed = zlib.compress(frame, 1)
+                if len(compressed) < frame.nbytes * 0.9:
+                    frames[i] = memoryview(compressed)
+                    codecs[i] = OOB_CODEC_ZLIB
+
+        lengths = [frame.nbytes for frame in frames]
+        header = struct.pack(
+            f'<4sI{len(frames)}Q{len(frames)}B',
+            OOB_PICKLE_MAGIC, len(frames) - 1, *lengths, *codecs
+        )
+        self.frames = [memoryview(header)] + frames
+        self.nbytes = sum(lengths) + len(header)
+
+    def __len__(self):
+        return self.nbytes
+
+    def __bytes__(self):
+        return b"".join(self.frames)
+
+    def reader(self):
+        """
+        Returns a file-like object that reads the frames in order,
+        to upload them without joining them into a single byte string
+        """
+        return FramesReader(self.frames)
+
+
+class FramesReader(io.RawIOBase):
+    """
+    Seekable, read-only file-like object over a list of memoryviews
+    """
+
+    def __init__(self, frames):
+        self.frames = [frame.cast('B') for frame in frames]
+        self.size = sum(frame.nbytes for frame in self.frames)
+        self.pos = 0
+
+    def __len__(self):
+        return self.size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.pos = min(max(offset, 0), self.size)
+        return self.pos
+
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        written = 0
+        frame_start = 0
+        for frame in self.frames:
+            frame_end = frame_start + frame.nbytes
+            if self.pos < frame_end and written < out.nbytes:
+                offset = self.pos - frame_start
+                n = min(frame.nbytes - offset, out.nbytes - written)
+                out[written:written + n] = frame[offset:offset + n]
+                written += n
+                self.pos += n
+            frame_start = frame_end
+        return written
+
+    def readall(self):
+        data = bytearray(self.size - self.pos)
+        self.readinto(data)
+        return bytes(data)
+
+
+def pickle_dumps(obj, dumps=pickle.dumps, framed=False, compress=False):
+    """
+    Serializes obj keeping the buffers of at least OOB_MIN_BUFFER_SIZE bytes
+    out-of-band, so that they are not copied into the pickle stream
+
+    :param framed: return an OutOfBandPickle even if obj has no large buffers
+    :param compress: compress the large frames of the OutOfBandPickle
+
+    :return: bytes, or an OutOfBandPickle if obj contains large buffers.
+        Always bytes without the pickle protocol 5 (Python < 3.8)
+    """
+    if pickle.HIGHEST_PROTOCOL < 5:
+        return dumps(obj)
+
+    buffers = []
+
+    def buffer_callback(buffer):
+        # A false value keeps the buffer out-of-band
+        if buffer.raw().nbytes < OOB_MIN_BUFFER_SIZE:
+            return True
+        buffers.append(buffer)
+
+    data = dumps(obj, protocol=5, buffer_callback=buffer_callback)
+
+    if buffers or framed:
+        return OutOfBandPickle(data, buffers, compress)
+    return data
+
+
+def _decode_frame(frame, codec):
+    if codec == OOB_CODEC_ZLIB:
+        return bytearray(zlib.decompress(frame))
+    return frame
+
+
+def _unpack_header(view):
+    n_frames, = struct.unpack_from('<I', view, 4)
+    n_frames += 1
+    lengths = struct.unpack_from(f'<{n_frames}Q', view, 8)
+    codecs = struct.unpack_from(f'<{n_frames}B', view, 8 + 8 * n_frames)
+    return lengths, codecs
+
+
+def pickle_loads(data):
+    """
+    Deserializes data created by pickle_dumps(). The out-of-band buffers
+    are rebuilt as views of data, without copying them
+    """
+    view = memoryview(data)
+    if view[:4] != OOB_PICKLE_MAGIC:
+        return pickle.loads(data)
+
+    lengths, codecs = _unpack_header(view)
+    pos = 8 + 9 * len(lengths)
+    frames = []
+    for length, codec in zip(lengths, codecs):
+        frames.append(_decode_frame(view[pos:pos + length], codec))
+        pos += length
+
+    return pickle.loads(frames[0], buffers=frames[1:])
+
+
+def pickle_load(stream):
+    """
+    Deserializes a stream created from pickle_dumps(framed=True). Each
+    frame is read into its own preallocated buffer, so the out-of-band
+    buffers are rebuilt without intermediate copies
+    """
+    head = stream.read(8)
+    if head[:4] != OOB_PICKLE_MAGIC:
+        return pickle.loads(head + stream.read())
+
+    n_frames = struct.unpack_from('<I', head, 4)[0] + 1
+    header = head + stream.read(9 * n_frames)
+    lengths, codecs = _unpack_header(memoryview(header))
+    frames = [
+        _decode_frame(read_into_buffer(stream, length), codec)
+        for length, codec in zip(lengths, codecs)
+    ]
+
+    return pickle.loads(frames[0], buffers=frames[1:])
+
+
 def agg_data(data_strs):
     """Auxiliary function that aggregates data of a job to a single
-    byte string.
+    byte string. The out-of-band buffers are copied only once, from
+    the pickled objects to the aggregated data.
     """
     ranges = []
+    frames = []
     pos = 0
     for datum in data_strs:
         datum_len = len(datum)
         ranges.append((pos, pos + datum_len - 1))
         pos += datum_len
-    return b"".join(data_strs), ranges
+        if isinstance(datum, OutOfBandPickle):
+            frames.extend(datum.frames)
+        else:
+            frames.append(datum)
+    return b"".join(frames), ranges
+
+
+def read_into_buffer(stream, size):
+    """
+    Reads size bytes from a stream into a new writable buffer,
+    without intermediate copies when the stream supports readinto()
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    readinto = getattr(stream, 'readinto', None)
+    pos = 0
+    while pos < size:
+        if readinto:
+            n = readinto(view[pos:])
+        else:
+            chunk = stream.read(min(size - pos, 64 * 1024 * 1024))
+            n = len(chunk)
+            view[pos:pos + n] = chunk
+        if not n:
+            break
+        pos += n
+
+    return buffer if pos == size else buffer[:pos]
 
 
 def create_futures_list(futures, executor):
@@ -141,6 +371,11 @@ class FuturesList(list):
         fs_tt = self.alt_list if hasattr(self, 'alt_list') else self
         return self.executor.get_result(fs_tt, **kwargs)
 
+    def iter_results(self, **kwargs):
+        self._create_executor()
+        fs_tt = self.alt_list if hasattr(self, 'alt_list') else self
+        return self.executor.iter_results(fs_tt, **kwargs)
+
     def __reduce__(self):
         self.executor = None
         return super().__reduce__()
@@ -562,6 +797,55 @@ def verify_args(func, iterdata, extra_args):
     return new_data
 
 
+RECORDS_BLOCK_SIZE = 1024 * 1024  # 1MiB
+
+
+def iter_records(stream, newline=b'\n', batch_size=None, block_size=RECORDS_BLOCK_SIZE):
+    """
+    Yields the records of a stream, without the newline characters.
+    The stream is read in blocks of block_size bytes, and each block is split
+    at once with bytes.split(). The last, incomplete, record of each block
+    is carried over to the next one
+
+    :param batch_size: yield lists of up to batch_size records instead of single records
+    """
+    carry = []
+    batch = []
+
+    for block in iter(lambda: stream.read(block_size), b''):
+        if carry and len(newline) > 1:
+            # The newline characters may be split between the blocks
+            block = b''.join(carry) + block
+            carry = []
+        records = block.split(newline)
+        if len(records) == 1:
+            carry.append(block)
+            continue
+        if carry:
+            records[0] = b''.join(carry) + records[0]
+        carry = [records.pop()]
+
+        if batch_size is None:
+            yield from records
+            continue
+        batch.extend(records)
+        if len(batch) >= batch_size:
+            full = len(batch) - len(batch) % batch_size
+            for i in range(0, full, batch_size):
+                yield batch[i:i + batch_size]
+            batch = batch[full:]
+
+    last_record = b''.join(carry)
+    if batch_size is None:
+        if last_record:
+            yield last_record
+        return
+    if last_record:
+        batch.append(last_record)
+    if batch:
+        yield batch
+
+
 class WrappedStreamingBody:
     """
     Wrap boto3's StreamingBody object to provide enough Python fileobj functionality.
@@ -661,6 +945,14 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
         self._first_read = True
 
     def read(self, n=None):
+        # A block can be empty after discarding the first partial row,
+        # but only the end of the partition returns an empty string
+        retval = self._read_block(n)
+        while not retval and not self._eof:
+            retval = self._read_block(n)
+        return retval
+
+    def _read_block(self, n=None):
         if self._eof:
             return b''
         # Data always contain one byte from the previous chunk,
@@ -669,6 +961,19 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
             self._first_byte = self.sb.read(self._plusbytes)
 
         retval = self.sb.read(n)
+        if not retval:
+            self._eof = True
+            return b''
+
+        if self._first_read and self._first_byte and \
+           self._first_byte != self.newline_char:
+            while self.newline_char not in retval:
+                # The first partial row ends after this block
+                more = self.sb.read(RECORDS_BLOCK_SIZE)
+                if not more:
+                    break
+                retval += more
+
         last_row_end_pos = len(retval)
         self.pos += last_row_end_pos
         first_row_start_pos = 0
@@ -678,18 +983,32 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
             logger.debug('Discarding first partial row')
             # Previous byte is not self.newline_char
             # This means that we have to discard first row because it is cut
-            first_row_start_pos = retval.find(self.newline_char) + 1
+            newline_pos = retval.find(self.newline_char)
+            first_row_start_pos = newline_pos + 1 if newline_pos >= 0 else len(retval)
             self._first_read = False
 
         # Find end of the line in threshold
         if self.pos >= self.size:
             current_end_pos = last_row_end_pos - (self.pos - self.size)
             last_byte_pos = retval[current_end_pos - 1:].find(self.newline_char)
+            while last_byte_pos == -1:
+                # The last row ends after this block
+                more = self.sb.read(RECORDS_BLOCK_SIZE)
+                if not more:
+                    last_byte_pos = len(retval) - current_end_pos
+                    break
+                retval += more
+                last_byte_pos = retval[current_end_pos - 1:].find(self.newline_char)
             last_row_end_pos = current_end_pos + last_byte_pos
             self._eof = True
 
         return retval[first_row_start_pos:last_row_end_pos]
 
+    @property
+    def _raw_stream(self):
+        # boto3's StreamingBody does not read lines of the unread data of its raw stream
+        return getattr(self.sb, '_raw_stream', self.sb)
+
     def readline(self):
         if self._eof:
             return b''
@@ -698,9 +1017,9 @@ class WrappedStreamingBodyPartition(WrappedStreamingBody):
             self._first_byte = self.sb.read(self._plusbytes)
             if self._first_byte != self.newline_char:
                 logger.debug('Discarding first partial row')
-                self.sb._raw_stream.readline()
+                self._raw_stream.readline()
         try:
-            retval = self.sb._raw_stream.readline()
+            retval = self._raw_stream.readline()
         except struct.error:
             raise EOFError()
         self.pos += len(retval)
@@ -21,12 +21,15 @@ import time
 import concurrent.futures as cf
 from functools import partial
 from types import SimpleNamespace
-from itertools import chain
+from itertools import chain, islice
+from queue import SimpleQueue, Empty
+from collections import deque
 from typing import Optional, List, Union, Tuple, Any
 
 from lithops.utils import is_unix_system, timeout_handler, \
     is_notebook, is_lithops_worker, FuturesList
-from lithops.storage import InternalStorage
+from lithops.storage import InternalStorage, get_internal_storage
+from lithops.storage.storage import get_io_executor
 from lithops.future import ResponseFuture
 from lithops.monitor import JobMonitor
 
@@ -225,6 +228,141 @@ def get_result(fs: Optional[Union[ResponseFuture, FuturesList, List[ResponseFutu
     return result
 
 
+def iter_results(fs: Union[ResponseFuture, FuturesList, List[ResponseFuture]],
+                 internal_storage: Optional[InternalStorage] = None,
+                 job_monitor: Optional[JobMonitor] = None,
+                 throw_except: Optional[bool] = True,
+                 ordered: Optional[bool] = False,
+                 threadpool_size: Optional[int] = THREADPOOL_SIZE,
+                 wait_dur_sec: Optional[int] = None):
+    """
+    Iterates over the results of the function activations. Yields a
+    `(future, result)` tuple as soon as each result is downloaded. At most
+    `threadpool_size` results are downloaded or waiting to be yielded at the
+    same time, and each future releases its result once it has been yielded,
+    so calling `result()` on a yielded future raises a ValueError.
+
+    :param fs: Futures list
+    :param internal_storage: InternalStorage instance. Default None.
+    :param job_monitor: JobMonitor instance. Default None.
+    :param throw_except: Reraise exception if call raised. Default True.
+    :param ordered: Yield the results in the order of the futures list. Default False.
+    :param threadpool_size: Max number of results downloaded at the same time. Default 64
+    :param wait_dur_sec: Time interval between each check. Default 1 second
+
+    :return: Iterator of `(future, result)` tuples
+    """
+    if type(fs) is not list and type(fs) is not FuturesList:
+        fs = [fs]
+
+    queue = [f for f in fs if f._produce_output]
+    if not queue:
+        return
+
+    executors_data = _create_executors_data_from_futures(queue, internal_storage)
+    storages = {exec_data.executor_id: exec_data.internal_storage for exec_data in executors_data}
+
+    if not job_monitor:
+        for executor_data in executors_data:
+            job_monitor = JobMonitor(
+                executor_id=executor_data.executor_id,
+                internal_storage=executor_data.internal_storage)
+            job_monitor.start(fs=executor_data.futures)
+
+    sleep_sec = wait_dur_sec or WAIT_DUR_SEC if job_monitor.type == 'storage' \
+        and job_monitor.storage_backend != 'localhost' else 0.1
+
+    def get_result(f):
+        if f.executor_id not in storages:
+            storages[f.executor_id] = get_internal_storage(f._storage_config)
+        return f.result(throw_except=throw_except, internal_storage=storages[f.executor_id])
+
+    # Futures not yielded yet. In ordered mode a deque keeps the order of the
+    # results, otherwise a dict works as an insertion-ordered set
+    queue = deque(queue) if ordered else dict.fromkeys(queue)
+    in_flight = {}
+    completed = {}
+    pool = get_io_executor()
+
+    # In unordered mode the futures are put in ready_q as they become ready,
+    # so that each iteration only looks at the newly ready futures
+    ready_q = SimpleQueue()
+    watched = []
+
+    def watch(futures):
+        if not ordered:
+            for f in futures:
+                f._add_ready_callback(ready_q.put)
+                watched.append(f)
+
+    def download(f):
+        if f not in completed and f not in in_flight:
+            in_flight[f] = pool.submit(get_result, f)
+
+    watch(queue)
+
+    try:
+        while queue:
+            if ordered:
+                # Only the results at the head of the queue are downloaded
+                for f in islice(queue, threadpool_size):
+                    if len(in_flight) + len(completed) >= threadpool_size:
+                        break
+                    if f._is_ready():
+                        download(f)
+            else:
+                while len(in_flight) + len(completed) < threadpool_size:
+                    try:
+                        f = ready_q.get_nowait()
+                    except Empty:
+                        break
+                    # A future can be put twice, or after being replaced by its new futures
+                    if f in queue:
+                        download(f)
+
+            if not in_flight:
+                time.sleep(sleep_sec)
+                continue
+
+            done, _ = cf.wait(in_flight.values(), timeout=sleep_sec, return_when=cf.FIRST_COMPLETED)
+            for f in [f for f, download in in_flight.items() if download in done]:
+                result = in_flight.pop(f).result()
+                if not f.futures:
+                    completed[f] = result
+                    continue
+                # The function returned new futures, wait for them instead
+                new_fs = [new_f for new_f in f._new_futures if new_f._produce_output]
+                if ordered:
+                    position = queue.index(f)
+                    del queue[position]
+                    for new_f in reversed(new_fs):
+                        queue.insert(position, new_f)
+                else:
+                    del queue[f]
+                    queue.update(dict.fromkeys(new_fs))
+                    watch(new_fs)
+
+            while completed:
+                if ordered:
+                    if queue[0] not in completed:
+                        break
+                    f = queue.popleft()
+                else:
+                    f = next(iter(completed))
+                    del queue[f]
+                result = completed.pop(f)
+                f._release_output()
+                yield f, result
+    finally:
+        for download in in_flight.values():
+            download.cancel()
+        # The generator can be closed before all the futures are ready
+        for f in watched:
+            f._remove_ready_callback(ready_q.put)
+
+    logger.debug(f"ExecutorID {fs[0].executor_id} - Finished iterating results")
+
+
 def _create_executors_data_from_futures(fs, internal_storage):
     """
     Creates a dummy job necessary for the job monitor
@@ -240,7 +378,7 @@ def _create_executors_data_from_futures(fs, internal_storage):
         if internal_storage and internal_storage.backend == f._storage_config['backend']:
             executor_data.internal_storage = internal_storage
         else:
-            executor_data.internal_storage = InternalStorage(f._storage_config)
+            executor_data.internal_storage = get_internal_storage(f._storage_config)
 
         executor_jobs.append(executor_data)
 
@@ -289,12 +427,10 @@ def _get_executor_data(fs, exec_data, download_results, throw_except, threadpool
     def get_status(f):
         f.status(throw_except=throw_except, internal_storage=exec_data.internal_storage)
 
-    pool = cf.ThreadPoolExecutor(max_workers=threadpool_size)
     if download_results:
-        list(pool.map(get_result, fs_to_wait_on))
+        exec_data.internal_storage.io_map(get_result, fs_to_wait_on, max_workers=threadpool_size)
     else:
-        list(pool.map(get_status, fs_to_wait_on))
-    pool.shutdown()
+        exec_data.internal_storage.io_map(get_status, fs_to_wait_on, max_workers=threadpool_size)
 
     if pbar:
         for f in fs_to_wait_on:
@@ -34,14 +34,13 @@ from types import SimpleNamespace
 from multiprocessing.managers import SyncManager
 
 from lithops.version import __version__
-from lithops.config import extract_storage_config
-from lithops.storage import InternalStorage
 from lithops.worker.jobrunner import JobRunner
 from lithops.worker.utils import LogStream, custom_redirection, \
-    get_function_and_modules, get_function_data
-from lithops.constants import JOBS_PREFIX, LITHOPS_TEMP_DIR, MODULES_DIR
+    get_function_and_modules, get_function_data, get_internal_storage, get_modules_path, \
+    get_job_config
+from lithops.constants import JOBS_PREFIX, LITHOPS_TEMP_DIR
 from lithops.utils import setup_lithops_logger, is_unix_system
-from lithops.worker.status import create_call_status
+from lithops.worker.status import create_call_status, close_status_batches
 from lithops.worker.utils import SystemMonitor
 from lithops.worker.energy_manager import EnergyManager
 from lithops.worker.processor_info import add_processor_info_to_task
@@ -61,9 +60,9 @@ class ShutdownSentinel:
 
 
 def create_job(payload: dict) -> SimpleNamespace:
+    payload['config'] = get_job_config(payload)
     job = SimpleNamespace(**payload)
-    storage_config = extract_storage_config(job.config)
-    internal_storage = InternalStorage(storage_config)
+    internal_storage = get_internal_storage(job.config)
     job.func = get_function_and_modules(job, internal_storage)
     job.data = get_function_data(job, internal_storage)
 
@@ -80,6 +79,8 @@ def function_handler(payload):
     worker_processes = min(job.worker_processes, len(job.call_ids))
     logger.info(f'Tasks received: {len(job.call_ids)} - Worker processes: {worker_processes}')
 
+    job.status_batch = job.config['lithops'].get('batch_status', False) and len(job.call_ids) > 1
+
     if worker_processes == 1:
         work_queue = Queue()
         for call_id in job.call_ids:
@@ -94,7 +95,8 @@ def function_handler(payload):
         job_runners = []
 
         for call_id in job.call_ids:
-            data = job.data.pop(0)
+            # The manager queue pickles the data, which can be a memoryview
+            data = bytes(job.data.pop(0))
             work_queue.put((job, call_id, data))
 
         for pid in range(worker_processes):
@@ -109,7 +111,7 @@ def function_handler(payload):
         manager.shutdown()
 
     # Delete modules path from syspath
-    module_path = os.path.join(MODULES_DIR, job.job_key)
+    module_path = get_modules_path(job)
     if module_path in sys.path:
         sys.path.remove(module_path)
 
@@ -142,6 +144,8 @@ def python_queue_consumer(pid, work_queue, initializer=None, callback=None):
 
         callback(pid, task) if callback is not None else None
 
+    close_status_batches()
+
     logger.info(f'Worker process {pid} finished')
 
 
@@ -188,8 +192,7 @@ def run_task(task):
     env['__LITHOPS_SESSION_ID'] = '-'.join([task.job_key, task.call_id])
     os.environ.update(env)
 
-    storage_config = extract_storage_config(task.config)
-    internal_storage = InternalStorage(storage_config)
+    internal_storage = get_internal_storage(task.config)
     call_status = create_call_status(task, internal_storage)
 
     runtime_name = task.runtime_name
@@ -235,7 +238,8 @@ def run_task(task):
         energy_manager.start()
         
         # Start and wait for the job
-        jrp.start()
+        with call_status.send_lock():
+            jrp.start()
         jrp.join(task.execution_timeout)
         
         # Stop monitoring
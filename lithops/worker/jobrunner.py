@@ -19,6 +19,7 @@ import os
 import io
 import sys
 import ast
+import json
 import pika
 import time
 import pickle
@@ -27,6 +28,8 @@ import inspect
 import requests
 import traceback
 from pydoc import locate
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 
 from lithops.worker.utils import peak_memory
 
@@ -37,16 +40,20 @@ except ModuleNotFoundError:
     pass
 
 from lithops.storage import Storage
+from lithops.config import extract_storage_config
 from lithops.wait import wait
 from lithops.future import ResponseFuture
 from lithops.utils import WrappedStreamingBody, sizeof_fmt, \
-    is_object_processing_function, FuturesList, verify_args
+    is_object_processing_function, FuturesList, verify_args, pickle_loads, \
+    pickle_dumps, shuffle_partition, FramesReader, OutOfBandPickle
 from lithops.utils import WrappedStreamingBodyPartition
 from lithops.util.metrics import PrometheusExporter
-from lithops.storage.utils import create_output_key
+from lithops.storage.utils import create_output_key, create_shuffle_key, CloudObjectBundle
 
 logger = logging.getLogger(__name__)
 
+BUNDLE_PREFETCH_THREADS = 32
+
 
 class JobStats:
 
@@ -70,7 +77,7 @@ class JobRunner:
         self.internal_storage = internal_storage
         self.lithops_config = job.config
 
-        self.output_key = create_output_key(job.executor_id, job.job_id, job.call_id)
+        self.output_key = create_output_key(job.executor_id, job.job_id, job.call_id, getattr(job, 'attempt', 0))
 
         # Setup stats class
         self.stats = JobStats(self.job.stats_file)
@@ -119,17 +126,130 @@ class JobRunner:
     def _wait_futures(self, data):
         logger.info('Reduce function: waiting for map results')
         fut_list = list(data.values())[0]
-        wait(fut_list, self.internal_storage, download_results=True)
-        results = [f.result() for f in fut_list if f.done and not f.futures]
+        if ast.literal_eval(os.environ.get('__LITHOPS_SHUFFLE_JOB', 'False')):
+            fut_list = self._get_shuffle_futures(fut_list)
+            wait(fut_list, self.internal_storage, download_results=False)
+            results = self._get_shuffle_partition(fut_list)
+        else:
+            wait(fut_list, self.internal_storage, download_results=True)
+            results = [f.result() for f in fut_list if f.done and not f.futures]
         fut_list.clear()
         data[next(iter(data))] = results
 
+    def _put_shuffle_output(self, result, partitions):
+        """
+        Hash-partitions the (key, value) pairs returned by a map function and
+        stores the partitions one after another in a single object. The
+        offsets of the partitions are saved in the call status, so that each
+        reducer gets its partition from every map call with a ranged GET
+        """
+        pairs = result.items() if isinstance(result, dict) else result or []
+        parts = [[] for _ in range(partitions)]
+        for key, value in pairs:
+            parts[shuffle_partition(key, partitions)].append((key, value))
+
+        frames = []
+        offsets = [0]
+        for part in parts:
+            if part:
+                pickled_part = pickle_dumps(part, framed=True)
+                if isinstance(pickled_part, OutOfBandPickle):
+                    frames.extend(pickled_part.frames)
+                else:
+                    frames.append(memoryview(pickled_part))
+                offsets.append(offsets[-1] + len(pickled_part))
+            else:
+                offsets.append(offsets[-1])
+
+        self.stats.write('shuffle_offsets', json.dumps(offsets))
+
+        if frames:
+            output_upload_start_tstamp = time.time()
+            logger.info(f"Storing {partitions} shuffle partitions - Size: {sizeof_fmt(offsets[-1])}")
+            shuffle_key = create_shuffle_key(self.job.executor_id, self.job.job_id,
+                                             self.job.call_id, getattr(self.job, 'attempt', 0))
+            self.internal_storage.put_data(shuffle_key, FramesReader(frames))
+            output_upload_end_tstamp = time.time()
+            self.stats.write("worker_result_upload_time", round(output_upload_end_tstamp - output_upload_start_tstamp, 8))
+
+    def _get_shuffle_futures(self, map_job):
+        """
+        Rebuilds the futures of the map calls of a shuffle
+        from the fields of the map job
+        """
+        map_job = SimpleNamespace(**map_job)
+        storage_config = extract_storage_config(self.lithops_config)
+        fut_list = [ResponseFuture(f'{call_id:05d}', map_job, {}, storage_config)
+                    for call_id in range(map_job.total_calls)]
+        for f in fut_list:
+            f._set_invoked()
+        return fut_list
+
+    def _get_shuffle_partition(self, fut_list):
+        """
+        Gets the partition of this reducer from the shuffle output of every
+        map call, and returns the list of its (key, value) pairs
+        """
+        partition = int(self.job.call_id)
+        segments = []
+        for f in fut_list:
+            if not f.done or f.futures:
+                continue
+            offsets = json.loads(f._call_status['shuffle_offsets'])
+            first_byte, end_byte = offsets[partition], offsets[partition + 1]
+            if end_byte > first_byte:
+                shuffle_key = create_shuffle_key(f.executor_id, f.job_id, f.call_id,
+                                                 f._call_status.get('attempt', 0))
+                segments.append((shuffle_key, first_byte, end_byte - 1))
+
+        logger.info(f'Getting shuffle partition {partition} from {len(segments)} map calls')
+
+        def get_segment(segment):
+            shuffle_key, first_byte, last_byte = segment
+            extra_get_args = {'Range': f'bytes={first_byte}-{last_byte}'}
+            return pickle_loads(self.internal_storage.get_data(shuffle_key, extra_get_args=extra_get_args))
+
+        pairs = []
+        for part in self.internal_storage.io_map(get_segment, segments):
+            pairs.extend(part)
+
+        return pairs
+
     def _load_object(self, data):
         """
-        Loads the object in case of object processing
+        Loads the object, or the bundle of objects, in case of object processing
         """
-        extra_get_args = {}
         obj = data['obj']
+        if isinstance(obj, CloudObjectBundle):
+            self._load_bundle(obj)
+        else:
+            self._load_cloud_object(obj)
+
+    def _load_bundle(self, bundle):
+        """
+        Prefetches all the objects of a bundle concurrently,
+        each one into its own in-memory data_stream. The single
+        object of a one-object bundle, usually the chunk of a large
+        object, keeps its streaming data_stream
+        """
+        if len(bundle) == 1:
+            self._load_cloud_object(bundle.objects[0])
+            return
+
+        logger.info(f'Getting {len(bundle)} objects from {bundle.backend}://{bundle.bucket}')
+
+        def prefetch(obj):
+            self._load_cloud_object(obj)
+            obj.data_stream = io.BytesIO(obj.data_stream.read())
+
+        with ThreadPoolExecutor(BUNDLE_PREFETCH_THREADS) as ex:
+            list(ex.map(prefetch, bundle))
+
+    def _load_cloud_object(self, obj):
+        """
+        Sets the data_stream of a single object
+        """
+        extra_get_args = {}
 
         if hasattr(obj, 'bucket') and not hasattr(obj, 'path'):
             logger.info(f'Getting dataset from {obj.backend}://{obj.bucket}/{obj.key}')
@@ -161,7 +281,8 @@ class JobRunner:
             stream_body = stream
 
         if obj.data_byte_range is not None:
-            if obj.newline is None:
+            if obj.newline is None or getattr(obj, 'exact_range', False):
+                # Exact ranges of the partition index already start and end at a record
                 stream_body = WrappedStreamingBody(stream, obj.chunk_size)
             else:
                 stream_body = WrappedStreamingBodyPartition(stream, obj.chunk_size, obj.data_byte_range, obj.newline)
@@ -207,8 +328,8 @@ class JobRunner:
         fn_name = None
 
         try:
-            func = pickle.loads(self.job.func)
-            data = pickle.loads(self.job.data)
+            func = pickle_loads(self.job.func)
+            data = pickle_loads(self.job.data)
 
             if ast.literal_eval(os.environ.get('__LITHOPS_REDUCE_JOB', 'False')):
                 self._wait_futures(data)
@@ -247,6 +368,11 @@ class JobRunner:
             self.stats.write('worker_func_exec_time', round(function_end_tstamp - function_start_tstamp, 8))
             self.stats.write('func_result_size', 0)
 
+            shuffle_partitions = int(os.environ.get('__LITHOPS_SHUFFLE_PARTITIONS', 0))
+            if shuffle_partitions:
+                self._put_shuffle_output(result, shuffle_partitions)
+                result = None
+
             if result is not None:
                 # Check for new futures
                 if isinstance(result, ResponseFuture) or isinstance(result, FuturesList) \
@@ -255,11 +381,12 @@ class JobRunner:
                     result = None
                 else:
                     logger.debug("Pickling result")
-                    pickled_output = pickle.dumps(result)
+                    compress = self.lithops_config['lithops'].get('result_compression', False)
+                    pickled_output = pickle_dumps(result, framed=True, compress=compress)
                     pickled_output_size = len(pickled_output)
                     self.stats.write('func_result_size', pickled_output_size)
                     if pickled_output_size < 8 * 1024:  # 8KB
-                        self.stats.write('result', pickled_output)
+                        self.stats.write('result', bytes(pickled_output))
                         self.stats.write("worker_result_upload_time", 0)
                         result = None
 
@@ -308,6 +435,8 @@ class JobRunner:
             if result is not None and not exception:
                 output_upload_start_tstamp = time.time()
                 logger.info(f"Storing function result - Size: {sizeof_fmt(len(pickled_output))}")
+                if isinstance(pickled_output, OutOfBandPickle):
+                    pickled_output = pickled_output.reader()
                 self.internal_storage.put_data(self.output_key, pickled_output)
                 output_upload_end_tstamp = time.time()
                 self.stats.write("worker_result_upload_time", round(output_upload_end_tstamp - output_upload_start_tstamp, 8))
@@ -4,23 +4,28 @@ import pika
 import json
 import time
 import logging
+import threading
 from tblib import pickling_support
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 
 import lithops.worker
 from lithops.utils import sizeof_fmt
 from lithops.storage.utils import create_status_key, \
-    create_init_key
+    create_init_key, create_status_batch_key
 
 
 pickling_support.install()
 
 logger = logging.getLogger(__name__)
 
+STATUS_BATCHES = {}
+
 
 def create_call_status(job, internal_storage):
     """ Creates a call status class based on the monitoring backend"""
     monitoring_backend = job.config['lithops']['monitoring']
+    if monitoring_backend == 'storage' and getattr(job, 'status_batch', False):
+        return BatchedStorageCallStatus(job, internal_storage)
     Status = getattr(lithops.worker.status, '{}CallStatus'
                      .format(monitoring_backend.capitalize()))
     return Status(job, internal_storage)
@@ -42,7 +47,8 @@ class CallStatus:
             'call_id': job.call_id,
             'job_id': job.job_id,
             'executor_id': job.executor_id,
-            'chunksize': job.chunksize
+            'chunksize': job.chunksize,
+            'attempt': getattr(job, 'attempt', 0)
         }
 
         if ast.literal_eval(os.environ.get('WARM_CONTAINER', 'False')):
@@ -65,6 +71,14 @@ class CallStatus:
         self.status['type'] = '__end__'
         self._send()
 
+    def send_lock(self):
+        """
+        Returns the lock held while the status events are sent
+        in background. New processes must not be forked while
+        another thread holds it
+        """
+        return nullcontext()
+
 
 class StorageCallStatus(CallStatus):
 
@@ -89,6 +103,90 @@ class StorageCallStatus(CallStatus):
             self.internal_storage.put_data(status_key, dmpd_response_status)
 
 
+class StatusBatch:
+    """
+    Aggregates the call statuses of all the calls run by a worker process.
+    The new call statuses are flushed periodically to the storage, each
+    time in a new status batch object
+    """
+
+    def __init__(self, job, internal_storage):
+        self.executor_id = job.executor_id
+        self.job_id = job.job_id
+        self.worker_id = f"{os.environ.get('__LITHOPS_ACTIVATION_ID')}-{os.getpid()}"
+        self.internal_storage = internal_storage
+        self.flush_interval = job.config['lithops']['monitoring_interval']
+        self.statuses = {}
+        self.batch_count = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def add(self, status):
+        """ Adds or updates the status of a call"""
+        with self.lock:
+            self.statuses[status['call_id']] = status.copy()
+
+    def _flush_periodically(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # The call statuses are kept, and stored in the next flush
+                logger.error(f"Error storing the status batch: {e}")
+
+    def flush(self):
+        """ Stores the call statuses added since the last flush"""
+        with self.lock:
+            if not self.statuses:
+                return
+            batch_id = f'{self.worker_id}-{self.batch_count:05d}'
+            batch_key = create_status_batch_key(self.executor_id, self.job_id, batch_id)
+            dmpd_batch = json.dumps(self.statuses)
+            logger.debug(f"Storing status batch of {len(self.statuses)} "
+                         f"calls - Size: {sizeof_fmt(len(dmpd_batch))}")
+            self.internal_storage.put_data(batch_key, dmpd_batch)
+            self.statuses = {}
+            self.batch_count += 1
+
+    def close(self):
+        """ Stops the periodic flushes and stores the last call statuses"""
+        self.stopped.set()
+        self.flusher.join()
+        self.flush()
+
+
+def close_status_batches():
+    """
+    Stores the final status batches of the current worker process
+    """
+    while STATUS_BATCHES:
+        _, status_batch = STATUS_BATCHES.popitem()
+        status_batch.close()
+
+
+class BatchedStorageCallStatus(StorageCallStatus):
+
+    def __init__(self, job, internal_storage):
+        super().__init__(job, internal_storage)
+
+        if job.job_key not in STATUS_BATCHES:
+            STATUS_BATCHES[job.job_key] = StatusBatch(job, internal_storage)
+        self.status_batch = STATUS_BATCHES[job.job_key]
+
+    def send_lock(self):
+        return self.status_batch.lock
+
+    def _send(self):
+        """
+        Adds the status event to the status batch of the worker process
+        """
+        self.status_batch.add(self.status)
+        if self.status['type'] == '__end__':
+            logger.info("Execution stats added to the status batch")
+
+
 class RabbitmqCallStatus(StorageCallStatus):
 
     def __init__(self, job, internal_storage):
@@ -16,18 +16,26 @@
 
 import os
 import sys
+import json
+import hashlib
 import pkgutil
 import logging
 import pickle
+import shutil
 import platform
 import subprocess
 import time
 import threading
+from collections import OrderedDict
 from contextlib import contextmanager
+from types import SimpleNamespace
 
 from lithops.version import __version__ as lithops_ver
-from lithops.utils import sizeof_fmt, is_unix_system, b64str_to_bytes
-from lithops.constants import MODULES_DIR, SA_INSTALL_DIR, LITHOPS_TEMP_DIR
+from lithops.config import extract_storage_config
+from lithops import storage
+from lithops.utils import sizeof_fmt, is_unix_system, b64str_to_bytes, \
+    pickle_loads, read_into_buffer
+from lithops.constants import MODULES_DIR, SA_INSTALL_DIR, FUNCTIONS_DIR
 
 try:
     import psutil
@@ -38,6 +46,14 @@ except ModuleNotFoundError:
 
 logger = logging.getLogger(__name__)
 
+# Functions and modules already downloaded by this process, keyed by func_key
+FUNCTION_CACHE = OrderedDict()
+FUNCTION_CACHE_SIZE = 32
+# Functions kept in the local disk cache, the least recently used are removed
+FUNCTIONS_DISK_CACHE_SIZE = 64
+# Content hashes of the functions included in the runtime, by file path and mtime
+INCLUDED_FUNCTION_HASHES = {}
+
 
 if is_unix_system():
     from resource import RUSAGE_SELF, getrusage
@@ -45,13 +61,33 @@ if is_unix_system():
     import ps_mem
 
 
+def get_modules_path(job):
+    """
+    Returns the local directory of the function modules. Function keys are
+    content hashes, so the jobs with the same function share the directory
+    """
+    backend = job.config['lithops']['backend']
+    if job.config[backend].get('runtime_include_function'):
+        # Included functions are always stored as func.pickle, so the
+        # directory is named after the content hash of the file
+        func_path = '/'.join([SA_INSTALL_DIR, job.func_key])
+        func_version = (func_path, os.stat(func_path).st_mtime_ns)
+        if func_version not in INCLUDED_FUNCTION_HASHES:
+            with open(func_path, "rb") as f:
+                INCLUDED_FUNCTION_HASHES[func_version] = hashlib.md5(f.read()).hexdigest()
+        return os.path.join(MODULES_DIR, INCLUDED_FUNCTION_HASHES[func_version])
+
+    return os.path.join(MODULES_DIR, os.path.basename(job.func_key).split('.')[0])
+
+
 def get_function_and_modules(job, internal_storage):
     """
-    Gets the function and modules from storage
+    Gets the function and modules from the memory cache, the local disk
+    cache or the storage, and writes the modules once per function
     """
     logger.info("Getting function and modules")
     backend = job.config['lithops']['backend']
-    func_path = '/'.join([LITHOPS_TEMP_DIR, job.func_key])
+    func_path = os.path.join(FUNCTIONS_DIR, os.path.basename(job.func_key))
     func_obj = None
 
     if job.config[backend].get('runtime_include_function'):
@@ -60,38 +96,142 @@ def get_function_and_modules(job, internal_storage):
         func_path = '/'.join([SA_INSTALL_DIR, job.func_key])
         with open(func_path, "rb") as f:
             func_obj = f.read()
+        loaded_func_all = pickle.loads(func_obj)
+    elif job.func_key in FUNCTION_CACHE:
+        logger.info(f"Loading {job.func_key} from local memory cache")
+        FUNCTION_CACHE.move_to_end(job.func_key)
+        loaded_func_all = FUNCTION_CACHE[job.func_key]
     else:
-        logger.info(f"Loading {job.func_key} from storage")
-        func_obj = internal_storage.get_func(job.func_key)
-
-    loaded_func_all = pickle.loads(func_obj)
+        try:
+            with open(func_path, "rb") as f:
+                func_obj = f.read()
+            logger.info(f"Loaded {job.func_key} from local disk cache")
+            os.utime(func_path)
+        except FileNotFoundError:
+            logger.info(f"Loading {job.func_key} from storage")
+            func_obj = internal_storage.get_func(job.func_key)
+            _write_atomic(func_path, func_obj)
+            _prune_disk_cache()
+        loaded_func_all = pickle.loads(func_obj)
+        FUNCTION_CACHE[job.func_key] = loaded_func_all
+        if len(FUNCTION_CACHE) > FUNCTION_CACHE_SIZE:
+            FUNCTION_CACHE.popitem(last=False)
 
     if loaded_func_all.get('module_data'):
-        module_path = os.path.join(MODULES_DIR, job.job_key)
-        logger.info(f"Writing function dependencies to {module_path}")
-        os.makedirs(module_path, exist_ok=True)
-        sys.path.append(module_path)
+        module_path = get_modules_path(job)
+        if not os.path.isdir(module_path):
+            logger.info(f"Writing function dependencies to {module_path}")
+            _write_modules(module_path, loaded_func_all['module_data'])
+        if module_path not in sys.path:
+            sys.path.append(module_path)
 
-        for m_filename, m_data in loaded_func_all['module_data'].items():
-            m_path = os.path.dirname(m_filename)
+    return loaded_func_all['func']
 
-            if len(m_path) > 0 and m_path[0] == "/":
-                m_path = m_path[1:]
-            to_make = os.path.join(module_path, m_path)
-            try:
-                os.makedirs(to_make)
-            except OSError as e:
-                if e.errno == 17:
-                    pass
-                else:
-                    raise e
-            full_filename = os.path.join(to_make, os.path.basename(m_filename))
-            # logger.debug('Writing {}'.format(full_filename))
-
-            with open(full_filename, 'wb') as fid:
-                fid.write(b64str_to_bytes(m_data))
 
-    return loaded_func_all['func']
+def _write_atomic(path, data):
+    """
+    Writes a file of the local disk cache, so that concurrent
+    readers never see it partially written
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _prune_disk_cache():
+    """
+    Removes the least recently used functions, and their modules,
+    from the local disk cache when it holds more than FUNCTIONS_DISK_CACHE_SIZE
+    """
+    try:
+        entries = [e for e in os.scandir(FUNCTIONS_DIR)
+                   if e.is_file() and not e.name.endswith('.tmp')]
+        entries.sort(key=lambda e: e.stat().st_mtime)
+    except FileNotFoundError:
+        return
+
+    for entry in entries[:max(len(entries) - FUNCTIONS_DISK_CACHE_SIZE, 0)]:
+        logger.debug(f"Removing {entry.name} from local disk cache")
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(os.path.join(MODULES_DIR, entry.name.split('.')[0]), ignore_errors=True)
+
+
+def _write_modules(module_path, module_data):
+    """
+    Writes the module tree in a temporary directory and moves it
+    to module_path, so that concurrent readers never see it partially written
+    """
+    tmp_path = f'{module_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    for m_filename, m_data in module_data.items():
+        m_path = os.path.dirname(m_filename)
+
+        if len(m_path) > 0 and m_path[0] == "/":
+            m_path = m_path[1:]
+        to_make = os.path.join(tmp_path, m_path)
+        os.makedirs(to_make, exist_ok=True)
+        full_filename = os.path.join(to_make, os.path.basename(m_filename))
+
+        with open(full_filename, 'wb') as fid:
+            fid.write(b64str_to_bytes(m_data))
+
+    try:
+        os.rename(tmp_path, module_path)
+    except OSError:
+        # Another process already wrote the same modules
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def get_internal_storage(config):
+    """
+    Returns an InternalStorage instance for the given lithops config, reusing
+    the one already created by this process for the same storage config
+    """
+    return storage.get_internal_storage(extract_storage_config(config))
+
+
+JOB_CONFIG_CACHE = {}
+
+
+def get_job_config(payload):
+    """
+    Returns the lithops config of a job. FaaS invocations reference the
+    config by the key of its content-addressed object, which is downloaded
+    once per worker and config
+    """
+    if 'config' in payload:
+        return payload['config']
+
+    config_key = payload['config_key']
+    if config_key not in JOB_CONFIG_CACHE:
+        internal_storage = storage.get_internal_storage(payload['storage_config'])
+        JOB_CONFIG_CACHE[config_key] = json.loads(internal_storage.get_data(config_key))
+
+    return JOB_CONFIG_CACHE[config_key]
+
+
+def preload_function(payload):
+    """
+    Loads the function and its modules in a long-lived runner process, so
+    that the JobRunner processes forked from it find them already imported
+    """
+    job = SimpleNamespace(**payload)
+    internal_storage = get_internal_storage(job.config)
+    func = get_function_and_modules(job, internal_storage)
+
+    try:
+        pickle_loads(func)
+    except Exception as e:
+        logger.debug(f'Unable to preload function {job.func_key}: {e}')
+
+    module_path = get_modules_path(job)
+    if module_path in sys.path:
+        sys.path.remove(module_path)
 
 
 def get_function_data(job, internal_storage):
@@ -107,16 +247,20 @@ def get_function_data(job, internal_storage):
             extra_get_args['Range'] = range_str
 
         logger.info("Loading function data parameters from storage")
-        data_obj = internal_storage.get_data(job.data_key, extra_get_args=extra_get_args)
 
         loaded_data = []
         offset = 0
         if job.data_byte_ranges is not None:
+            # The data of each call is a view of the downloaded buffer, and the
+            # out-of-band pickle buffers are unpickled as views of it as well
+            data_stream = internal_storage.get_data(job.data_key, stream=True, extra_get_args=extra_get_args)
+            data_obj = memoryview(read_into_buffer(data_stream, last_byte - init_byte + 1))
             for dbr in job.data_byte_ranges:
                 length = dbr[1] - dbr[0] + 1
                 loaded_data.append(data_obj[offset:offset + length])
                 offset += length
         else:
+            data_obj = internal_storage.get_data(job.data_key, extra_get_args=extra_get_args)
             loaded_data.append(data_obj)
     else:
         loaded_data = [eval(byte_str) for byte_str in job.data_byte_strs]